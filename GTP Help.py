@@ -1,7 +1,12 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from affichage import tracer_session
+from detection import detecter_pics_vallees
+from gaitway import charger_session
+from instrumentation import instrumentation_environnement, terminer_environnement
+from lissage import BanqueMoyennes, balayer
+
 # Chemins des fichiers
 file_path = r'D:\\Documents\\Mémoire\\Data John Doe\\John Doe gaitway 3D locomotion_R10.txt'
 output_file = r'D:\\Documents\\Mémoire\\Data John Doe\\Auto Python\\ResultPython_JD_R10.txt'
@@ -10,8 +15,13 @@ output_file = r'D:\\Documents\\Mémoire\\Data John Doe\\Auto Python\\ResultPytho
 seuil_p = 2.795
 seuil_v = 2.755
 
-# Lire le fichier en ignorant les 43 premières lignes
-data = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=44)
+# Mesures par étape avec GAITWAY_INSTRUMENTATION=mesures.json (ou '-' pour les afficher)
+instrumentation = instrumentation_environnement()
+
+# Lire uniquement les colonnes utiles (en-tête de 44 lignes ignoré, cache sur disque)
+with instrumentation.etape('lecture') as mesure:
+    data = charger_session(file_path, colonnes=(0, 9, 19, 31))
+    mesure['Lignes'] = len(data)
 
 # Extraire les colonnes nécessaires
 time = data[0]
@@ -19,58 +29,37 @@ raw_speed = data[9]
 speed = data[19]
 contact_mode = data[31]
 
-# Calculer la moyenne mobile pour raw_speed
-moving_average_raw_speed = raw_speed.rolling(window=21, center=True).mean()
-
-# Initialiser les listes pour stocker les vallées, les pics et les transitions de contact mode
-vallees = []
-pics = []
-averages_vals = []
+# Banque de moyennes mobiles de raw_speed (une seule somme cumulée pour toutes les fenêtres)
+with instrumentation.etape('moyenne_mobile', len(raw_speed)):
+    banque = BanqueMoyennes(raw_speed)
+    moving_average_raw_speed = banque[21]
 
 # Détecter les vallées et les pics pour raw_speed
-previous_type = None
-
-for i in range(10, len(moving_average_raw_speed) - 10):
-    if pd.notna(moving_average_raw_speed[i]):  # Vérifier que la valeur n'est pas NaN
-        window = moving_average_raw_speed[i - 10:i + 11]
-        min_value = window.min()
-        max_value = window.max()
-
-        is_vallee = moving_average_raw_speed[i] == min_value and moving_average_raw_speed[i] < seuil_v
-        is_pic = moving_average_raw_speed[i] == max_value and moving_average_raw_speed[i] > seuil_p
-
-        averages_vals.append((time[i], moving_average_raw_speed[i], ''))
-
-        # Vérifier les pics
-        if is_pic and previous_type != "pic":
-            pics.append((time[i], moving_average_raw_speed[i], 'Pic'))
-            previous_type = "pic"
-
-        # Vérifier les vallées
-        elif is_vallee and previous_type != "val":
-            vallees.append((time[i], moving_average_raw_speed[i], 'Vallée'))
-            previous_type = "val"
-
-print("Dernière détection de vallée:", is_vallee)
-print("Dernière détection de pic:", is_pic)
-
-# Visualisation des données
-plt.figure(figsize=(10, 6))
-pics_df = pd.DataFrame(pics)
-vallees_df = pd.DataFrame(vallees)
-averages_vals_df = pd.DataFrame(averages_vals)
-
-plt.plot(averages_vals_df[0], averages_vals_df[1], label='Moyenne mobile de Raw Speed', color='orange')
-
-for i in range(len(vallees_df)):
-    plt.axvline(x=vallees_df[0][i], color='green', label='Vallées' if i == 0 else "")
-
-for i in range(len(pics_df)):
-    plt.axvline(x=pics_df[0][i], color='blue', label='Pics' if i == 0 else "")
+with instrumentation.etape('extrema', len(raw_speed)):
+    indices_pics, indices_vallees = detecter_pics_vallees(moving_average_raw_speed, seuil_v, seuil_p)
+temps = time.to_numpy()
+pics = [(temps[i], moving_average_raw_speed[i], 'Pic') for i in indices_pics]
+vallees = [(temps[i], moving_average_raw_speed[i], 'Vallée') for i in indices_vallees]
+
+print("Nombre de vallées:", len(vallees))
+print("Nombre de pics:", len(pics))
+
+# Balayage des fenêtres et des seuils en réutilisant la même banque de moyennes
+with instrumentation.etape('balayage', len(raw_speed)):
+    balayage = balayer(temps, raw_speed, [13, 21, 41, 61, 81],
+                       np.round(np.linspace(seuil_v - 0.02, seuil_v + 0.02, 5), 4),
+                       np.round(np.linspace(seuil_p - 0.02, seuil_p + 0.02, 5), 4), banque)
+print(balayage.to_string(index=False))
+
+# Visualisation des données (signal décimé, une collection de barres par type d'événement)
+with instrumentation.etape('trace', len(temps)):
+    tracer_session(temps, moving_average_raw_speed, figsize=(10, 6), couleur='orange',
+                   label='Moyenne mobile de Raw Speed',
+                   evenements={'Vallée': temps[indices_vallees], 'Pic': temps[indices_pics]})
+terminer_environnement(instrumentation)
 
 plt.xlabel('Temps')
 plt.ylabel('Raw Speed')
 plt.title('Raw Speed et Moyenne Mobile avec Pics et Vallées')
-plt.legend()
 plt.grid(True)
 plt.show()
@@ -1,17 +1,31 @@
-import numpy as np
 import pandas as pd
 
-# Charger les données du fichier texte en ignorant les 44 premières lignes
+from cadence import bornes_ecarts, estimer_cadence, fenetre_motif
+from classeur import ClasseurFlux
+from detection import detecter_motifs
+from evenements import PIC, VALLEE, TableEvenements
+from features import seuils_fenetres, seuils_fenetres_calibres
+from gaitway import charger_session
+from instrumentation import instrumentation_environnement, terminer_environnement
+from lissage import lisser
+
+# Mesures par étape avec GAITWAY_INSTRUMENTATION=mesures.json (ou '-' pour les afficher)
+instrumentation = instrumentation_environnement()
+
+# Charger les colonnes temps et signal du fichier texte (en-tête de 44 lignes ignoré)
 file_path = 'D:/Documents/Mémoire/Data John Doe/John Doe gaitway 3D locomotion_W7.txt'
-data = pd.read_csv(file_path, skiprows=44, delimiter='\t')
+with instrumentation.etape('lecture') as mesure:
+    data = charger_session(file_path, colonnes=(0, 19))
+    mesure['Lignes'] = len(data)
 
 # Extraire les colonnes temps et signal
-time = data.iloc[:, 0].values
-signal = data.iloc[:, 19].values
+time = data[0].values
+signal = data[19].values
 
-# Appliquer une moyenne mobile (window=21, center=True)
-signal_series = pd.Series(signal)
-moving_average = signal_series.rolling(window=21, center=True).mean().values
+# Lisser le signal : 'moyenne' (moyenne mobile, window=21, center=True), 'savgol' ou 'butterworth'
+lissage = 'moyenne'
+with instrumentation.etape('moyenne_mobile', len(signal)):
+    moving_average = lisser(signal, lissage, fenetre=21, temps=time)
 
 # Définir les seuils avant et après la ligne 8500
 thresholds = {
@@ -19,67 +33,76 @@ thresholds = {
     "after_8500": {"peak": 1.9425, "valley": 1.929}
 }
 
-# Détection des pics et des vallées
-peaks = []
-valleys = []
+# Détection des pics et des vallées : fenêtre fixe, ou déduite de la cadence de la session
+cadence_auto = False
 window_size = 150
-
-for i in range(len(moving_average) - window_size):
-    window = moving_average[i:i + window_size]
-    time_window = time[i:i + window_size]
-
-    # Déterminer les seuils en fonction de la ligne actuelle
-    if i < 8500:
-        peak_threshold = thresholds["before_8500"]["peak"]
-        valley_threshold = thresholds["before_8500"]["valley"]
-    else:
-        peak_threshold = thresholds["after_8500"]["peak"]
-        valley_threshold = thresholds["after_8500"]["valley"]
-
-    # Détecter les pics et les vallées dans la fenêtre
-    max_val = np.max(window)
-    min_val = np.min(window)
-    max_index = np.argmax(window)
-    min_index = np.argmin(window)
-
-    # Vérifier les conditions de pics et vallées (pic>seuil and vallée<seuil and pic_avant_vallée and fenêtré)
-    if (max_val >= peak_threshold and min_val <= valley_threshold and
-            max_index < min_index and min_index - max_index < 150 and
-            max_val - min_val > 0.0125):
-        peaks.append((time_window[max_index], max_val))
-        valleys.append((time_window[min_index], min_val))
+cadence = None
+if cadence_auto:
+    with instrumentation.etape('cadence', len(moving_average)) as mesure:
+        cadence = estimer_cadence(time, moving_average)
+        window_size = fenetre_motif(cadence)
+        mesure['Segments'] = len(cadence)
+
+# Seuils de chaque fenêtre en fonction de la ligne de départ, ou calibrés sur la session
+# (quantiles glissants du signal lissé, sans bascule à une ligne fixe)
+calibrage_auto = False
+seuils = None
+if calibrage_auto:
+    with instrumentation.etape('calibrage', len(moving_average)):
+        peak_thresholds, valley_thresholds, seuils = seuils_fenetres_calibres(time, moving_average,
+                                                                              len(moving_average) - window_size)
+else:
+    peak_thresholds, valley_thresholds = seuils_fenetres(len(moving_average) - window_size,
+                                                         thresholds["before_8500"], thresholds["after_8500"], 8500)
+
+# Chaque motif (pic>seuil and vallée<seuil and pic_avant_vallée and fenêtré) n'est détecté qu'une fois
+with instrumentation.etape('fenetre_glissante', len(moving_average)) as mesure:
+    window_start, peak_index, valley_index = detecter_motifs(moving_average, peak_thresholds, valley_thresholds,
+                                                             window_size=window_size, ecart_min=0.0125)
+    mesure['Événements'] = len(window_start)
+
+# Événements compacts (temps, valeur, type) partagés avec main et MachineLearningWalk
+evenements = TableEvenements.depuis_indices(time, moving_average, {PIC: peak_index, VALLEE: valley_index})
 
 # Créer un DataFrame pour les pics et les vallées
-peaks_df = pd.DataFrame(peaks, columns=['Time', 'Value'])
-valleys_df = pd.DataFrame(valleys, columns=['Time', 'Value'])
+peaks_df = pd.DataFrame({'Time': time[peak_index], 'Value': moving_average[peak_index], 'Window': window_start})
+valleys_df = pd.DataFrame({'Time': time[valley_index], 'Value': moving_average[valley_index], 'Window': window_start})
 
 # Calculer la différence de temps entre les pics/vallées consécutifs
 peaks_df['Time_Diff'] = peaks_df['Time'].diff()
 valleys_df['Time_Diff'] = valleys_df['Time'].diff()
 
-# Filtrer les DataFrames pour ne conserver que les lignes où la différence de temps est supérieure à 0.3
-peaks_df = peaks_df[peaks_df['Time_Diff'] > 0.3]
-valleys_df = valleys_df[valleys_df['Time_Diff'] > 0.3]
+# Avec la cadence, écarter les événements trop proches du précédent (écart minimal du segment)
+if cadence is not None:
+    peaks_df = peaks_df[~(peaks_df['Time_Diff'] < bornes_ecarts(cadence, peaks_df['Time'])[0])]
+    valleys_df = valleys_df[~(valleys_df['Time_Diff'] < bornes_ecarts(cadence, valleys_df['Time'])[0])]
 
 # Ajouter le nombre de pics et vallées trouvés
 peaks_count = len(peaks_df)
 valleys_count = len(valleys_df)
 
 # Créer un fichier Excel et ajouter les données
-with pd.ExcelWriter('detected_patterns_W7.xlsx') as writer:
-    peaks_df.to_excel(writer, sheet_name='Peaks', index=False)
-    valleys_df.to_excel(writer, sheet_name='Valleys', index=False)
+with instrumentation.etape('ecriture', peaks_count + valleys_count):
+    with ClasseurFlux('detected_patterns_W7.xlsx', resume=False) as classeur:
+        classeur.ajouter_table('Peaks', peaks_df)
+        classeur.ajouter_table('Valleys', valleys_df)
+        if seuils is not None:
+            classeur.ajouter_table('Thresholds', seuils)
 
 print(f'Nombre de pics : {peaks_count}')
 print(f'Nombre de vallées : {valleys_count}')
 print("Detection complète, résultats sauvegardés dans detected_patterns.xlsx")
 
 import matplotlib.pyplot as plt
-plt.figure(figsize=(100, 6))
-
-plt.plot(time, moving_average, color='black', label='Moving Average')
-plt.scatter(valleys_df['Time'], valleys_df['Value'],  color='green', label='vallees')
-plt.scatter(peaks_df['Time'], peaks_df['Value'],  color='blue', label='pics')
+from affichage import tracer_session
+
+# Signal décimé à la largeur de la figure, pics et vallées en un seul appel chacun
+pics = evenements.selection(PIC)
+vallees = evenements.selection(VALLEE)
+with instrumentation.etape('trace', len(time)):
+    tracer_session(time, moving_average, figsize=(16, 6), label='Moving Average',
+                   points={'Vallée': (vallees.temps, vallees.valeurs), 'Pic': (pics.temps, pics.valeurs)})
+terminer_environnement(instrumentation)
 
 plt.xlabel('Time ')
 plt.ylabel('Speed')
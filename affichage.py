@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+# Couleurs des événements utilisées dans les notebooks
+COULEURS = {
+    'Pic': 'blue',
+    'Vallée': 'green',
+    'Pose de Pied': 'yellow',
+    'levé de Pied': 'orange',
+}
+
+
+def decimer_min_max(x, y, nb_pixels):
+    # Réduire le signal à un min et un max par pixel (dans leur ordre d'apparition) :
+    # le tracé est identique à l'œil mais ne dépend plus du nombre d'échantillons
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    nb_pixels = max(int(nb_pixels), 1)
+    if n <= 2 * nb_pixels:
+        return x, y
+
+    taille = -(-n // nb_pixels)
+    nb_paquets = -(-n // taille)
+    complet = np.full(nb_paquets * taille, np.nan)
+    complet[:n] = y
+    paquets = complet.reshape(nb_paquets, taille)
+
+    # Les NaN (et le remplissage final) sont ignorés, un paquet entièrement NaN reste NaN
+    pour_min = np.where(np.isnan(paquets), np.inf, paquets)
+    pour_max = np.where(np.isnan(paquets), -np.inf, paquets)
+    debut = np.arange(nb_paquets) * taille
+    indices_min = np.minimum(debut + pour_min.argmin(axis=1), n - 1)
+    indices_max = np.minimum(debut + pour_max.argmax(axis=1), n - 1)
+
+    indices = np.empty(2 * nb_paquets, dtype=np.intp)
+    indices[0::2] = np.minimum(indices_min, indices_max)
+    indices[1::2] = np.maximum(indices_min, indices_max)
+    return x[indices], y[indices]
+
+
+def un_par_pixel(temps, debut, fin, nb_pixels):
+    # Indices d'au plus un événement par colonne de pixels : au-delà, les barres se superposent
+    temps = np.asarray(temps, dtype=np.float64)
+    if len(temps) <= nb_pixels or fin <= debut:
+        return np.arange(len(temps))
+    colonnes = np.floor((temps - debut) / (fin - debut) * nb_pixels)
+    _, indices = np.unique(colonnes, return_index=True)
+    return indices
+
+
+def largeur_pixels(ax):
+    # Largeur de la zone de tracé en pixels
+    return ax.get_window_extent().width
+
+
+def tracer_evenements(ax, temps, couleur, label=None):
+    # Toutes les barres verticales d'un type d'événement en un seul appel
+    temps = np.asarray(temps, dtype=np.float64)
+    if len(temps) == 0:
+        return None
+    return ax.vlines(temps, 0, 1, transform=ax.get_xaxis_transform(), colors=couleur, label=label)
+
+
+def tracer_session(time, signal, evenements=None, points=None, ax=None, figsize=(16, 4),
+                   couleur='black', label='Moyenne mobile'):
+    # Tracer un signal décimé à la largeur en pixels de l'axe, avec les événements en barres
+    # verticales (evenements : label -> temps) et en points (points : label -> (temps, valeurs))
+    if ax is None:
+        _, ax = plt.subplots(figsize=figsize)
+    nb_pixels = largeur_pixels(ax)
+    x, y = decimer_min_max(time, signal, nb_pixels)
+    ax.plot(x, y, color=couleur, label=label, linewidth=0.8)
+
+    debut, fin = (x[0], x[-1]) if len(x) else (0.0, 0.0)
+    for nom, temps in (evenements or {}).items():
+        temps = np.asarray(temps, dtype=np.float64)
+        tracer_evenements(ax, temps[un_par_pixel(temps, debut, fin, nb_pixels)], COULEURS.get(nom), nom)
+    for nom, (temps, valeurs) in (points or {}).items():
+        temps = np.asarray(temps, dtype=np.float64)
+        indices = un_par_pixel(temps, debut, fin, nb_pixels)
+        ax.scatter(temps[indices], np.asarray(valeurs)[indices], color=COULEURS.get(nom), label=nom, s=12, zorder=3)
+
+    ax.grid(True)
+    ax.legend(loc='upper right')
+    return ax
+
+
+def tracer_tranche(session, debut, fin, colonne=19, evenements=None, **kwargs):
+    # Tracer l'intervalle [debut, fin] d'une session convertie (stockage.SessionMemoire) :
+    # seules les pages projetées de la tranche sont lues, quelle que soit la durée de l'enregistrement
+    tranche = session.tranche(debut, fin, [session.entete['col_temps'], colonne])
+    ax = tracer_session(tranche[session.entete['col_temps']], tranche[colonne],
+                        _evenements_visibles(evenements, debut, fin), **kwargs)
+    ax.set_xlim(debut, fin)
+    return ax
+
+
+def _evenements_visibles(evenements, debut, fin):
+    # Événements compris dans [debut, fin] par recherche binaire (temps triés)
+    visibles = {}
+    for nom, temps in (evenements or {}).items():
+        temps = np.asarray(temps, dtype=np.float64)
+        visibles[nom] = temps[np.searchsorted(temps, debut):np.searchsorted(temps, fin, side='right')]
+    return visibles
+
+
+def generer_tuiles(time, signal, dossier, evenements=None, duree_tuile=10.0, taille=(12, 3), dpi=100):
+    # Pyramide de tuiles PNG : le niveau 0 montre toute la session, chaque niveau suivant
+    # double le nombre de tuiles jusqu'à des tuiles d'au plus duree_tuile secondes.
+    # Le temps doit être croissant ; chaque tuile est décimée à sa largeur en pixels.
+    temps = np.asarray(time, dtype=np.float64)
+    valeurs = np.asarray(signal, dtype=np.float64)
+    if len(temps) == 0:
+        return []
+    t_min, t_max = temps[0], temps[-1]
+    duree = max(t_max - t_min, 1e-12)
+    nb_niveaux = int(np.ceil(np.log2(max(duree / duree_tuile, 1.0)))) + 1
+
+    figure = Figure(figsize=taille, dpi=dpi)
+    ax = figure.add_subplot()
+    fichiers = []
+    for niveau in range(nb_niveaux):
+        os.makedirs(os.path.join(dossier, f"niveau_{niveau}"), exist_ok=True)
+        nb_tuiles = 2 ** niveau
+        largeur = duree / nb_tuiles
+        for numero in range(nb_tuiles):
+            debut = t_min + numero * largeur
+            fin = debut + largeur
+            i0 = np.searchsorted(temps, debut)
+            i1 = np.searchsorted(temps, fin, side='right')
+            ax.clear()
+            tracer_session(temps[i0:i1], valeurs[i0:i1], _evenements_visibles(evenements, debut, fin), ax=ax)
+            ax.set_xlim(debut, fin)
+            ax.set_title(f"Niveau {niveau} - {debut:.2f} à {fin:.2f}")
+            chemin = os.path.join(dossier, f"niveau_{niveau}", f"tuile_{numero:05d}.png")
+            figure.savefig(chemin)
+            fichiers.append(chemin)
+    return fichiers
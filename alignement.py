@@ -0,0 +1,112 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from scipy.stats import linregress
+
+# Écart maximal (même unité que 'Temps (ms)') entre un pic/vallée et sa transition de contact
+TOLERANCE_DEFAUT = 0.25
+
+
+def apparier(temps_evenements, temps_cibles, tolerance=TOLERANCE_DEFAUT):
+    # Associer chaque événement à la cible la plus proche à moins de tolerance, une cible par
+    # événement. Appariement glouton par écart croissant : la paire libre la plus proche est prise
+    # en premier, les événements qui perdent leur cible prennent la plus proche encore libre.
+    # Événements et cibles sont triés ensemble une fois ; la paire la plus proche est toujours
+    # formée de deux voisins de cette liste, qui sont retirés (liste chaînée) en n'ajoutant qu'un
+    # seul nouveau couple de voisins. Chaque couple passe une fois dans un tas : O(n log n), même
+    # quand les événements se regroupent autour de quelques cibles.
+    # En cas d'égalité, la paire la plus à gauche (temps le plus petit) l'emporte.
+    # Retourne (indices_evenements, indices_cibles) triés par événement.
+    evenements = np.asarray(temps_evenements, dtype=np.float64)
+    cibles = np.asarray(temps_cibles, dtype=np.float64)
+    vide = np.empty(0, dtype=np.intp)
+    n = len(evenements)
+    if n == 0 or len(cibles) == 0:
+        return vide, vide
+
+    # Liste fusionnée triée : identifiants < n pour les événements, n + j pour la cible j
+    identifiants = np.argsort(np.concatenate((evenements, cibles)), kind='stable')
+    temps = np.concatenate((evenements, cibles))[identifiants]
+    est_cible = identifiants >= n
+    ecarts = np.diff(temps)
+    voisins = np.flatnonzero((est_cible[:-1] != est_cible[1:]) & (ecarts <= tolerance))
+    tas = list(zip(ecarts[voisins].tolist(), voisins.tolist(), (voisins + 1).tolist()))
+    heapq.heapify(tas)
+
+    taille = len(temps)
+    precedent = list(range(-1, taille - 1))
+    suivant = list(range(1, taille + 1))
+    pris = [False] * taille
+    est_cible = est_cible.tolist()
+    valeurs = temps.tolist()
+    paires = []
+    while tas:
+        _, gauche, droite = heapq.heappop(tas)
+        # Couple périmé : un des deux est déjà apparié
+        if pris[gauche] or pris[droite]:
+            continue
+        pris[gauche] = pris[droite] = True
+        paires.append((gauche, droite))
+        avant, apres = precedent[gauche], suivant[droite]
+        if avant >= 0:
+            suivant[avant] = apres
+        if apres < taille:
+            precedent[apres] = avant
+        if (avant >= 0 and apres < taille and est_cible[avant] != est_cible[apres]
+                and valeurs[apres] - valeurs[avant] <= tolerance):
+            heapq.heappush(tas, (valeurs[apres] - valeurs[avant], avant, apres))
+    if not paires:
+        return vide, vide
+
+    paires = identifiants[np.array(paires, dtype=np.intp)]
+    indices_evenements = paires.min(axis=1)
+    indices_cibles = paires.max(axis=1) - n
+    tri = np.argsort(indices_evenements, kind='stable')
+    return indices_evenements[tri], indices_cibles[tri]
+
+
+def table_paires(evenements, cibles, tolerance=TOLERANCE_DEFAUT):
+    # Table des paires événement / transition avec la latence de chaque paire (cible - événement)
+    indices_evenements, indices_cibles = apparier(evenements['Temps (ms)'], cibles['Temps (ms)'], tolerance)
+    source = evenements.iloc[indices_evenements]
+    cible = cibles.iloc[indices_cibles]
+    paires = pd.DataFrame({
+        'Temps (ms)': source['Temps (ms)'].to_numpy(),
+        'Type': source['Type'].to_numpy(),
+        'Différence de Temps (ms)': source['Différence de Temps (ms)'].to_numpy(),
+        'Temps transition (ms)': cible['Temps (ms)'].to_numpy(),
+        'Type transition': cible['Type'].to_numpy(),
+        'Différence de Temps transition (ms)': cible['Différence de Temps (ms)'].to_numpy(),
+        'Index': source.index.to_numpy(),
+        'Index transition': cible.index.to_numpy(),
+    })
+    paires['Latence (ms)'] = paires['Temps transition (ms)'] - paires['Temps (ms)']
+    return paires
+
+
+def statistiques_paires(paires):
+    # Corrélation et régression des différences de temps sur les seules paires appariées
+    resultat = {
+        "Paires": len(paires),
+        "Latence moyenne": paires['Latence (ms)'].mean() if len(paires) else None,
+        "Latence écart-type": paires['Latence (ms)'].std() if len(paires) > 1 else None,
+    }
+    valides = paires[['Différence de Temps (ms)', 'Différence de Temps transition (ms)']].dropna()
+    x = valides['Différence de Temps (ms)'].to_numpy()
+    y = valides['Différence de Temps transition (ms)'].to_numpy()
+    if len(valides) < 3 or np.ptp(x) == 0 or np.ptp(y) == 0:
+        resultat["Corrélation"] = None
+        resultat["Régression"] = None
+        return resultat
+
+    slope, intercept, r_value, p_value, std_err = linregress(x, y)
+    resultat["Corrélation"] = np.corrcoef(x, y)[0, 1]
+    resultat["Régression"] = {
+        "Pente": slope,
+        "Intercept": intercept,
+        "R-value": r_value,
+        "P-value": p_value,
+        "Erreur std": std_err
+    }
+    return resultat
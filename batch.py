@@ -0,0 +1,222 @@
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import time as chrono
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from cadence import resume_cadence
+from calibrage import resume_seuils
+from classeur import ClasseurFlux
+from evenements import LIFT_DOWN, LIFT_OFF, PIC, VALLEE
+from foulees import resume_foulees, segmenter_foulees
+from instrumentation import AUCUNE, PROFILEURS, Instrumentation, rappel_jsonl
+from main import analyser_session, compare_differences, tables_session, write_results_to_file
+from resultats import FORMATS
+
+# Paramètres utilisés quand une session n'en précise pas
+PARAMETRES_DEFAUT = {'seuil_v': 4.35, 'seuil_p': 4.55, 'fenetre': 21, 'colonnes': [0, 19, 31], 'lissage': 'moyenne',
+                     'cadence': False, 'calibrage': False}
+
+
+def lister_sessions(entree):
+    # Un dossier (tous les .txt) ou un motif glob
+    if os.path.isdir(entree):
+        return sorted(glob.glob(os.path.join(entree, '*.txt')))
+    return sorted(glob.glob(entree))
+
+
+def verifier_fenetre(parametres, origine):
+    # La moyenne mobile couvre fenetre échantillons et les extrema ±fenetre//2 : les deux ne
+    # coïncident (fenêtre centrée) que pour une fenêtre impaire
+    fenetre = parametres.get('fenetre')
+    if fenetre is None:
+        return
+    if not isinstance(fenetre, int) or fenetre < 3 or fenetre % 2 == 0:
+        raise ValueError(f"fenetre doit être un entier impair >= 3 ({origine} : {fenetre!r})")
+
+
+def charger_parametres(chemin):
+    # Fichier JSON : {"defaut": {...}, "sessions": {"nom ou motif": {...}}}
+    if chemin is None:
+        return dict(PARAMETRES_DEFAUT), {}
+    with open(chemin, 'r', encoding='utf-8') as f:
+        contenu = json.load(f)
+    defaut = dict(PARAMETRES_DEFAUT)
+    defaut.update(contenu.get('defaut', {}))
+    verifier_fenetre(defaut, f"{chemin}, defaut")
+    sessions = contenu.get('sessions', {})
+    for motif, valeurs in sessions.items():
+        verifier_fenetre(valeurs, f"{chemin}, session {motif}")
+    return defaut, sessions
+
+
+def parametres_session(file_path, defaut, sessions):
+    # Nom exact du fichier (sans extension) en priorité, puis premier motif correspondant
+    nom = os.path.splitext(os.path.basename(file_path))[0]
+    parametres = dict(defaut)
+    if nom in sessions:
+        parametres.update(sessions[nom])
+        return parametres
+    for motif, valeurs in sessions.items():
+        if fnmatch.fnmatch(nom, motif):
+            parametres.update(valeurs)
+            return parametres
+    return parametres
+
+
+def _intervalle_moyen(df):
+    if df.empty:
+        return None
+    return df['Différence de Temps (ms)'].mean()
+
+
+def _nombre_erreurs(df):
+    if df.empty:
+        return 0
+    return int((df['Erreur'] != '').sum())
+
+
+def traiter_session(file_path, parametres, dossier_sortie, formats=('txt',), foulees=False, instrumentation=None,
+                    tables=False):
+    # Traiter une session et retourner sa ligne du tableau récapitulatif. instrumentation : options
+    # d'Instrumentation (dict) pour mesurer chaque étape, les mesures sont retournées sous 'Étapes'.
+    # Avec tables, les tables d'événements sont retournées sous 'Tables' (pour le classeur du lot)
+    nom = os.path.splitext(os.path.basename(file_path))[0]
+    etapes = AUCUNE if instrumentation is None else Instrumentation(contexte={'Session': nom}, **instrumentation)
+    output_file = os.path.join(dossier_sortie, f"ResultPython_{nom}.txt")
+    resume = {'Session': nom, 'Fichier': file_path, 'Résultat': output_file,
+              'seuil_v': parametres['seuil_v'], 'seuil_p': parametres['seuil_p'],
+              'fenetre': parametres['fenetre'], 'lissage': parametres['lissage'], 'cadence': parametres['cadence'],
+              'calibrage': parametres['calibrage']}
+    debut = chrono.perf_counter()
+    try:
+        if not os.path.exists(file_path):
+            resume['Statut'] = 'Fichier introuvable'
+            return resume
+        # cadence : fenêtres et bornes adaptées à chaque segment (marche et course dans un même lot)
+        # calibrage : seuils calculés sur la session, sans réglage à la main
+        temps, valeurs, indices, details = analyser_session(
+            file_path, parametres['seuil_v'], parametres['seuil_p'], parametres['fenetre'],
+            tuple(parametres['colonnes']), etapes, parametres['lissage'], parametres['cadence'],
+            parametres['calibrage'])
+        if details['cadence'] is not None:
+            details['cadence'].to_csv(os.path.join(dossier_sortie, f"Cadence_{nom}.csv"), index=False)
+            resume.update(resume_cadence(details['cadence']))
+        if details['seuils'] is not None:
+            details['seuils'].to_csv(os.path.join(dossier_sortie, f"Seuils_{nom}.csv"), index=False)
+            resume.update(resume_seuils(details['seuils']))
+        vallees, pics, lift_off, lift_down = tables_session(temps, valeurs, indices, etapes, details['cadence'])
+        write_results_to_file(vallees, pics, lift_down, lift_off, output_file, formats, etapes)
+        if foulees:
+            # Cycles de marche : appui, oscillation et vitesse (moyenne mobile) sur chaque foulée
+            with etapes.etape('foulees', len(indices[LIFT_DOWN])):
+                table_foulees = segmenter_foulees(temps[indices[LIFT_DOWN]], temps[indices[LIFT_OFF]],
+                                                  temps[indices[PIC]], temps[indices[VALLEE]], temps, valeurs)
+                table_foulees.to_csv(os.path.join(dossier_sortie, f"Foulees_{nom}.csv"), index=False)
+            resume.update(resume_foulees(table_foulees))
+    except Exception as erreur:
+        resume['Statut'] = f"Erreur : {erreur}"
+        if etapes.actif:
+            resume['Étapes'] = etapes.mesures
+        return resume
+
+    for nom_table, table in (('Vallées', vallees), ('Pics', pics),
+                             ('Pose de pied', lift_down), ('Levé de pied', lift_off)):
+        resume[f"Nb {nom_table}"] = len(table)
+        resume[f"Intervalle moyen {nom_table}"] = _intervalle_moyen(table)
+        resume[f"Erreurs {nom_table}"] = _nombre_erreurs(table)
+    # Appariement des pics/vallées aux transitions de contact
+    with etapes.etape('appariement', len(vallees) + len(pics)):
+        comparaison = compare_differences(vallees, pics, lift_down, lift_off)
+    for cle, valeur in (comparaison or {}).items():
+        categorie, paire = cle.split(' ', 1)
+        if categorie == 'Corrélation':
+            resume[cle] = valeur
+        elif categorie == 'Appariement':
+            resume[f"Paires {paire}"] = valeur['Paires']
+            resume[f"Latence moyenne {paire}"] = valeur['Latence moyenne']
+    resume['Durée (s)'] = round(chrono.perf_counter() - debut, 3)
+    resume['Statut'] = 'OK'
+    if tables:
+        resume['Tables'] = (vallees, pics, lift_down, lift_off)
+    if etapes.actif:
+        resume['Étapes'] = etapes.mesures
+    return resume
+
+
+def traiter_lot(sessions, defaut, parametres_par_session, dossier_sortie, processus=None, formats=('txt',),
+                foulees=False, instrumentation=None, fichier_mesures=None, fichier_classeur=None):
+    # Répartir les sessions sur un pool de processus (tous les cœurs par défaut). Avec instrumentation,
+    # les mesures par étape de toutes les sessions sont écrites en JSON lignes dans fichier_mesures.
+    # Avec fichier_classeur, les tables de chaque session sont ajoutées au classeur dès leur retour
+    # puis oubliées : la mémoire ne dépend pas du nombre de sessions
+    os.makedirs(dossier_sortie, exist_ok=True)
+    resumes = []
+    rappel = None
+    if instrumentation is not None and fichier_mesures is not None:
+        open(fichier_mesures, 'w').close()
+        rappel = rappel_jsonl(fichier_mesures)
+    classeur = ClasseurFlux(fichier_classeur) if fichier_classeur is not None else None
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        taches = {pool.submit(traiter_session, file_path,
+                              parametres_session(file_path, defaut, parametres_par_session),
+                              dossier_sortie, formats, foulees, instrumentation, classeur is not None): file_path
+                  for file_path in sessions}
+        for tache in as_completed(taches):
+            resume = tache.result()
+            for mesure in resume.pop('Étapes', []):
+                if rappel is not None:
+                    rappel(mesure)
+            tables = resume.pop('Tables', None)
+            if tables is not None:
+                classeur.ajouter_session(resume['Session'], *tables)
+            print(f"{resume['Session']} : {resume['Statut']}")
+            resumes.append(resume)
+    if classeur is not None:
+        classeur.fermer()
+    return pd.DataFrame(resumes).sort_values('Session', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection des pics et vallées sur un lot de sessions gaitway")
+    parser.add_argument('entree', help="Dossier contenant les exports .txt ou motif glob")
+    parser.add_argument('-p', '--parametres', help="Fichier JSON des paramètres par session")
+    parser.add_argument('-o', '--sortie', default='resultats', help="Dossier des fichiers résultats")
+    parser.add_argument('-j', '--processus', type=int, default=None,
+                        help="Nombre de processus (tous les cœurs par défaut)")
+    parser.add_argument('-f', '--formats', nargs='+', default=['txt'], choices=FORMATS,
+                        help="Formats des fichiers résultats")
+    parser.add_argument('--foulees', action='store_true',
+                        help="Écrire aussi la table des foulées (appui, oscillation) de chaque session")
+    parser.add_argument('-m', '--mesures', metavar='FICHIER',
+                        help="Mesurer chaque étape (temps, CPU, mémoire) et écrire les mesures en JSON lignes")
+    parser.add_argument('--profil', choices=PROFILEURS, help="Profiler chaque étape (avec --mesures)")
+    parser.add_argument('--classeur', metavar='FICHIER',
+                        help="Écrire aussi les tables de toutes les sessions dans un classeur .xlsx "
+                             "(une feuille par type de table, colonne Session)")
+    args = parser.parse_args()
+
+    sessions = lister_sessions(args.entree)
+    if not sessions:
+        print(f"Aucune session trouvée pour : {args.entree}")
+        return
+
+    defaut, parametres_par_session = charger_parametres(args.parametres)
+    instrumentation = None
+    if args.mesures is not None:
+        instrumentation = {'profil': args.profil,
+                           'dossier_profils': os.path.join(args.sortie, 'profils') if args.profil else None}
+    resume = traiter_lot(sessions, defaut, parametres_par_session, args.sortie, args.processus, args.formats,
+                         args.foulees, instrumentation, args.mesures, args.classeur)
+
+    fichier_resume = os.path.join(args.sortie, 'resume_sessions.csv')
+    resume.to_csv(fichier_resume, index=False)
+    print(f"Résumé de {len(resume)} sessions écrit dans : {fichier_resume}")
+
+
+if __name__ == '__main__':
+    main()
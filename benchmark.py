@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import time as chrono
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from alignement import apparier
+from detection import detecter_motifs
+from features import extraire_features
+from flux import rejouer_fichier
+from gaitway import DOSSIER_CACHE, charger_session
+from main import read_and_process_file
+from resultats import FORMATS, ecrire_resultats
+from synthetique import generer_session
+
+# Durées (s) des sessions synthétiques mesurées
+ECHELLES = {'1min': 60, '10min': 600, '2h': 7200}
+
+# Le détecteur en ligne avance échantillon par échantillon : il n'est mesuré que jusqu'à cette durée
+DUREE_MAX_FLUX = 600
+
+# Tolérance (s) pour retrouver un événement de la vérité terrain
+TOLERANCE_VERITE = 0.1
+
+# Ratio de temps au-delà duquel comparer() signale une régression
+SEUIL_REGRESSION = 1.10
+
+
+def mesurer(fonction, *args, repetitions=3, memoire=True, **kwargs):
+    # Meilleur temps (mur et CPU) sur plusieurs répétitions, puis une exécution sous tracemalloc
+    # pour le pic mémoire (séparée : tracemalloc ralentit les allocations)
+    meilleur_mur, meilleur_cpu = np.inf, np.inf
+    resultat = None
+    for _ in range(max(repetitions, 1)):
+        debut_mur, debut_cpu = chrono.perf_counter(), chrono.process_time()
+        resultat = fonction(*args, **kwargs)
+        meilleur_mur = min(meilleur_mur, chrono.perf_counter() - debut_mur)
+        meilleur_cpu = min(meilleur_cpu, chrono.process_time() - debut_cpu)
+
+    mesure = {'Secondes': round(meilleur_mur, 6), 'Secondes CPU': round(meilleur_cpu, 6), 'Mémoire pic (Mo)': None}
+    if memoire:
+        tracemalloc.start()
+        try:
+            fonction(*args, **kwargs)
+            mesure['Mémoire pic (Mo)'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        finally:
+            tracemalloc.stop()
+    return mesure, resultat
+
+
+def extraire_features_boucle(signal, validation_col, window_size, seuil_pic, seuil_vallee):
+    # Boucle d'origine de MachineLearningWalk.extract_features (une fenêtre par itération), référence
+    # des mesures et des tests de extraire_features. Seuils scalaires ou indexés par le début de fenêtre.
+    nb_fenetres = max(len(signal) - window_size, 0)
+    seuil_pic = np.broadcast_to(seuil_pic, nb_fenetres)
+    seuil_vallee = np.broadcast_to(seuil_vallee, nb_fenetres)
+    features = []
+    labels = []
+    for i in range(nb_fenetres):
+        window = signal[i:i + window_size]
+        val_window = validation_col[i:i + window_size]
+        max_val = np.max(window)
+        min_val = np.min(window)
+        max_index = np.argmax(window)
+        min_index = np.argmin(window)
+        features.append([max_val, min_val, max_index, min_index])
+        if (max_val >= seuil_pic[i] and min_val <= seuil_vallee[i]
+                and max_index < min_index and min_index - max_index < window_size):
+            labels.append(1 if 'DC' in val_window and 'SC' in val_window else 0)
+        else:
+            labels.append(0)
+    return np.array(features).reshape(-1, 4), np.array(labels, dtype=np.int64)
+
+
+def _rappel(temps_detectes, temps_attendus, tolerance=TOLERANCE_VERITE):
+    # Part des événements attendus retrouvés à moins de tolerance
+    if len(temps_attendus) == 0:
+        return None
+    indices, _ = apparier(temps_attendus, temps_detectes, tolerance)
+    return round(len(indices) / len(temps_attendus), 4)
+
+
+def _vider_cache(file_path):
+    shutil.rmtree(os.path.join(os.path.dirname(os.path.abspath(file_path)), DOSSIER_CACHE), ignore_errors=True)
+
+
+def preparer_session(dossier, echelle, duree, graine=0):
+    # Session synthétique de l'échelle demandée, générée une seule fois
+    file_path = os.path.join(dossier, f"synthetique_{echelle}.txt")
+    chemin_verite = os.path.join(dossier, f"synthetique_{echelle}_verite.csv")
+    if not (os.path.exists(file_path) and os.path.exists(chemin_verite)):
+        generer_session(file_path, duree=duree, graine=graine).to_csv(chemin_verite, index=False)
+    return file_path, pd.read_csv(chemin_verite)
+
+
+def mesurer_echelle(dossier, echelle, duree, repetitions=3):
+    # Mesurer chaque étape sur la session synthétique d'une échelle
+    file_path, verite = preparer_session(dossier, echelle, duree)
+    lignes = []
+
+    def ajouter(etape, mesure, nb_lignes, **infos):
+        lignes.append(dict({'Échelle': echelle, 'Étape': etape, 'Lignes': nb_lignes}, **mesure, **infos))
+        memoire = '-' if mesure['Mémoire pic (Mo)'] is None else f"{mesure['Mémoire pic (Mo)']:.1f} Mo"
+        print(f"{echelle:>6} {etape:<32} {mesure['Secondes']:>10.4f} s  {memoire:>10}")
+
+    # Lecture de l'export texte sans cache, puis lecture et détection complètes à froid et à chaud
+    mesure, data = mesurer(charger_session, file_path, cache=False, repetitions=1)
+    n = len(data)
+    ajouter('charger_session (texte)', mesure, n)
+
+    _vider_cache(file_path)
+    mesure, tables = mesurer(read_and_process_file, file_path, repetitions=1, memoire=False)
+    ajouter('read_and_process_file (froid)', mesure, n)
+    mesure, tables = mesurer(read_and_process_file, file_path, repetitions=repetitions)
+    vallees, pics, lift_off, lift_down = tables
+    rappels = {f"Rappel {nom}": _rappel(table['Temps (ms)'], verite.loc[verite['Type'] == type_evenement, 'Temps (ms)'])
+               for nom, table, type_evenement in (('Pics', pics, 'Pic'), ('Vallées', vallees, 'Vallée'),
+                                                  ('Pose de pied', lift_down, 'Pose de Pied'),
+                                                  ('Levé de pied', lift_off, 'levé de Pied'))}
+    ajouter('read_and_process_file (cache)', mesure, n, **rappels)
+
+    # Fenêtre glissante de WalkDetector et caractéristiques de MachineLearningWalk
+    vitesse = data[19].to_numpy(dtype=np.float64)
+    moving_average = pd.Series(vitesse).rolling(window=21, center=True).mean().to_numpy()
+    centre, amplitude = np.nanmean(moving_average), np.nanstd(moving_average)
+    mesure, _ = mesurer(detecter_motifs, moving_average, centre + amplitude, centre - amplitude,
+                        window_size=150, repetitions=repetitions)
+    ajouter('detecter_motifs (WalkDetector)', mesure, n)
+    mesure, (X, y) = mesurer(extraire_features, moving_average, data[31], 140, centre + amplitude,
+                             centre - amplitude, repetitions=repetitions)
+    ajouter('extraire_features', mesure, n)
+    # Boucle d'origine, une seule exécution (plusieurs minutes sur la session de 2 h)
+    contact_mode = data[31].to_numpy(dtype=object)
+    mesure, (X_boucle, y_boucle) = mesurer(extraire_features_boucle, moving_average, contact_mode, 140,
+                                           centre + amplitude, centre - amplitude, repetitions=1, memoire=False)
+    identiques = bool(np.array_equal(X, X_boucle.astype(np.float32), equal_nan=True) and np.array_equal(y, y_boucle))
+    ajouter('extraire_features (boucle)', mesure, n, Identiques=identiques)
+
+    # Écriture des résultats dans chaque format
+    base = os.path.join(dossier, f"resultats_{echelle}.txt")
+    for format_sortie in FORMATS:
+        mesure, _ = mesurer(ecrire_resultats, vallees, pics, lift_down, lift_off, base, (format_sortie,),
+                            repetitions=repetitions)
+        ajouter(f"ecrire_resultats ({format_sortie})", mesure, len(vallees) + len(pics) + len(lift_down) + len(lift_off))
+
+    # Détection en ligne (échantillon par échantillon)
+    if duree <= DUREE_MAX_FLUX:
+        mesure, _ = mesurer(rejouer_fichier, file_path, repetitions=1, memoire=False)
+        ajouter('rejouer_fichier (flux)', mesure, n)
+    return lignes
+
+
+def _version_code():
+    # Commit courant, pour comparer les mesures entre versions
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return sortie.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def lancer(dossier, echelles=('1min', '10min'), repetitions=3):
+    os.makedirs(dossier, exist_ok=True)
+    lignes = []
+    for echelle in echelles:
+        lignes.extend(mesurer_echelle(dossier, echelle, ECHELLES[echelle], repetitions))
+    return {
+        'Date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'Commit': _version_code(),
+        'Python': platform.python_version(),
+        'NumPy': np.__version__,
+        'pandas': pd.__version__,
+        'Machine': platform.platform(),
+        'Processeurs': os.cpu_count(),
+        'Mesures': lignes,
+    }
+
+
+def comparer(ancien, nouveau, seuil=SEUIL_REGRESSION):
+    # Ratio des temps (nouveau / ancien) par échelle et étape ; régression au-delà de seuil
+    cles = ['Échelle', 'Étape']
+    avant = pd.DataFrame(ancien['Mesures'])[cles + ['Secondes', 'Mémoire pic (Mo)']]
+    apres = pd.DataFrame(nouveau['Mesures'])[cles + ['Secondes', 'Mémoire pic (Mo)']]
+    comparaison = avant.merge(apres, on=cles, suffixes=(' avant', ' après'))
+    comparaison['Ratio temps'] = (comparaison['Secondes après'] / comparaison['Secondes avant']).round(3)
+    comparaison['Régression'] = comparaison['Ratio temps'] > seuil
+    return comparaison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance sur des sessions synthétiques")
+    parser.add_argument('-e', '--echelles', nargs='+', default=['1min', '10min'], choices=list(ECHELLES),
+                        help="Durées de session mesurées")
+    parser.add_argument('-d', '--dossier', default='benchmark_donnees', help="Dossier des sessions synthétiques")
+    parser.add_argument('-o', '--sortie', default='benchmark.json', help="Fichier JSON des mesures")
+    parser.add_argument('-r', '--repetitions', type=int, default=3, help="Répétitions par étape (meilleur temps)")
+    parser.add_argument('-c', '--comparer', metavar='REFERENCE', help="Fichier JSON d'une version précédente")
+    args = parser.parse_args()
+
+    resultats = lancer(args.dossier, args.echelles, args.repetitions)
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"Mesures écrites dans : {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, 'r', encoding='utf-8') as f:
+            reference = json.load(f)
+        comparaison = comparer(reference, resultats)
+        print(comparaison.to_string(index=False))
+        if comparaison['Régression'].any():
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
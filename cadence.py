@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import welch
+
+from lissage import frequence_echantillonnage
+from resultats import ECART_MAX, ECART_MIN
+
+# Durée (s) des segments sur lesquels la cadence est estimée, et des fenêtres de Welch dans un segment
+DUREE_SEGMENT = 30.0
+DUREE_WELCH = 8.0
+# Zéro-padding des fenêtres de Welch (grille de fréquences plus fine avant l'interpolation du pic)
+FACTEUR_PADDING = 4
+
+# Bande de recherche de la fréquence des pics de vitesse (Hz), de la marche lente à la course
+FREQUENCE_MIN = 0.5
+FREQUENCE_MAX = 4.0
+# Part minimale au pic de la puissance du spectre de 0 à FREQUENCE_MAX (dérive lente sous la bande
+# comprise) : en dessous, pas de rythme (arrêt, transition). Un pic au bord de la bande n'est pas un
+# rythme non plus : c'est la pente d'une dérive lente (position debout) ou d'un rythme hors bande.
+# Marche et course : 0.12 à 0.17 ; position debout : moins de 0.03
+PUISSANCE_RELATIVE_MIN = 0.08
+
+# Grandeurs déduites de la période T d'un segment :
+#   demi-fenêtre des extrema locaux = FRACTION_DEMI_FENETRE * T (en échantillons)
+#   écart entre deux événements d'un même type hors de [ECART_MIN_PERIODES * T, ECART_MAX_PERIODES * T]
+#   (les poses et levés de pied, deux par cycle, sont à T / 2)
+FRACTION_DEMI_FENETRE = 0.1
+ECART_MIN_PERIODES = 0.25
+ECART_MAX_PERIODES = 1.5
+# Fenêtre glissante des motifs pic -> vallée (WalkDetector) : le motif dure une demi-période
+FRACTION_MOTIF = 0.6
+
+# Demi-fenêtre utilisée quand aucun segment n'a de rythme (celle de main.detecter_session)
+DEMI_FENETRE_DEFAUT = 10
+
+
+def _pic_parabolique(spectres, frequences, bande):
+    # Fréquence du maximum de chaque ligne dans la bande, affinée par une parabole sur trois points ;
+    # retourne aussi la puissance au pic et si le pic est à l'intérieur de la bande (pas sur un bord)
+    indices_bande = np.flatnonzero(bande)
+    spectres_bande = spectres[:, indices_bande]
+    k = np.argmax(spectres_bande, axis=1)
+    lignes = np.arange(len(spectres))
+    interieur = (k > 0) & (k < len(indices_bande) - 1)
+    a = spectres_bande[lignes, np.maximum(k - 1, 0)]
+    b = spectres_bande[lignes, k]
+    c = spectres_bande[lignes, np.minimum(k + 1, len(indices_bande) - 1)]
+    denominateur = a - 2 * b + c
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = np.where(interieur & (denominateur != 0), 0.5 * (a - c) / denominateur, 0.0)
+    pas = frequences[1] - frequences[0]
+    return frequences[indices_bande[k]] + delta * pas, b, interieur
+
+
+def estimer_cadence(temps, signal, duree_segment=DUREE_SEGMENT, duree_welch=DUREE_WELCH, frequence=None):
+    # Fréquence dominante du signal (vitesse lissée) sur des segments successifs de duree_segment :
+    # spectre de Welch de tous les segments en un seul appel (un segment par ligne d'une matrice).
+    # Les derniers échantillons (moins d'un segment) sont rattachés au dernier segment.
+    # Retourne une ligne par segment avec la période et les grandeurs de détection qui en découlent ;
+    # un segment sans rythme reprend la fréquence du segment valide le plus proche.
+    temps = np.asarray(temps, dtype=np.float64)
+    n = len(temps)
+    if n < 2:
+        raise ValueError(f"Signal trop court pour estimer la cadence ({n} échantillon(s))")
+    if frequence is None:
+        frequence = frequence_echantillonnage(temps)
+    longueur = min(n, max(int(round(duree_segment * frequence)), 1))
+    nb_segments = max(n // longueur, 1)
+    debuts = np.arange(nb_segments) * longueur
+
+    segments = np.asarray(signal[:nb_segments * longueur], dtype=np.float64).reshape(nb_segments, longueur)
+    nans = np.isnan(segments)
+    if nans.any():
+        # NaN remplacés par la moyenne du segment (retirée ensuite par detrend)
+        with np.errstate(invalid='ignore'):
+            moyennes = np.nanmean(np.where(nans.all(axis=1, keepdims=True), 0.0, segments), axis=1, keepdims=True)
+        segments = np.where(nans, moyennes, segments)
+
+    nperseg = min(longueur, max(int(round(duree_welch * frequence)), 8))
+    frequences, spectres = welch(segments, fs=frequence, nperseg=nperseg, nfft=FACTEUR_PADDING * nperseg,
+                                 detrend='constant', axis=-1)
+    bande = (frequences >= FREQUENCE_MIN) & (frequences <= FREQUENCE_MAX)
+    if bande.sum() < 3:
+        raise ValueError(f"Segments trop courts pour estimer la cadence ({duree_segment} s à {frequence} Hz)")
+    frequence_pic, puissance_pic, interieur = _pic_parabolique(spectres, frequences, bande)
+    puissance_reference = spectres[:, (frequences > 0) & (frequences <= FREQUENCE_MAX)].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        puissance_relative = puissance_pic / puissance_reference
+    valide = interieur & np.isfinite(puissance_relative) & (puissance_relative >= PUISSANCE_RELATIVE_MIN)
+
+    cadence = pd.DataFrame({
+        'Indice début': debuts,
+        'Début (s)': temps[debuts],
+        'Fin (s)': np.append(temps[debuts[1:]], temps[-1]),
+        'Fréquence (Hz)': np.where(valide, frequence_pic, np.nan),
+        'Puissance relative': puissance_relative,
+        'Rythme': valide,
+    })
+    cadence['Fréquence (Hz)'] = cadence['Fréquence (Hz)'].interpolate(method='nearest').ffill().bfill()
+    periode = 1.0 / cadence['Fréquence (Hz)']
+    cadence['Période (s)'] = periode
+    cadence['Demi-fenêtre'] = (FRACTION_DEMI_FENETRE * periode * frequence).round().fillna(DEMI_FENETRE_DEFAUT)
+    cadence['Demi-fenêtre'] = cadence['Demi-fenêtre'].astype(np.int64).clip(lower=1)
+    cadence['Écart min (s)'] = (ECART_MIN_PERIODES * periode).fillna(ECART_MIN)
+    cadence['Écart max (s)'] = (ECART_MAX_PERIODES * periode).fillna(ECART_MAX)
+    cadence.attrs['frequence'] = frequence
+    return cadence
+
+
+def segment_de(cadence, temps_evenements):
+    # Indice du segment de cadence de chaque temps
+    debuts = cadence['Début (s)'].to_numpy()
+    return np.clip(np.searchsorted(debuts, np.asarray(temps_evenements, dtype=np.float64), side='right') - 1,
+                   0, len(debuts) - 1)
+
+
+def bornes_ecarts(cadence, temps_evenements):
+    # Bornes (ecart_min, ecart_max) de la différence de temps de chaque événement, d'après son segment
+    segments = segment_de(cadence, temps_evenements)
+    return cadence['Écart min (s)'].to_numpy()[segments], cadence['Écart max (s)'].to_numpy()[segments]
+
+
+def fenetre_motif(cadence):
+    # Largeur (échantillons) de la fenêtre de detection.detecter_motifs pour la période médiane de la session
+    periode = cadence['Période (s)'].median()
+    return max(int(round(FRACTION_MOTIF * periode * cadence.attrs['frequence'])), 2)
+
+
+def resume_cadence(cadence):
+    # Valeurs de la session pour le tableau récapitulatif
+    frequences = cadence['Fréquence (Hz)']
+    return {
+        'Fréquence médiane (Hz)': frequences.median(),
+        'Fréquence min (Hz)': frequences.min(),
+        'Fréquence max (Hz)': frequences.max(),
+        'Segments sans rythme': int((~cadence['Rythme']).sum()),
+    }
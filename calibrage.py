@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from lissage import frequence_echantillonnage
+
+# Fenêtre glissante (s) des quantiles et durée (s) des segments à seuils constants
+DUREE_FENETRE = 10.0
+DUREE_SEGMENT = 5.0
+# Le signal est sous-échantillonné vers cette fréquence (Hz) avant les quantiles glissants :
+# les seuils varient lentement et la distribution des valeurs n'en est pas changée
+FREQUENCE_CALIBRAGE = 100.0
+
+# Quantiles bas et haut de la vitesse lissée ; les seuils sont placés à FRACTION_SEUIL de la médiane
+# vers chaque quantile (sur une sinusoïde d'amplitude A : médiane ± 0.48 A, soit 4.35 / 4.55 pour R16)
+QUANTILE_BAS = 0.1
+QUANTILE_HAUT = 0.9
+FRACTION_SEUIL = 0.5
+
+# Écart minimal Quantile haut - Quantile bas d'un segment : en dessous, le segment est plat (position
+# debout, arrêt) et ses seuils valent NaN, rien n'y est détecté. Le plancher est le plus grand de
+# ECART_MIN (m/s) et de FRACTION_ECART_MIN fois l'écart médian des segments de la session
+# (marche ~0.4 m/s à 4.45 m/s, position debout moins de 0.05 m/s)
+ECART_MIN = 0.005
+FRACTION_ECART_MIN = 0.25
+
+
+def calibrer_seuils(temps, signal, duree_fenetre=DUREE_FENETRE, duree_segment=DUREE_SEGMENT,
+                    quantile_bas=QUANTILE_BAS, quantile_haut=QUANTILE_HAUT, fraction=FRACTION_SEUIL, frequence=None,
+                    ecart_min=ECART_MIN, fraction_ecart_min=FRACTION_ECART_MIN):
+    # Seuils seuil_v / seuil_p par segment de duree_segment, tirés des quantiles glissants (centrés sur
+    # duree_fenetre) du signal lissé : O(n log w) par les quantiles glissants de pandas.
+    # Remplace les seuils réglés à la main et leur bascule à une ligne fixe (before_8500 / after_8500).
+    # Un segment plat (voir ECART_MIN) a des seuils NaN et 'Détection' à False.
+    temps = np.asarray(temps, dtype=np.float64)
+    n = len(temps)
+    if n < 2:
+        raise ValueError(f"Signal trop court pour calibrer les seuils ({n} échantillon(s))")
+    if frequence is None:
+        frequence = frequence_echantillonnage(temps)
+    pas = max(int(frequence // FREQUENCE_CALIBRAGE), 1)
+    echantillons = pd.Series(np.asarray(signal[::pas], dtype=np.float64))
+    largeur = max(int(round(duree_fenetre * frequence / pas)), 3)
+    glissant = echantillons.rolling(window=largeur, center=True, min_periods=largeur // 2)
+    bas, mediane, haut = (glissant.quantile(q).to_numpy() for q in (quantile_bas, 0.5, quantile_haut))
+
+    # Quantiles pris au centre de chaque segment ; un segment sans valeur reprend ses voisins
+    longueur = max(int(round(duree_segment * frequence)), 1)
+    debuts = np.arange(0, n, longueur)
+    centres = np.minimum(debuts + longueur // 2, n - 1) // pas
+    quantiles = pd.DataFrame({'Médiane': mediane[centres], 'Quantile bas': bas[centres],
+                              'Quantile haut': haut[centres]}).ffill().bfill()
+
+    seuils = pd.DataFrame({
+        'Indice début': debuts,
+        'Début (s)': temps[debuts],
+        'Fin (s)': np.append(temps[debuts[1:]], temps[-1]),
+    })
+    seuils = pd.concat([seuils, quantiles], axis=1)
+    seuils['seuil_v'] = seuils['Médiane'] - fraction * (seuils['Médiane'] - seuils['Quantile bas'])
+    seuils['seuil_p'] = seuils['Médiane'] + fraction * (seuils['Quantile haut'] - seuils['Médiane'])
+
+    # Sans plancher, les quantiles d'un segment plat se resserrent sur le bruit et y placent des
+    # dizaines de pics et de vallées. L'écart d'un segment est le plus petit des écarts au début, au
+    # centre et à la fin : un segment debout voisin de la marche a un écart centré encore grand
+    ecart_centre = (seuils['Quantile haut'] - seuils['Quantile bas']).to_numpy()
+    fins = np.append(debuts[1:], n) - 1
+    ecart = np.fmin(haut[debuts // pas] - bas[debuts // pas], haut[fins // pas] - bas[fins // pas])
+    ecart = np.fmin(ecart, ecart_centre)
+    reference = np.nanmedian(ecart_centre) if not np.isnan(ecart_centre).all() else np.nan
+    plancher = max(ecart_min, fraction_ecart_min * reference) if np.isfinite(reference) else ecart_min
+    seuils['Écart quantiles'] = ecart
+    seuils['Détection'] = ecart >= plancher
+    seuils.loc[~seuils['Détection'], ['seuil_v', 'seuil_p']] = np.nan
+    return seuils
+
+
+def seuils_echantillons(seuils, n):
+    # Seuils (seuil_v, seuil_p) de chaque échantillon, constants par segment
+    longueurs = np.diff(np.append(seuils['Indice début'].to_numpy(), n))
+    return (np.repeat(seuils['seuil_v'].to_numpy(), longueurs),
+            np.repeat(seuils['seuil_p'].to_numpy(), longueurs))
+
+
+def resume_seuils(seuils):
+    # Valeurs de la session pour le tableau récapitulatif
+    return {
+        'seuil_v médian': seuils['seuil_v'].median(),
+        'seuil_p médian': seuils['seuil_p'].median(),
+        'seuil_v min': seuils['seuil_v'].min(),
+        'seuil_p max': seuils['seuil_p'].max(),
+        'Segments sans détection': int((~seuils['Détection']).sum()),
+    }
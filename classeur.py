@@ -0,0 +1,159 @@
+import math
+import re
+
+import numpy as np
+from openpyxl import Workbook
+
+# Lignes converties à la fois d'une table vers le classeur
+LIGNES_PAR_BLOC = 10_000
+
+# Nom de la feuille récapitulative, toujours placée en premier
+FEUILLE_RESUME = 'Résumé'
+COLONNES_RESUME = ['Session', 'Table', 'Feuille', 'Nb', 'Intervalle moyen', 'Intervalle écart-type',
+                   'Intervalle min', 'Intervalle max', 'Erreurs', 'Avertissements']
+
+# Tables d'événements d'une session ; chacune a une seule feuille pour toutes les sessions
+TABLES_SESSION = ('Vallées', 'Pics', 'Pose de pied', 'Levé de pied')
+COLONNE_SESSION = 'Session'
+
+# Excel limite les noms de feuille à 31 caractères sans []:*?/\ et une feuille à 1 048 576 lignes :
+# au-delà, la table continue sur une feuille « nom (2) », « nom (3) »...
+LONGUEUR_NOM_FEUILLE = 31
+CARACTERES_INTERDITS = re.compile(r'[\[\]:*?/\\]')
+LIGNES_MAX_FEUILLE = 1_048_576
+
+
+def _cellule(valeur):
+    # Valeur écrivable dans une cellule : NaN et NaT deviennent des cellules vides, types NumPy natifs
+    if valeur is None:
+        return None
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float) and math.isnan(valeur):
+        return None
+    return valeur
+
+
+class ClasseurFlux:
+    # Classeur .xlsx en écriture seule (openpyxl write_only) : les lignes de chaque feuille partent
+    # dans un fichier temporaire au fil de l'eau, seule la ligne courante reste en mémoire.
+    # Une feuille par type de table, les sessions les unes sous les autres avec une colonne Session :
+    # le nombre de feuilles (et de fichiers temporaires ouverts) ne dépend pas du nombre de sessions.
+    # La feuille Résumé (comptes et intervalles de chaque table) est remplie table par table.
+    #     with ClasseurFlux('cohorte.xlsx') as classeur:
+    #         classeur.ajouter_session('JD_R16', vallees, pics, lift_down, lift_off)
+
+    def __init__(self, chemin, resume=True, lignes_max=LIGNES_MAX_FEUILLE):
+        self.chemin = chemin
+        self.classeur = Workbook(write_only=True)
+        self.lignes_max = lignes_max
+        self.feuilles = {}
+        self.noms = set()
+        self.resume = None
+        if resume:
+            self.resume = self.classeur.create_sheet(FEUILLE_RESUME)
+            self.resume.append(COLONNES_RESUME)
+            self.noms.add(FEUILLE_RESUME.lower())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fermer()
+        return False
+
+    def _nom_libre(self, nom):
+        # Nom de feuille valide et unique (tronqué, suffixé ~2, ~3... en cas de doublon)
+        nom = CARACTERES_INTERDITS.sub('_', str(nom))[:LONGUEUR_NOM_FEUILLE] or 'Feuille'
+        candidat, numero = nom, 1
+        while candidat.lower() in self.noms:
+            numero += 1
+            suffixe = f"~{numero}"
+            candidat = nom[:LONGUEUR_NOM_FEUILLE - len(suffixe)] + suffixe
+        self.noms.add(candidat.lower())
+        return candidat
+
+    def _creer_feuille(self, nom, colonnes, numero):
+        # Feuille numero de la table nom, avec sa ligne d'en-tête
+        titre = nom if numero == 1 else f"{str(nom)[:LONGUEUR_NOM_FEUILLE - 6]} ({numero})"
+        feuille = self.classeur.create_sheet(self._nom_libre(titre))
+        lignes = 0
+        if colonnes is not None:
+            feuille.append(colonnes)
+            lignes = 1
+        self.feuilles[nom] = {'feuille': feuille, 'colonnes': colonnes, 'lignes': lignes, 'numero': numero}
+        return self.feuilles[nom]
+
+    def feuille(self, nom, colonnes=None):
+        # Feuille courante de la table nom, créée à la première demande avec sa ligne d'en-tête.
+        # Une table déjà commencée doit garder les mêmes colonnes (les lignes s'empilent dessous)
+        if colonnes is not None:
+            colonnes = [str(colonne) for colonne in colonnes]
+        if nom not in self.feuilles:
+            return self._creer_feuille(nom, colonnes, 1)['feuille']
+        courante = self.feuilles[nom]
+        if colonnes is not None and courante['colonnes'] is not None and colonnes != courante['colonnes']:
+            raise ValueError(f"Colonnes différentes pour la feuille {nom} : {colonnes} au lieu de "
+                             f"{courante['colonnes']}")
+        return courante['feuille']
+
+    def _ajouter(self, nom, ligne):
+        # Une ligne de la table nom, sur une nouvelle feuille si la courante est pleine
+        courante = self.feuilles[nom]
+        if courante['lignes'] >= self.lignes_max:
+            courante = self._creer_feuille(nom, courante['colonnes'], courante['numero'] + 1)
+        courante['feuille'].append(ligne)
+        courante['lignes'] += 1
+
+    def ajouter_lignes(self, nom, lignes, colonnes=None):
+        # Ajouter les lignes d'un itérable (tuples, listes) à une feuille ; retourne le nombre de lignes
+        self.feuille(nom, colonnes)
+        nombre = 0
+        for ligne in lignes:
+            self._ajouter(nom, [_cellule(valeur) for valeur in ligne])
+            nombre += 1
+        return nombre
+
+    def ajouter_table(self, nom, table, taille_bloc=LIGNES_PAR_BLOC, session=None):
+        # Ajouter un DataFrame par blocs de lignes, précédé d'une colonne Session si session est donnée.
+        # Retourne le titre de la feuille qui reçoit la première ligne de la table
+        colonnes = list(table.columns) if session is None else [COLONNE_SESSION] + list(table.columns)
+        self.feuille(nom, colonnes)
+        titre = None
+        prefixe = [] if session is None else [session]
+        for debut in range(0, len(table), taille_bloc):
+            for ligne in table.iloc[debut:debut + taille_bloc].itertuples(index=False, name=None):
+                self._ajouter(nom, prefixe + [_cellule(valeur) for valeur in ligne])
+                if titre is None:
+                    titre = self.feuilles[nom]['feuille'].title
+        return titre if titre is not None else self.feuilles[nom]['feuille'].title
+
+    def resumer(self, session, nom_table, table, feuille=None, colonne_ecart='Différence de Temps (ms)'):
+        # Ligne du résumé : feuille des lignes de la table, nombre d'événements, statistiques des
+        # intervalles, erreurs et avertissements
+        if self.resume is None:
+            return
+        ecarts = table[colonne_ecart].to_numpy(dtype=np.float64) if colonne_ecart in table else np.empty(0)
+        ecarts = ecarts[~np.isnan(ecarts)]
+        erreurs = table['Erreur'] if 'Erreur' in table else None
+        self.resume.append([_cellule(valeur) for valeur in (
+            session, nom_table, feuille, len(table),
+            ecarts.mean() if len(ecarts) else None,
+            ecarts.std() if len(ecarts) > 1 else None,
+            ecarts.min() if len(ecarts) else None,
+            ecarts.max() if len(ecarts) else None,
+            int((erreurs == 'Erreur').sum()) if erreurs is not None else None,
+            int((erreurs == 'Avertissement').sum()) if erreurs is not None else None,
+        )])
+
+    def ajouter_session(self, session, vallees, pics, lift_down, lift_off):
+        # Les tables de la session à la suite de celles des sessions précédentes, et leurs lignes
+        # dans le résumé (avec la feuille où elles commencent)
+        for nom_table, table in zip(TABLES_SESSION, (vallees, pics, lift_down, lift_off)):
+            feuille = self.ajouter_table(nom_table, table, session=session)
+            self.resumer(session, nom_table, table, feuille)
+
+    def fermer(self):
+        if self.classeur is not None:
+            self.classeur.save(self.chemin)
+            self.classeur = None
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+
+def _alterner(est_pic, est_vallee):
+    # Reproduit la garde previous_type de la boucle d'origine sur les seuls candidats
+    n = len(est_pic)
+    garde = np.zeros(n, dtype=bool)
+    type_pic = np.zeros(n, dtype=bool)
+    if n == 0:
+        return garde, type_pic
+
+    # Cas courant : aucun candidat n'est à la fois pic et vallée, le type précédent
+    # est alors toujours celui du candidat précédent
+    if not np.any(est_pic & est_vallee):
+        garde[0] = True
+        garde[1:] = est_pic[1:] != est_pic[:-1]
+        return garde, est_pic.copy()
+
+    # Cas dégénéré (fenêtre plate avec seuil_v > seuil_p) : boucle sur les candidats
+    previous_type = None
+    for k in range(n):
+        if est_pic[k] and previous_type != "pic":
+            garde[k] = True
+            type_pic[k] = True
+            previous_type = "pic"
+        elif est_vallee[k] and previous_type != "val":
+            garde[k] = True
+            previous_type = "val"
+    return garde, type_pic
+
+
+def extrema_locaux(moving_average, demi_fenetre=10):
+    # Masques des maxima et minima de la moyenne mobile sur ±demi_fenetre, indépendants des seuils
+    valeurs = np.asarray(moving_average, dtype=np.float64)
+    n = len(valeurs)
+    if n <= 2 * demi_fenetre:
+        vide = np.zeros(n, dtype=bool)
+        return valeurs, vide, vide
+
+    # Min et max glissants centrés en une seule passe (les NaN sont ignorés comme Series.min/max)
+    serie = pd.Series(valeurs)
+    largeur = 2 * demi_fenetre + 1
+    max_glissant = serie.rolling(window=largeur, center=True, min_periods=1).max().to_numpy()
+    min_glissant = serie.rolling(window=largeur, center=True, min_periods=1).min().to_numpy()
+
+    # Bords exclus comme dans la boucle d'origine
+    valide = np.zeros(n, dtype=bool)
+    valide[demi_fenetre:n - demi_fenetre] = True
+    valide &= ~np.isnan(valeurs)
+    return valeurs, valide & (valeurs == max_glissant), valide & (valeurs == min_glissant)
+
+
+def extrema_segments(moving_average, debuts, demi_fenetres):
+    # Comme extrema_locaux, avec une demi-fenêtre propre à chaque segment [debuts[k], debuts[k + 1]).
+    # Chaque segment est prolongé de sa demi-fenêtre de part et d'autre : seuls les bords du signal sont exclus.
+    valeurs = np.asarray(moving_average, dtype=np.float64)
+    n = len(valeurs)
+    est_max = np.zeros(n, dtype=bool)
+    est_min = np.zeros(n, dtype=bool)
+    fins = np.append(np.asarray(debuts[1:], dtype=np.int64), n)
+    for debut, fin, demi_fenetre in zip(debuts, fins, demi_fenetres):
+        avant, apres = max(0, debut - demi_fenetre), min(n, fin + demi_fenetre)
+        _, bloc_max, bloc_min = extrema_locaux(valeurs[avant:apres], demi_fenetre)
+        est_max[debut:fin] = bloc_max[debut - avant:fin - avant]
+        est_min[debut:fin] = bloc_min[debut - avant:fin - avant]
+    return valeurs, est_max, est_min
+
+
+def selectionner_pics_vallees(valeurs, est_max, est_min, seuil_v, seuil_p):
+    # Tests de seuil sous forme de masques puis alternance pic/vallée sur les seuls candidats
+    est_pic = est_max & (valeurs > seuil_p)
+    est_vallee = est_min & (valeurs < seuil_v)
+    candidats = np.flatnonzero(est_pic | est_vallee)
+    garde, type_pic = _alterner(est_pic[candidats], est_vallee[candidats])
+    retenus = candidats[garde]
+    type_pic = type_pic[garde]
+    return retenus[type_pic], retenus[~type_pic]
+
+
+def detecter_pics_vallees(moving_average, seuil_v, seuil_p, demi_fenetre=10):
+    # Retourne les indices des pics et des vallées de la moyenne mobile
+    valeurs, est_max, est_min = extrema_locaux(moving_average, demi_fenetre)
+    return selectionner_pics_vallees(valeurs, est_max, est_min, seuil_v, seuil_p)
+
+
+# Transitions de contact_mode : nom -> (mode précédent, mode courant), None = n'importe quel mode
+TRANSITIONS_CONTACT = {
+    'lift_down': (None, 'SC'),
+    'lift_off': (None, 'Aerial'),
+    'double_appui': (None, 'DC'),
+    'dc_vers_sc': ('DC', 'SC'),
+}
+
+
+def coder_contact_mode(contact_mode):
+    # Stocke contact_mode en catégoriel : codes int8 (-1 pour NaN) et liste des modes
+    categoriel = pd.Categorical(contact_mode)
+    return np.asarray(categoriel.codes), list(categoriel.categories)
+
+
+def detecter_transitions(contact_mode, paires=None):
+    # Retourne, pour chaque paire demandée, les indices où contact_mode change de mode
+    if paires is None:
+        paires = TRANSITIONS_CONTACT
+    codes, categories = coder_contact_mode(contact_mode)
+
+    # Un seul passage décalé : les NaN sont ignorés, le mode précédent est le dernier mode connu
+    positions = np.flatnonzero(codes >= 0)
+    courants = codes[positions]
+    precedents = np.empty_like(courants)
+    precedents[:1] = -1
+    precedents[1:] = courants[:-1]
+    change = courants != precedents
+    positions = positions[change]
+    courants = courants[change]
+    precedents = precedents[change]
+
+    # Chaque paire n'est qu'un masque sur la table des changements
+    code_de = {mode: code for code, mode in enumerate(categories)}
+    resultats = {}
+    for nom, (de, vers) in paires.items():
+        if vers not in code_de or (de is not None and de not in code_de):
+            resultats[nom] = np.empty(0, dtype=np.intp)
+            continue
+        masque = courants == code_de[vers]
+        if de is not None:
+            masque &= precedents == code_de[de]
+        resultats[nom] = positions[masque]
+    return resultats
+
+
+def _arg_extremum_glissant(valeurs, largeur, maximum=True):
+    # Indice absolu du max (ou min) de chaque fenêtre valeurs[i:i + largeur], première occurrence
+    # en cas d'égalité comme np.argmax. Table creuse : O(n log largeur) en opérations vectorisées.
+    n = len(valeurs)
+    indices = np.arange(n)
+    taille = 1
+    while taille * 2 <= largeur:
+        gauche = indices[:len(indices) - taille]
+        droite = indices[taille:]
+        if maximum:
+            prendre_gauche = valeurs[gauche] >= valeurs[droite]
+        else:
+            prendre_gauche = valeurs[gauche] <= valeurs[droite]
+        indices = np.where(prendre_gauche, gauche, droite)
+        taille *= 2
+
+    # Deux blocs de taille 2^k qui se recouvrent couvrent exactement la fenêtre
+    nb_fenetres = n - largeur + 1
+    gauche = indices[:nb_fenetres]
+    droite = indices[largeur - taille:largeur - taille + nb_fenetres]
+    if maximum:
+        prendre_gauche = valeurs[gauche] >= valeurs[droite]
+    else:
+        prendre_gauche = valeurs[gauche] <= valeurs[droite]
+    return np.where(prendre_gauche, gauche, droite)
+
+
+def detecter_motifs(moving_average, seuil_pic, seuil_vallee, window_size=150, ecart_min=0.0125):
+    # Motifs pic puis vallée de WalkDetector, chaque motif n'est retourné qu'une fois avec sa fenêtre.
+    # Les seuils peuvent être des scalaires ou des tableaux indexés par le début de fenêtre.
+    valeurs = np.asarray(moving_average, dtype=np.float64)
+    nb_fenetres = len(valeurs) - window_size
+    if nb_fenetres <= 0:
+        vide = np.empty(0, dtype=np.intp)
+        return vide, vide, vide
+
+    indices_max = _arg_extremum_glissant(valeurs, window_size, maximum=True)[:nb_fenetres]
+    indices_min = _arg_extremum_glissant(valeurs, window_size, maximum=False)[:nb_fenetres]
+    max_val = valeurs[indices_max]
+    min_val = valeurs[indices_min]
+
+    # Une fenêtre contenant un NaN ne détecte rien (np.max retourne NaN)
+    nans = np.concatenate(([0], np.cumsum(np.isnan(valeurs))))
+    sans_nan = (nans[window_size:window_size + nb_fenetres] - nans[:nb_fenetres]) == 0
+
+    seuil_pic = np.broadcast_to(seuil_pic, nb_fenetres)
+    seuil_vallee = np.broadcast_to(seuil_vallee, nb_fenetres)
+    valide = (sans_nan & (max_val >= seuil_pic) & (min_val <= seuil_vallee)
+              & (indices_max < indices_min) & (indices_min - indices_max < window_size)
+              & (max_val - min_val > ecart_min))
+
+    # Un motif est une paire (pic, vallée) distincte : plusieurs fenêtres voient la même paire,
+    # seule la première est gardée. Deux motifs accolés restent deux motifs.
+    debuts = np.flatnonzero(valide)
+    if len(debuts) == 0:
+        return debuts, debuts, debuts
+    paires = np.stack((indices_max[debuts], indices_min[debuts]), axis=1)
+    _, premieres = np.unique(paires, axis=0, return_index=True)
+    debuts = debuts[np.sort(premieres)]
+    return debuts, indices_max[debuts], indices_min[debuts]
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+# Types d'événements : le code int8 est l'indice dans TYPES
+TYPES = ('Pic', 'Vallée', 'Pose de Pied', 'levé de Pied', 'Début motif', 'Fin motif')
+PIC, VALLEE, LIFT_DOWN, LIFT_OFF, DEBUT_MOTIF, FIN_MOTIF = range(len(TYPES))
+
+# Drapeaux (bits) de chaque événement
+DRAPEAU_ERREUR = 1
+DRAPEAU_AVERTISSEMENT = 2
+# Codes de la colonne Erreur des tables de résultats (voir erreurs)
+ERREURS = ('', 'Avertissement', 'Erreur')
+
+CAPACITE_INITIALE = 64
+
+
+class TableEvenements:
+    # Événements stockés en colonnes NumPy (temps float64, valeur float32, type int8, drapeaux uint8),
+    # soit 14 octets par événement au lieu d'un tuple Python et de chaînes répétées.
+    # Les tableaux sont surdimensionnés et doublés à la demande : ajouter() est en O(1) amorti.
+    # Les propriétés temps, valeurs, types et drapeaux sont des vues sur les n premiers éléments.
+    # dtype_valeurs=np.float64 garde les valeurs exactes (tables du rapport, arrondies à 5 décimales).
+
+    def __init__(self, capacite=CAPACITE_INITIALE, dtype_valeurs=np.float32):
+        capacite = max(int(capacite), 1)
+        self._temps = np.empty(capacite, dtype=np.float64)
+        self._valeurs = np.empty(capacite, dtype=dtype_valeurs)
+        self._types = np.empty(capacite, dtype=np.int8)
+        self._drapeaux = np.empty(capacite, dtype=np.uint8)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        comptes = ', '.join(f"{TYPES[code]}: {nombre}" for code, nombre in
+                            zip(*np.unique(self.types, return_counts=True)))
+        return f"TableEvenements({self.n} événements{' - ' + comptes if comptes else ''})"
+
+    @property
+    def temps(self):
+        return self._temps[:self.n]
+
+    @property
+    def valeurs(self):
+        return self._valeurs[:self.n]
+
+    @property
+    def types(self):
+        return self._types[:self.n]
+
+    @property
+    def drapeaux(self):
+        return self._drapeaux[:self.n]
+
+    def nbytes(self):
+        return self.n * (8 + self._valeurs.itemsize + 1 + 1)
+
+    def _reserver(self, nombre):
+        # Agrandir les tableaux (au moins doublés) pour accueillir nombre événements de plus
+        besoin = self.n + nombre
+        if besoin <= len(self._temps):
+            return
+        capacite = max(besoin, 2 * len(self._temps))
+        for nom in ('_temps', '_valeurs', '_types', '_drapeaux'):
+            ancien = getattr(self, nom)
+            nouveau = np.empty(capacite, dtype=ancien.dtype)
+            nouveau[:self.n] = ancien[:self.n]
+            setattr(self, nom, nouveau)
+
+    def ajouter(self, temps, valeur, type_evenement, drapeaux=0):
+        # Ajouter un seul événement (détection en ligne)
+        self._reserver(1)
+        i = self.n
+        self._temps[i] = temps
+        self._valeurs[i] = np.nan if valeur is None else valeur
+        self._types[i] = type_evenement
+        self._drapeaux[i] = drapeaux
+        self.n += 1
+
+    def ajouter_tableaux(self, temps, valeurs, type_evenement, drapeaux=0):
+        # Ajouter un lot d'événements d'un même type (valeurs None : NaN)
+        temps = np.asarray(temps, dtype=np.float64)
+        nombre = len(temps)
+        self._reserver(nombre)
+        fin = self.n + nombre
+        self._temps[self.n:fin] = temps
+        self._valeurs[self.n:fin] = np.nan if valeurs is None else valeurs
+        self._types[self.n:fin] = type_evenement
+        self._drapeaux[self.n:fin] = drapeaux
+        self.n = fin
+
+    @classmethod
+    def depuis_tableaux(cls, temps, valeurs, types, drapeaux=None, dtype_valeurs=np.float32):
+        # Table construite directement sur des tableaux existants (sans marge de croissance)
+        table = cls.__new__(cls)
+        table._temps = np.ascontiguousarray(temps, dtype=np.float64)
+        table._valeurs = np.ascontiguousarray(valeurs, dtype=dtype_valeurs)
+        table._types = np.ascontiguousarray(types, dtype=np.int8)
+        table._drapeaux = (np.zeros(len(table._temps), dtype=np.uint8) if drapeaux is None
+                           else np.ascontiguousarray(drapeaux, dtype=np.uint8))
+        table.n = len(table._temps)
+        return table
+
+    @classmethod
+    def depuis_indices(cls, time, signal, indices_par_type, dtype_valeurs=np.float32):
+        # Table des événements repérés par leurs indices dans un signal : {PIC: indices, ...}
+        time = np.asarray(time, dtype=np.float64)
+        signal = None if signal is None else np.asarray(signal)
+        nombre = sum(len(indices) for indices in indices_par_type.values())
+        table = cls(nombre, dtype_valeurs)
+        for type_evenement, indices in indices_par_type.items():
+            valeurs = None if signal is None or type_evenement in (LIFT_DOWN, LIFT_OFF) else signal[indices]
+            table.ajouter_tableaux(time[indices], valeurs, type_evenement)
+        return table
+
+    @classmethod
+    def concatener(cls, tables):
+        # Une seule table à partir de plusieurs (sessions d'une cohorte par exemple)
+        tables = list(tables)
+        if not tables:
+            return cls()
+        valeurs = np.concatenate([table.valeurs for table in tables])
+        return cls.depuis_tableaux(np.concatenate([table.temps for table in tables]), valeurs,
+                                   np.concatenate([table.types for table in tables]),
+                                   np.concatenate([table.drapeaux for table in tables]), valeurs.dtype)
+
+    def _extraire(self, indices):
+        return TableEvenements.depuis_tableaux(self.temps[indices], self.valeurs[indices],
+                                               self.types[indices], self.drapeaux[indices], self._valeurs.dtype)
+
+    def trier(self):
+        # Tous les types fusionnés par ordre de temps (tri stable : l'ordre d'ajout départage)
+        return self._extraire(np.argsort(self.temps, kind='stable'))
+
+    def selection(self, type_evenement):
+        # Événements d'un seul type
+        return self._extraire(self.types == type_evenement)
+
+    def entre(self, debut, fin):
+        # Événements dans [debut, fin] d'une table triée, par recherche binaire
+        i0 = np.searchsorted(self.temps, debut)
+        i1 = np.searchsorted(self.temps, fin, side='right')
+        return self._extraire(slice(i0, i1))
+
+    def ecarts_suivants(self):
+        # Écart au prochain événement du même type, NaN pour le dernier de chaque type
+        # (les temps de chaque type doivent être croissants, comme après depuis_indices ou trier)
+        ecarts = np.full(self.n, np.nan)
+        for type_evenement in np.unique(self.types):
+            indices = np.flatnonzero(self.types == type_evenement)
+            ecarts[indices[:-1]] = np.abs(np.diff(self.temps[indices]))
+        return ecarts
+
+    def marquer_ecarts(self, ecart_min, ecart_max, decimales=None):
+        # Drapeaux d'erreur sur l'écart au prochain événement du même type. Les bornes sont des
+        # scalaires ou un tableau par événement (bornes de la cadence) ; avec decimales, les écarts
+        # sont arrondis avant d'être comparés, comme la colonne Différence de Temps du rapport
+        ecarts = self.ecarts_suivants()
+        if decimales is not None:
+            ecarts = np.round(ecarts, decimales)
+        drapeaux = self._drapeaux[:self.n]
+        drapeaux &= ~np.uint8(DRAPEAU_ERREUR | DRAPEAU_AVERTISSEMENT)
+        drapeaux[ecarts > ecart_max] |= DRAPEAU_ERREUR
+        drapeaux[ecarts < ecart_min] |= DRAPEAU_AVERTISSEMENT
+        return self
+
+    def vers_pandas(self):
+        # DataFrame sur les mêmes tableaux (sans copie des colonnes numériques) ; le type
+        # devient une colonne catégorielle dont les codes sont les types int8
+        return pd.DataFrame({
+            'Temps (ms)': self.temps,
+            'Valeur': self.valeurs,
+            'Type': pd.Categorical.from_codes(self.types, categories=TYPES, validate=False),
+            'Drapeaux': self.drapeaux,
+        }, copy=False)
+
+
+def erreurs(drapeaux):
+    # Colonne Erreur catégorielle (ERREURS) tirée des drapeaux : l'erreur l'emporte sur l'avertissement
+    drapeaux = np.asarray(drapeaux)
+    codes = np.where(drapeaux & DRAPEAU_ERREUR, 2, np.where(drapeaux & DRAPEAU_AVERTISSEMENT, 1, 0)).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=ERREURS, validate=False)
@@ -0,0 +1,84 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from calibrage import calibrer_seuils, seuils_echantillons
+from detection import coder_contact_mode
+
+# Nombre de fenêtres traitées par bloc (mémoire bornée quelle que soit la durée de l'enregistrement)
+TAILLE_BLOC = 65536
+
+
+def _comptes_cumules(validation_col, mode):
+    # Nombre cumulé d'échantillons dans le mode donné, pour compter un mode sur une fenêtre en O(1)
+    codes, categories = coder_contact_mode(validation_col)
+    cumul = np.zeros(len(codes) + 1, dtype=np.int64)
+    if mode in categories:
+        np.cumsum(codes == categories.index(mode), out=cumul[1:])
+    return cumul
+
+
+def iterer_features(signal, validation_col, window_size, seuil_pic, seuil_vallee, taille_bloc=TAILLE_BLOC):
+    # Produit (début, X, y) par blocs : X en float32 [max, min, argmax, argmin] de chaque fenêtre
+    # signal[i:i + window_size], y vaut 1 si le motif pic-vallée et les modes DC et SC y sont présents.
+    # Les seuils peuvent être des scalaires ou des tableaux indexés par le début de fenêtre.
+    signal = np.asarray(signal, dtype=np.float64)
+    nb_fenetres = max(len(signal) - window_size, 0)
+    seuil_pic = np.broadcast_to(seuil_pic, nb_fenetres)
+    seuil_vallee = np.broadcast_to(seuil_vallee, nb_fenetres)
+
+    # Présence de DC et SC par sommes préfixes sur le contact_mode catégoriel
+    cumul_dc = _comptes_cumules(validation_col, 'DC')
+    cumul_sc = _comptes_cumules(validation_col, 'SC')
+
+    for debut in range(0, nb_fenetres, taille_bloc):
+        fin = min(debut + taille_bloc, nb_fenetres)
+        fenetres = sliding_window_view(signal[debut:fin + window_size - 1], window_size)
+
+        max_val = fenetres.max(axis=1)
+        min_val = fenetres.min(axis=1)
+        max_index = fenetres.argmax(axis=1)
+        min_index = fenetres.argmin(axis=1)
+
+        X = np.empty((fin - debut, 4), dtype=np.float32)
+        X[:, 0] = max_val
+        X[:, 1] = min_val
+        X[:, 2] = max_index
+        X[:, 3] = min_index
+
+        motif = ((max_val >= seuil_pic[debut:fin]) & (min_val <= seuil_vallee[debut:fin])
+                 & (max_index < min_index) & (min_index - max_index < window_size))
+        avec_dc = cumul_dc[debut + window_size:fin + window_size] > cumul_dc[debut:fin]
+        avec_sc = cumul_sc[debut + window_size:fin + window_size] > cumul_sc[debut:fin]
+        y = (motif & avec_dc & avec_sc).astype(np.int8)
+
+        yield debut, X, y
+
+
+def extraire_features(signal, validation_col, window_size, seuil_pic, seuil_vallee, taille_bloc=TAILLE_BLOC):
+    # Matrice complète des caractéristiques et des labels
+    nb_fenetres = max(len(signal) - window_size, 0)
+    X = np.empty((nb_fenetres, 4), dtype=np.float32)
+    y = np.empty(nb_fenetres, dtype=np.int8)
+    for debut, X_bloc, y_bloc in iterer_features(signal, validation_col, window_size,
+                                                 seuil_pic, seuil_vallee, taille_bloc):
+        X[debut:debut + len(X_bloc)] = X_bloc
+        y[debut:debut + len(y_bloc)] = y_bloc
+    return X, y
+
+
+def seuils_fenetres(nb_fenetres, avant, apres, ligne_bascule=8500):
+    # Seuils de chaque fenêtre selon sa ligne de départ : avant ({"peak", "valley"}) jusqu'à
+    # ligne_bascule, apres ensuite
+    position = np.arange(max(nb_fenetres, 0))
+    peak_thresholds = np.where(position < ligne_bascule, avant["peak"], apres["peak"])
+    valley_thresholds = np.where(position < ligne_bascule, avant["valley"], apres["valley"])
+    return peak_thresholds, valley_thresholds
+
+
+def seuils_fenetres_calibres(time, signal, nb_fenetres):
+    # Seuils de chaque fenêtre calibrés sur le signal (calibrage.calibrer_seuils) au lieu de thresholds ;
+    # retourne aussi la table des seuils par segment
+    seuils = calibrer_seuils(time, signal)
+    seuil_vallee, seuil_pic = seuils_echantillons(seuils, len(signal))
+    nb_fenetres = max(nb_fenetres, 0)
+    return seuil_pic[:nb_fenetres], seuil_vallee[:nb_fenetres], seuils
@@ -0,0 +1,200 @@
+import math
+from collections import deque
+
+import numpy as np
+
+from detection import TRANSITIONS_CONTACT
+from evenements import TYPES, TableEvenements
+from gaitway import charger_session
+from main import tables_evenements
+
+# Étiquettes des événements, identiques à celles de read_and_process_file
+PIC = 'Pic'
+VALLEE = 'Vallée'
+LIFT_DOWN = 'Pose de Pied'
+LIFT_OFF = 'levé de Pied'
+
+
+class _MoyenneGlissante:
+    # Moyenne des fenetre dernières valeurs par somme courante, NaN si la fenêtre contient un NaN
+    # (comme Series.rolling(window).mean()). La somme est recalculée sur la fenêtre toutes les
+    # fenetre valeurs pour que les erreurs d'arrondi ne s'accumulent pas ; une fenêtre de valeurs
+    # identiques donne exactement cette valeur (les paliers restent des égalités pour les extrema).
+
+    def __init__(self, fenetre):
+        self.fenetre = fenetre
+        self.valeurs = deque()
+        self.somme = 0.0
+        self.nobs = 0
+        self.depuis_recalcul = 0
+        self.identiques = 0
+
+    def ajouter(self, val):
+        # Ajoute un échantillon et retourne la moyenne de la fenêtre qui se termine sur lui
+        if len(self.valeurs) == self.fenetre:
+            ancienne = self.valeurs.popleft()
+            if ancienne == ancienne:
+                self.somme -= ancienne
+                self.nobs -= 1
+        self.identiques = self.identiques + 1 if self.valeurs and val == self.valeurs[-1] else 1
+        self.valeurs.append(val)
+        if val == val:
+            self.somme += val
+            self.nobs += 1
+
+        self.depuis_recalcul += 1
+        if self.depuis_recalcul >= self.fenetre:
+            self.somme = math.fsum(valeur for valeur in self.valeurs if valeur == valeur)
+            self.depuis_recalcul = 0
+
+        if self.nobs < self.fenetre:
+            return math.nan
+        if self.identiques >= self.fenetre:
+            return val
+        return self.somme / self.nobs
+
+
+class _ExtremaGlissants:
+    # Min et max des 2*demi+1 dernières valeurs (NaN ignorés) par files monotones, O(1) amorti
+
+    def __init__(self, largeur):
+        self.largeur = largeur
+        self.maxima = deque()
+        self.minima = deque()
+
+    def ajouter(self, indice, valeur):
+        limite = indice - self.largeur
+        while self.maxima and self.maxima[0][0] <= limite:
+            self.maxima.popleft()
+        while self.minima and self.minima[0][0] <= limite:
+            self.minima.popleft()
+        if valeur == valeur:
+            while self.maxima and self.maxima[-1][1] <= valeur:
+                self.maxima.pop()
+            self.maxima.append((indice, valeur))
+            while self.minima and self.minima[-1][1] >= valeur:
+                self.minima.pop()
+            self.minima.append((indice, valeur))
+
+    def maximum(self):
+        return self.maxima[0][1] if self.maxima else math.nan
+
+    def minimum(self):
+        return self.minima[0][1] if self.minima else math.nan
+
+
+class DetecteurFlux:
+    # Détection en ligne des pics, vallées, lift_down et lift_off, échantillon par échantillon.
+    #
+    # Latence : la moyenne mobile centrée de l'échantillon i n'est connue qu'à l'arrivée de
+    # l'échantillon i + (fenetre - 1) // 2, et le test d'extremum sur ±fenetre // 2 demande encore
+    # fenetre // 2 moyennes. Un pic ou une vallée est donc émis exactement self.latence
+    # échantillons après l'échantillon concerné (20 échantillons, soit 20 ms à 1 kHz, pour la
+    # fenêtre de 21). Les transitions de contact_mode sont émises sans latence. terminer()
+    # traite les derniers échantillons en fin de session, comme le traitement hors ligne.
+    #
+    # Les événements sont des tuples (type, indice, temps, valeur) ; valeur vaut None pour les
+    # transitions de contact_mode.
+
+    def __init__(self, seuil_v=4.35, seuil_p=4.55, fenetre=21):
+        self.seuil_v = seuil_v
+        self.seuil_p = seuil_p
+        self.fenetre = fenetre
+        self.demi = fenetre // 2
+        self.decalage = (fenetre - 1) // 2
+        self.latence = self.decalage + self.demi
+
+        self.moyenne = _MoyenneGlissante(fenetre)
+        self.extrema = _ExtremaGlissants(2 * self.demi + 1)
+        # Temps des échantillons et moyennes mobiles en attente de décision
+        self.temps = deque(maxlen=self.latence + 1)
+        self.moyennes = deque(maxlen=self.demi + 1)
+
+        self.nb_echantillons = 0
+        self.previous_type = None
+        self.previous_mode = None
+        self.transitions = {LIFT_DOWN: TRANSITIONS_CONTACT['lift_down'],
+                            LIFT_OFF: TRANSITIONS_CONTACT['lift_off']}
+
+    def _decider(self, i, evenements):
+        # Appliquer le test pic/vallée à la moyenne i, dont la fenêtre ±demi est complète
+        valeur = self.moyennes[0]
+        temps = self.temps[0]
+        if i < self.demi or valeur != valeur:
+            return
+        is_pic = valeur == self.extrema.maximum() and valeur > self.seuil_p
+        is_vallee = valeur == self.extrema.minimum() and valeur < self.seuil_v
+        if is_pic and self.previous_type != "pic":
+            evenements.append((PIC, i, temps, valeur))
+            self.previous_type = "pic"
+        elif is_vallee and self.previous_type != "val":
+            evenements.append((VALLEE, i, temps, valeur))
+            self.previous_type = "val"
+
+    def _ajouter_moyenne(self, j, valeur, evenements):
+        # Nouvelle moyenne mobile d'indice j : la moyenne j - demi peut être décidée
+        self.moyennes.append(valeur)
+        self.extrema.ajouter(j, valeur)
+        if j >= 2 * self.demi:
+            self._decider(j - self.demi, evenements)
+
+    def ajouter(self, temps, vitesse, contact_mode=None):
+        # Ajouter un échantillon et retourner la liste des événements devenus certains
+        evenements = []
+        k = self.nb_echantillons
+        self.nb_echantillons += 1
+        self.temps.append(temps)
+
+        # Transitions de contact_mode (NaN ignorés, comme hors ligne)
+        if contact_mode is not None and contact_mode == contact_mode:
+            for nom, (de, vers) in self.transitions.items():
+                if contact_mode == vers and self.previous_mode != vers and (de is None or self.previous_mode == de):
+                    evenements.append((nom, k, temps, None))
+            self.previous_mode = contact_mode
+
+        moyenne = self.moyenne.ajouter(float(vitesse))
+        j = k - self.decalage
+        if j >= 0:
+            self._ajouter_moyenne(j, moyenne, evenements)
+        return evenements
+
+    def ajouter_bloc(self, temps, vitesses, contact_modes=None):
+        # Ajouter un petit bloc d'échantillons
+        evenements = []
+        if contact_modes is None:
+            contact_modes = [None] * len(temps)
+        for t, v, mode in zip(temps, vitesses, contact_modes):
+            evenements.extend(self.ajouter(t, v, mode))
+        return evenements
+
+    def terminer(self):
+        # Fin de session : les dernières moyennes sont décidées avec une fenêtre complétée par des NaN
+        evenements = []
+        n = self.nb_echantillons
+        for j in range(max(n - self.decalage, 0), n):
+            self.temps.append(math.nan)
+            self._ajouter_moyenne(j, math.nan, evenements)
+        return evenements
+
+
+def rejouer_fichier(file_path, seuil_v=4.35, seuil_p=4.55, fenetre=21, colonnes=(0, 19, 31), taille_bloc=50):
+    # Rejouer un export à travers le détecteur en ligne, par petits blocs comme sur un tapis en direct,
+    # et retourner les mêmes tables que read_and_process_file
+    col_temps, col_vitesse, col_contact = colonnes
+    data = charger_session(file_path, colonnes=colonnes, dtypes={col_vitesse: 'float64'})
+    temps = data[col_temps].to_numpy()
+    vitesses = data[col_vitesse].to_numpy()
+    contact_modes = data[col_contact].astype(object).to_numpy()
+
+    detecteur = DetecteurFlux(seuil_v, seuil_p, fenetre)
+    evenements = []
+    for debut in range(0, len(temps), taille_bloc):
+        fin = debut + taille_bloc
+        evenements.extend(detecteur.ajouter_bloc(temps[debut:fin], vitesses[debut:fin], contact_modes[debut:fin]))
+    evenements.extend(detecteur.terminer())
+
+    # Les événements arrivent dans l'ordre du temps pour chaque type, comme le veut tables_evenements
+    table = TableEvenements(len(evenements), dtype_valeurs=np.float64)
+    for type_evenement, _, t, v in evenements:
+        table.ajouter(t, v, TYPES.index(type_evenement))
+    return tables_evenements(table)
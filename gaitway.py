@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Nombre de lignes d'en-tête des exports gaitway
+LIGNES_ENTETE = 44
+
+# Colonnes utilisées par les scripts : temps, raw speed, speed, contact_mode
+COLONNES_DEFAUT = (0, 9, 19, 31)
+
+# Types explicites par colonne : float64 comme pd.read_csv, contact_mode catégoriel
+DTYPES_DEFAUT = {0: 'float64', 9: 'float64', 19: 'float64', 31: 'category'}
+# Types compacts (compact=True) : vitesses en float32, moitié moins de mémoire mais des résultats
+# qui diffèrent dans les dernières décimales ; le temps reste en float64 (précision sur une heure à 1 kHz)
+DTYPES_COMPACTS = {9: 'float32', 19: 'float32'}
+
+DOSSIER_CACHE = '.cache_gaitway'
+
+
+def lire_entete(file_path, lignes=LIGNES_ENTETE):
+    # Lire les lignes d'en-tête sous forme de dictionnaire clé -> valeur(s)
+    entete = {}
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for _ in range(lignes):
+            ligne = f.readline()
+            if not ligne:
+                break
+            champs = [champ.strip() for champ in ligne.rstrip('\r\n').split('\t')]
+            cle = champs[0].rstrip(':').strip()
+            if not cle:
+                continue
+            valeurs = [champ for champ in champs[1:] if champ != '']
+            if len(valeurs) == 0:
+                entete[cle] = ''
+            elif len(valeurs) == 1:
+                entete[cle] = valeurs[0]
+            else:
+                entete[cle] = valeurs
+    return entete
+
+
+def _chemin_cache(file_path, colonnes, dtypes, dossier_cache):
+    # Clé du cache : chemin, date de modification, taille, colonnes et types demandés
+    infos = os.stat(file_path)
+    cle = json.dumps([os.path.abspath(file_path), infos.st_mtime_ns, infos.st_size,
+                      list(colonnes), {str(c): str(dtypes[c]) for c in colonnes}])
+    empreinte = hashlib.sha1(cle.encode('utf-8')).hexdigest()[:16]
+    if dossier_cache is None:
+        dossier_cache = os.path.join(os.path.dirname(os.path.abspath(file_path)), DOSSIER_CACHE)
+    nom = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(dossier_cache, f"{nom}_{empreinte}")
+
+
+def charger_session(file_path, colonnes=COLONNES_DEFAUT, dtypes=None, cache=True, dossier_cache=None,
+                    compact=False):
+    # Charger uniquement les colonnes demandées d'un export gaitway, avec cache Parquet sur disque.
+    # compact : vitesses en float32 (DTYPES_COMPACTS) ; dtypes l'emporte sur les deux
+    colonnes = list(colonnes)
+    types = dict(DTYPES_DEFAUT)
+    if compact:
+        types.update(DTYPES_COMPACTS)
+    if dtypes is not None:
+        types.update(dtypes)
+    types = {c: types.get(c, 'float32' if compact else 'float64') for c in colonnes}
+
+    chemin_cache = _chemin_cache(file_path, colonnes, types, dossier_cache) if cache else None
+    if chemin_cache is not None and os.path.exists(chemin_cache + '.parquet'):
+        data = pd.read_parquet(chemin_cache + '.parquet')
+        data.columns = [int(c) for c in data.columns]
+        with open(chemin_cache + '.json', 'r', encoding='utf-8') as f:
+            data.attrs['entete'] = json.load(f)
+        return data
+
+    entete = lire_entete(file_path)
+    data = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=LIGNES_ENTETE,
+                       usecols=colonnes, dtype=types)
+    data = data[colonnes]
+    data.attrs['entete'] = entete
+
+    if chemin_cache is not None:
+        try:
+            os.makedirs(os.path.dirname(chemin_cache), exist_ok=True)
+            with open(chemin_cache + '.json', 'w', encoding='utf-8') as f:
+                json.dump(entete, f, ensure_ascii=False)
+            a_ecrire = data.copy()
+            a_ecrire.columns = [str(c) for c in colonnes]
+            a_ecrire.attrs = {}
+            a_ecrire.to_parquet(chemin_cache + '.parquet', index=False)
+        except (ImportError, OSError) as erreur:
+            # Pas de moteur Parquet ou dossier non accessible : on continue sans cache
+            print(f"Cache non écrit pour {file_path} : {erreur}")
+
+    return data
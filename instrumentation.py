@@ -0,0 +1,178 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time as chrono
+import tracemalloc
+
+# Profileurs disponibles par étape
+PROFILEURS = ('cprofile', 'pyinstrument')
+
+# Variable d'environnement des scripts : chemin du fichier JSON des mesures (ou '-' pour l'affichage)
+VARIABLE_ENVIRONNEMENT = 'GAITWAY_INSTRUMENTATION'
+
+
+class _EtapeInactive:
+    # Contexte vide partagé : sans instrumentation, une étape ne coûte qu'un appel de méthode.
+    # Chaque entrée retourne un dict neuf, jeté ensuite : rien ne passe d'une étape ou d'une session à l'autre
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SansInstrumentation:
+    # Instrumentation désactivée (valeur par défaut des fonctions instrumentées)
+    actif = False
+    _etape = _EtapeInactive()
+
+    def etape(self, nom, lignes=None):
+        return self._etape
+
+
+AUCUNE = SansInstrumentation()
+
+
+class _Etape:
+    # Mesure d'une étape : temps mur, temps CPU, pic mémoire (tracemalloc), lignes et profil éventuel
+
+    def __init__(self, instrumentation, nom, lignes):
+        self.instrumentation = instrumentation
+        self.mesure = {'Étape': nom, 'Lignes': lignes}
+
+    def __enter__(self):
+        instrumentation = self.instrumentation
+        self.arreter_tracemalloc = False
+        if instrumentation.memoire:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self.arreter_tracemalloc = True
+        self.profileur = None
+        if instrumentation.profil == 'cprofile':
+            self.profileur = cProfile.Profile()
+            self.profileur.enable()
+        elif instrumentation.profil == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError as erreur:
+                raise ImportError("Le profil 'pyinstrument' demande le paquet pyinstrument") from erreur
+            self.profileur = Profiler()
+            self.profileur.start()
+        self.debut_mur = chrono.perf_counter()
+        self.debut_cpu = chrono.process_time()
+        return self.mesure
+
+    def __exit__(self, exc_type, exc, tb):
+        mesure = self.mesure
+        mesure['Secondes'] = round(chrono.perf_counter() - self.debut_mur, 6)
+        mesure['Secondes CPU'] = round(chrono.process_time() - self.debut_cpu, 6)
+        if self.profileur is not None:
+            mesure['Profil'] = self.instrumentation._sauver_profil(self.profileur, mesure['Étape'])
+        if self.instrumentation.memoire:
+            mesure['Mémoire pic (Mo)'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+            if self.arreter_tracemalloc:
+                tracemalloc.stop()
+        if exc_type is not None:
+            mesure['Erreur'] = repr(exc)
+        self.instrumentation._enregistrer(mesure)
+        return False
+
+
+class Instrumentation:
+    # Mesures par étape nommée du traitement :
+    #     with instrumentation.etape('lecture') as mesure:
+    #         data = ...
+    #         mesure['Lignes'] = len(data)
+    # Chaque mesure est gardée dans self.mesures et passée à rappel (fonction d'un dict) si fourni.
+    # profil ('cprofile' ou 'pyinstrument') profile chaque étape ; les profils sont écrits dans
+    # dossier_profils (résumé texte des fonctions les plus coûteuses si dossier_profils est None).
+    # contexte est ajouté à chaque mesure (nom de la session par exemple). Les étapes ne s'imbriquent pas.
+    actif = True
+
+    def __init__(self, rappel=None, memoire=True, profil=None, dossier_profils=None, contexte=None):
+        if profil is not None and profil not in PROFILEURS:
+            raise ValueError(f"Profileur inconnu : {profil} (profileurs possibles : {', '.join(PROFILEURS)})")
+        self.rappel = rappel
+        self.memoire = memoire
+        self.profil = profil
+        self.dossier_profils = dossier_profils
+        self.contexte = dict(contexte or {})
+        self.mesures = []
+
+    def etape(self, nom, lignes=None):
+        return _Etape(self, nom, lignes)
+
+    def _enregistrer(self, mesure):
+        mesure.update(self.contexte)
+        self.mesures.append(mesure)
+        if self.rappel is not None:
+            self.rappel(mesure)
+
+    def _sauver_profil(self, profileur, nom):
+        prefixe = '_'.join(str(valeur) for valeur in self.contexte.values())
+        nom_fichier = f"{prefixe}_{nom}" if prefixe else nom
+        if self.profil == 'pyinstrument':
+            profileur.stop()
+            if self.dossier_profils is None:
+                return profileur.output_text()
+            os.makedirs(self.dossier_profils, exist_ok=True)
+            chemin = os.path.join(self.dossier_profils, f"{nom_fichier}.html")
+            with open(chemin, 'w', encoding='utf-8') as f:
+                f.write(profileur.output_html())
+            return chemin
+
+        profileur.disable()
+        if self.dossier_profils is None:
+            texte = io.StringIO()
+            pstats.Stats(profileur, stream=texte).sort_stats('cumulative').print_stats(15)
+            return texte.getvalue()
+        os.makedirs(self.dossier_profils, exist_ok=True)
+        chemin = os.path.join(self.dossier_profils, f"{nom_fichier}.prof")
+        profileur.dump_stats(chemin)
+        return chemin
+
+    def total(self):
+        return round(sum(mesure['Secondes'] for mesure in self.mesures), 6)
+
+    def ecrire_json(self, chemin):
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(self.mesures, f, ensure_ascii=False, indent=2)
+
+    def afficher(self):
+        for mesure in self.mesures:
+            memoire = mesure.get('Mémoire pic (Mo)')
+            memoire = '-' if memoire is None else f"{memoire:.1f} Mo"
+            lignes = '' if mesure['Lignes'] is None else f"{mesure['Lignes']} lignes"
+            print(f"{mesure['Étape']:<24} {mesure['Secondes']:>10.4f} s  {memoire:>10}  {lignes}")
+
+
+def rappel_jsonl(chemin):
+    # Rappel qui ajoute chaque mesure comme une ligne JSON d'un fichier (plusieurs sessions, un fichier)
+    def rappel(mesure):
+        with open(chemin, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(mesure, ensure_ascii=False) + '\n')
+    return rappel
+
+
+def instrumentation_environnement(**kwargs):
+    # Instrumentation des scripts activée par la variable GAITWAY_INSTRUMENTATION
+    if not os.environ.get(VARIABLE_ENVIRONNEMENT):
+        return AUCUNE
+    return Instrumentation(**kwargs)
+
+
+def terminer_environnement(instrumentation):
+    # Écrire (ou afficher) les mesures d'un script selon GAITWAY_INSTRUMENTATION
+    if not instrumentation.actif:
+        return
+    chemin = os.environ.get(VARIABLE_ENVIRONNEMENT)
+    if chemin == '-':
+        instrumentation.afficher()
+    else:
+        instrumentation.ecrire_json(chemin)
+        print(f"Mesures par étape écrites dans : {chemin}")
@@ -0,0 +1,216 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy.signal import butter, savgol_filter, sosfiltfilt
+
+from detection import extrema_locaux, selectionner_pics_vallees
+
+# Échantillons lissés par bloc ; chaque bloc est prolongé d'une marge de part et d'autre
+TAILLE_BLOC = 200_000
+
+# Savitzky-Golay : degré du polynôme ajusté sur chaque fenêtre
+ORDRE_SAVGOL = 3
+
+# Butterworth en sections d'ordre 2, appliqué aller-retour (sans déphasage) : ordre et fréquence de
+# coupure (Hz). À 1 kHz, 20 Hz correspond à peu près à la coupure à -3 dB d'une moyenne sur 21 échantillons
+ORDRE_BUTTERWORTH = 2
+COUPURE_BUTTERWORTH = 20.0
+# Marge des blocs en périodes de coupure : la réponse impulsionnelle y est éteinte
+PERIODES_MARGE = 10
+
+
+class BanqueMoyennes:
+    # Moyennes mobiles centrées de plusieurs largeurs tirées d'une seule somme cumulée.
+    # Chaque colonne n'est calculée qu'à la première demande (banque[21]) puis gardée en mémoire.
+    # Comme rolling(window, center=True).mean(), une fenêtre incomplète ou contenant un NaN donne NaN.
+
+    def __init__(self, signal, dtype=np.float64):
+        valeurs = np.asarray(signal, dtype=np.float64)
+        self.n = len(valeurs)
+        self.dtype = dtype
+        nans = np.isnan(valeurs)
+
+        # Signal centré sur sa moyenne pour limiter l'erreur d'arrondi de la somme cumulée
+        self.centre = float(np.nanmean(valeurs)) if self.n and not nans.all() else 0.0
+        self.cumul = np.zeros(self.n + 1, dtype=np.float64)
+        np.cumsum(np.where(nans, 0.0, valeurs - self.centre), out=self.cumul[1:])
+        self.cumul_nans = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(nans, out=self.cumul_nans[1:])
+        self.colonnes = {}
+
+    def __getitem__(self, fenetre):
+        if fenetre not in self.colonnes:
+            self.colonnes[fenetre] = self._calculer(fenetre)
+        return self.colonnes[fenetre]
+
+    def _calculer(self, fenetre):
+        # La fenêtre de l'indice i couvre [i - fenetre // 2, i - fenetre // 2 + fenetre)
+        resultat = np.full(self.n, np.nan, dtype=self.dtype)
+        decalage = fenetre // 2
+        nb = self.n - fenetre + 1
+        if nb <= 0:
+            return resultat
+        somme = self.cumul[fenetre:] - self.cumul[:nb]
+        moyenne = somme / fenetre + self.centre
+        avec_nan = (self.cumul_nans[fenetre:] - self.cumul_nans[:nb]) > 0
+        moyenne[avec_nan] = np.nan
+        resultat[decalage:decalage + nb] = moyenne
+        return resultat
+
+    def oublier(self, fenetre=None):
+        # Libérer une colonne (ou toutes) déjà calculée
+        if fenetre is None:
+            self.colonnes.clear()
+        else:
+            self.colonnes.pop(fenetre, None)
+
+
+def _dtype_sortie(signal, dtype=None):
+    # dtype=None : celui du signal s'il est flottant (float32 d'une colonne compacte), sinon float64
+    if dtype is not None:
+        return dtype
+    dtype_signal = getattr(signal, 'dtype', None)
+    if dtype_signal is not None and np.issubdtype(dtype_signal, np.floating):
+        return dtype_signal
+    return np.float64
+
+
+def _par_blocs(signal, filtre, marge, taille_bloc=TAILLE_BLOC, dtype=None):
+    # Appliquer filtre bloc par bloc : chaque bloc est lu avec marge échantillons de chaque côté,
+    # converti seul en float64, et seul son centre est gardé. Le signal peut être un np.memmap ;
+    # le résultat garde son dtype (voir _dtype_sortie), sans copie float64 de toute la session
+    n = len(signal)
+    taille_bloc = max(n, 1) if taille_bloc is None else taille_bloc
+    resultat = np.empty(n, dtype=_dtype_sortie(signal, dtype))
+    for debut in range(0, n, taille_bloc):
+        fin = min(n, debut + taille_bloc)
+        avant, apres = max(0, debut - marge), min(n, fin + marge)
+        bloc = filtre(np.asarray(signal[avant:apres], dtype=np.float64))
+        resultat[debut:fin] = bloc[debut - avant:fin - avant]
+    return resultat
+
+
+def _sans_nan(filtre):
+    # Les NaN sont comblés par interpolation linéaire avant le filtre, puis remis à leur place
+    def filtre_nan(bloc):
+        nans = np.isnan(bloc)
+        if not nans.any():
+            return filtre(bloc)
+        if nans.all():
+            return bloc
+        positions = np.arange(len(bloc))
+        bloc = bloc.copy()
+        bloc[nans] = np.interp(positions[nans], positions[~nans], bloc[~nans])
+        resultat = filtre(bloc)
+        resultat[nans] = np.nan
+        return resultat
+    return filtre_nan
+
+
+def moyenne_mobile(signal, fenetre=21, taille_bloc=None, dtype=None):
+    # Moyenne mobile centrée, comme Series.rolling(fenetre, center=True).mean(). Sans copie
+    # intermédiaire, elle est calculée d'un seul tenant par défaut : les sommes glissantes de pandas
+    # dépendent du début du bloc, et des blocs changeraient les derniers bits (et les égalités d'extrema)
+    def filtre(bloc):
+        return pd.Series(bloc).rolling(window=fenetre, center=True).mean().to_numpy()
+    return _par_blocs(signal, filtre, fenetre, taille_bloc, dtype)
+
+
+def savitzky_golay(signal, fenetre=21, ordre=ORDRE_SAVGOL, taille_bloc=TAILLE_BLOC, dtype=None):
+    # Polynôme de degré ordre ajusté sur chaque fenêtre centrée : les extrema gardent leur position
+    # et leur amplitude. Aux deux bouts du signal, le polynôme de la première/dernière fenêtre est prolongé.
+    def filtre(bloc):
+        if len(bloc) < fenetre:
+            return np.full(len(bloc), np.nan)
+        return savgol_filter(bloc, fenetre, ordre, mode='interp')
+    return _par_blocs(signal, _sans_nan(filtre), fenetre, taille_bloc, dtype)
+
+
+def butterworth(signal, frequence, coupure=COUPURE_BUTTERWORTH, ordre=ORDRE_BUTTERWORTH,
+                taille_bloc=TAILLE_BLOC, dtype=None):
+    # Passe-bas de Butterworth (sections d'ordre 2) filtré aller-retour : déphasage nul.
+    # Le filtre étant récursif, la marge des blocs couvre PERIODES_MARGE périodes de coupure.
+    sos = butter(ordre, coupure, btype='low', fs=frequence, output='sos')
+    marge = int(np.ceil(PERIODES_MARGE * frequence / coupure))
+
+    def filtre(bloc):
+        if len(bloc) <= 3 * (2 * len(sos) + 1):
+            return np.full(len(bloc), np.nan)
+        return sosfiltfilt(sos, bloc)
+    return _par_blocs(signal, _sans_nan(filtre), marge, taille_bloc, dtype)
+
+
+# Lissages disponibles par nom (paramètre lissage de main.read_and_process_file et de WalkDetector)
+LISSAGES = ('moyenne', 'savgol', 'butterworth')
+
+
+def frequence_echantillonnage(temps, nb_ecarts=10_000):
+    # Fréquence (Hz) estimée par l'écart médian des premiers échantillons
+    ecarts = np.diff(np.asarray(temps[:nb_ecarts + 1], dtype=np.float64))
+    return float(1.0 / np.median(ecarts))
+
+
+def lisser(signal, lissage='moyenne', fenetre=21, temps=None, taille_bloc=TAILLE_BLOC, dtype=None,
+           **options):
+    # Lissage choisi par son nom. fenetre (échantillons) sert à la moyenne et à Savitzky-Golay ;
+    # Butterworth demande la fréquence d'échantillonnage (options['frequence'] ou estimée sur temps).
+    # options : ordre (savgol, butterworth), coupure en Hz (butterworth). taille_bloc ne concerne
+    # que les filtres ; la moyenne mobile reste d'un seul tenant. dtype=None : celui du signal
+    if lissage == 'moyenne':
+        return moyenne_mobile(signal, fenetre, dtype=dtype)
+    if lissage == 'savgol':
+        return savitzky_golay(signal, fenetre, options.get('ordre', ORDRE_SAVGOL), taille_bloc, dtype)
+    if lissage == 'butterworth':
+        frequence = options.get('frequence')
+        if frequence is None:
+            if temps is None:
+                raise ValueError("Le lissage 'butterworth' demande temps ou la fréquence d'échantillonnage")
+            frequence = frequence_echantillonnage(temps)
+        return butterworth(signal, frequence, options.get('coupure', COUPURE_BUTTERWORTH),
+                           options.get('ordre', ORDRE_BUTTERWORTH), taille_bloc, dtype)
+    raise ValueError(f"Lissage inconnu : {lissage} (lissages possibles : {', '.join(LISSAGES)})")
+
+
+def _intervalles(temps, indices):
+    if len(indices) < 2:
+        return np.nan, np.nan
+    ecarts = np.diff(temps[indices])
+    return ecarts.mean(), ecarts.std()
+
+
+def balayer(time, signal, fenetres, seuils_v, seuils_p, banque=None):
+    # Relancer la détection des pics et vallées pour toute la grille (fenêtre, seuil_v, seuil_p).
+    # La moyenne mobile et les extrema locaux ne sont calculés qu'une fois par fenêtre.
+    # Comme main.analyser_session : la moyenne (fenetre échantillons) et les extrema (±fenetre // 2)
+    # ne couvrent la même fenêtre centrée que pour une fenêtre impaire
+    paires = [fenetre for fenetre in fenetres if fenetre % 2 == 0]
+    if paires:
+        raise ValueError(f"fenetre doit être impaire : {', '.join(str(fenetre) for fenetre in paires)}")
+    temps = np.asarray(time, dtype=np.float64)
+    if banque is None:
+        banque = BanqueMoyennes(signal)
+
+    lignes = []
+    for fenetre in fenetres:
+        deja_calculee = fenetre in banque.colonnes
+        valeurs, est_max, est_min = extrema_locaux(banque[fenetre], fenetre // 2)
+        for seuil_v, seuil_p in itertools.product(seuils_v, seuils_p):
+            indices_pics, indices_vallees = selectionner_pics_vallees(valeurs, est_max, est_min, seuil_v, seuil_p)
+            moyenne_pics, ecart_pics = _intervalles(temps, indices_pics)
+            moyenne_vallees, ecart_vallees = _intervalles(temps, indices_vallees)
+            lignes.append({
+                'fenetre': fenetre,
+                'seuil_v': seuil_v,
+                'seuil_p': seuil_p,
+                'Nb Pics': len(indices_pics),
+                'Nb Vallées': len(indices_vallees),
+                'Intervalle moyen Pics': moyenne_pics,
+                'Écart-type Pics': ecart_pics,
+                'Intervalle moyen Vallées': moyenne_vallees,
+                'Écart-type Vallées': ecart_vallees,
+            })
+        # Les colonnes calculées pour le balayage seul sont libérées aussitôt
+        if not deja_calculee:
+            banque.oublier(fenetre)
+    return pd.DataFrame(lignes)
@@ -1,206 +1,182 @@
-import pandas as pd
 import numpy as np
+import pandas as pd
 import os
-from scipy.stats import linregress
 import json
 
-def read_and_process_file(file_path, seuil_v=4.35, seuil_p=4.55):
-    if not os.path.exists(file_path):
-        print(f"Le fichier spécifié n'existe pas : {file_path}")
-        return None, None, None
-
-    # Lire le fichier en ignorant les 43 premières lignes
-    data = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=44)
+from alignement import TOLERANCE_DEFAUT, statistiques_paires, table_paires
+from cadence import bornes_ecarts, estimer_cadence
+from calibrage import calibrer_seuils, seuils_echantillons
+from detection import detecter_transitions, extrema_locaux, extrema_segments, selectionner_pics_vallees
+from evenements import LIFT_DOWN, LIFT_OFF, PIC, VALLEE, TableEvenements, erreurs
+from gaitway import charger_session
+from instrumentation import AUCUNE, instrumentation_environnement, terminer_environnement
+from lissage import lisser
+from resultats import ECART_MAX, ECART_MIN, ecrire_resultats
+
+def detecter_session(file_path, seuil_v=4.35, seuil_p=4.55, fenetre=21, colonnes=(0, 19, 31),
+                     instrumentation=AUCUNE, lissage='moyenne'):
+    # Temps, signal lissé et indices des pics, vallées, lift_down et lift_off d'une session
+    # lissage : 'moyenne' (moyenne mobile sur fenetre), 'savgol' ou 'butterworth' (voir lissage.lisser)
+    temps, valeurs, indices, _ = analyser_session(file_path, seuil_v, seuil_p, fenetre, colonnes, instrumentation,
+                                                 lissage)
+    return temps, valeurs, indices
+
+def detecter_session_cadence(file_path, seuil_v=4.35, seuil_p=4.55, fenetre=21, colonnes=(0, 19, 31),
+                             instrumentation=AUCUNE, lissage='moyenne'):
+    # Comme detecter_session, mais la demi-fenêtre des extrema suit la cadence de chaque segment
+    # (cadence.estimer_cadence) au lieu de fenetre // 2 ; retourne aussi la table de cadence
+    temps, valeurs, indices, details = analyser_session(file_path, seuil_v, seuil_p, fenetre, colonnes,
+                                                       instrumentation, lissage, cadence=True)
+    return temps, valeurs, indices, details['cadence']
+
+def analyser_session(file_path, seuil_v=4.35, seuil_p=4.55, fenetre=21, colonnes=(0, 19, 31),
+                     instrumentation=AUCUNE, lissage='moyenne', cadence=False, calibrage=False, compact=False):
+    # Détection complète d'une session ; retourne (temps, signal lissé, indices, details) où details
+    # contient les tables 'cadence' (fenêtres des extrema par segment, voir cadence.estimer_cadence)
+    # et 'seuils' (calibrage : seuil_v / seuil_p par segment à la place des seuils passés), ou None.
+    # compact : vitesse lue et lissée en float32 (moitié moins de mémoire, dernières décimales différentes)
+    if fenetre % 2 == 0:
+        # Moyenne mobile sur fenetre échantillons, extrema sur ±fenetre//2 : une fenêtre paire les décale
+        raise ValueError(f"fenetre doit être impaire : {fenetre}")
+    # Lire uniquement les colonnes utiles (en-tête de 44 lignes ignoré, cache sur disque)
+    col_temps, col_vitesse, col_contact = colonnes
+    with instrumentation.etape('lecture') as mesure:
+        data = charger_session(file_path, colonnes=colonnes, dtypes=None if compact else {col_vitesse: 'float64'},
+                               compact=compact)
+        mesure['Lignes'] = len(data)
 
     # Extraire les colonnes nécessaires
-    time = data[0]
-    speed = data[19]
-    contact_mode = data[31]
-
-    # Initialiser les listes pour stocker les vallées, les pics et les lift_down de contact mode
-    vallees = []
-    pics = []
-
-    lift_down = []
-    lift_off = []
-
-    # Calculer la moyenne mobile
-    moving_average = speed.rolling(window=21, center=True).mean()
-
-    previous_type = None
-
-    # Détecter les vallées et les pics
-    for i in range(10, len(moving_average) - 10):
-        if pd.notna(moving_average[i]):  # Vérifier que la valeur n'est pas NaN
-            window = moving_average[i - 10:i + 11]
-            min_value = window.min()
-            max_value = window.max()
-
-            is_vallee = moving_average[i] == min_value and moving_average[i] < seuil_v
-            is_pic = moving_average[i] == max_value and moving_average[i] > seuil_p
-
-            # Vérifier les pics
-            if is_pic and previous_type != "pic":
-                pics.append((time[i], moving_average[i], 'Pic'))
-                previous_type = "pic"
-
-            # Vérifier les vallées
-            elif is_vallee and previous_type != "val":
-                vallees.append((time[i], moving_average[i], 'Vallée'))
-                previous_type = "val"
-
-
-    # Détecter les lift_down de contact_mode
-    previous_mode = None
-    for i in range(len(contact_mode)):
-        if pd.notna(contact_mode[i]):
-            current_mode = contact_mode[i]
-            if (previous_mode is None or previous_mode != 'SC') and current_mode == 'SC':
-                lift_down.append((time[i], 'Pose de Pied'))
-            previous_mode = current_mode
-
-    # Détecter les lift_off de contact_mode
-    previous_mode = None
-    for i in range(len(contact_mode)):
-        if pd.notna(contact_mode[i]):
-            current_mode = contact_mode[i]
-            if (previous_mode is None or previous_mode != 'Aerial') and current_mode == 'Aerial':
-                lift_off.append((time[i], 'levé de Pied'))
-            previous_mode = current_mode
-
-    # Créer des DataFrames pour les vallées, les pics et les lift_down
-    df_vallees = pd.DataFrame(vallees, columns=['Temps (ms)', 'Vitesse (m/s)', 'Type'])
-    df_pics = pd.DataFrame(pics, columns=['Temps (ms)', 'Vitesse (m/s)', 'Type'])
-    df_lift_off = pd.DataFrame(lift_off, columns=['Temps (ms)', 'Type'])
-    df_lift_down = pd.DataFrame(lift_down, columns=['Temps (ms)', 'Type'])
-
-    # Calculer la différence de temps entre chaque valeur x+1 et x
-    df_vallees['Différence de Temps (ms)'] = df_vallees['Temps (ms)'].diff().shift(-1).abs()
-    df_pics['Différence de Temps (ms)'] = df_pics['Temps (ms)'].diff().shift(-1).abs()
-    df_lift_off['Différence de Temps (ms)'] = df_lift_off['Temps (ms)'].diff().shift(-1).abs()
-    df_lift_down['Différence de Temps (ms)'] = df_lift_down['Temps (ms)'].diff().shift(-1).abs()
-
-
-    # Arrondir les valeurs de vitesse et de différence de temps
-    df_vallees['Vitesse (m/s)'] = df_vallees['Vitesse (m/s)'].round(5)
-    df_pics['Vitesse (m/s)'] = df_pics['Vitesse (m/s)'].round(5)
-    df_vallees['Différence de Temps (ms)'] = df_vallees['Différence de Temps (ms)'].round(4)
-    df_pics['Différence de Temps (ms)'] = df_pics['Différence de Temps (ms)'].round(4)
-    df_lift_off['Différence de Temps (ms)'] = df_lift_off['Différence de Temps (ms)'].round(4)
-    df_lift_down['Différence de Temps (ms)'] = df_lift_down['Différence de Temps (ms)'].round(4)
-
-    # Ajouter les codes d'erreur pour les différences de temps
-    df_vallees['Erreur'] = df_vallees['Différence de Temps (ms)'].apply(lambda x: 'Erreur' if x > 400 else ('Avertissement' if x < 0.250 else ''))
-    df_pics['Erreur'] = df_pics['Différence de Temps (ms)'].apply(lambda x: 'Erreur' if x > 400 else ('Avertissement' if x < 0.250 else ''))
-    df_lift_off['Erreur'] = df_lift_off['Différence de Temps (ms)'].apply(lambda x: 'Erreur' if x > 400 else ('Avertissement' if x < 0.250 else ''))
-    df_lift_down['Erreur'] = df_lift_down['Différence de Temps (ms)'].apply(lambda x: 'Erreur' if x > 400 else ('Avertissement' if x < 0.250 else ''))
-
-
-    # Retourner les résultats
-    return df_vallees, df_pics, df_lift_off, df_lift_down
-
-def write_results_to_file(vallees, pics, transitions, output_file):
-    with open(output_file, 'w') as f:
-        f.write("Vallées détectées:\t")
-        if not vallees.empty:
-            f.write(f"({len(vallees)})\n")
-            vallees.to_csv(f, index=False, sep='\t', lineterminator="\n")
-            # Vérifier les différences de temps pour les vallées
-            for index, row in vallees.iterrows():
-                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
-                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les vallées\n")
-        else:
-            f.write("Aucune vallée détectée.\n")
-
-        f.write("\nPics détectés:\n")
-        if not pics.empty:
-            pics.to_csv(f, index=False, sep='\t', lineterminator="\n")
-            # Vérifier les différences de temps pour les pics
-            for index, row in pics.iterrows():
-                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
-                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les pics\n")
-        else:
-            f.write("Aucun pic détecté.\n")
-
-        f.write("\nPose de pied détectées:\t")
-        if not lift_down.empty:
-            f.write(f"({len(lift_down)})\n")
-            lift_down.to_csv(f, index=False, sep='\t', lineterminator="\n")
-            # Vérifier les différences de temps pour les transitions
-            for index, row in lift_down.iterrows():
-                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
-                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les pose de pied\n")
+    time = data[col_temps]
+    speed = data[col_vitesse]
+    contact_mode = data[col_contact]
+
+    # Lisser la vitesse par blocs (moyenne mobile par défaut), dans le dtype de la colonne
+    with instrumentation.etape('moyenne_mobile', len(data)):
+        moving_average = pd.Series(lisser(speed.to_numpy(), lissage, fenetre, time.to_numpy()), index=speed.index)
+
+    # Seuils calibrés sur les quantiles glissants du signal lissé, constants par segment
+    details = {'cadence': None, 'seuils': None}
+    if calibrage:
+        with instrumentation.etape('calibrage', len(data)) as mesure:
+            details['seuils'] = calibrer_seuils(time.to_numpy(), moving_average.to_numpy())
+            seuil_v, seuil_p = seuils_echantillons(details['seuils'], len(data))
+            mesure['Segments'] = len(details['seuils'])
+
+    # Détecter les vallées et les pics (fenêtre de ±fenetre//2 échantillons, ou selon la cadence)
+    if cadence:
+        with instrumentation.etape('cadence', len(data)) as mesure:
+            details['cadence'] = estimer_cadence(time.to_numpy(), moving_average.to_numpy())
+            mesure['Segments'] = len(details['cadence'])
+    with instrumentation.etape('extrema', len(data)) as mesure:
+        table_cadence = details['cadence']
+        if table_cadence is None:
+            valeurs, est_max, est_min = extrema_locaux(moving_average, fenetre // 2)
         else:
-            f.write("Aucune pose de pied détectée.\n")
-
-
-        f.write("\nLevé de pied détectées:\t")
-        if not lift_off.empty:
-            f.write(f"({len(lift_off)})\n")
-            lift_off.to_csv(f, index=False, sep='\t', lineterminator="\n")
-            # Vérifier les différences de temps pour les transitions
-            for index, row in lift_off.iterrows():
-                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
-                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les levé de pied\n")
-        else:
-            f.write("Aucune pose de pied détectée.\n")
-
-
-
-def compare_differences(vallees, pics, transitions):
-    if not vallees.empty and not pics.empty and not transitions.empty:
-        vallees_diff = vallees['Différence de Temps (ms)'].dropna().values
-        pics_diff = pics['Différence de Temps (ms)'].dropna().values
-        lift_down_diff = transitions['Différence de Temps (ms)'].dropna().values
-        lift_off_diff = transitions['Différence de Temps (ms)'].dropna().values
-
-        # Calculer les coefficients de corrélation
-
-        min_len = min(len(vallees_diff), len(pics_diff), len(lift_down_diff), len(lift_off_diff))
-
-        vallees_diff = vallees_diff[:min_len]
-        pics_diff = pics_diff[:min_len]
-        lift_down_diff = lift_down_diff[:min_len]
-        lift_off_diff = lift_down_diff[:min_len]
-
-        corr_vallees_trans = np.corrcoef(vallees_diff, lift_down_diff)[0, 1]
-        corr_pics_trans = np.corrcoef(pics_diff, lift_down_diff)[0, 1]
-
-
-        # Effectuer une régression linéaire
-        slope_vallees, intercept_vallees, r_vallees, p_vallees, std_err_vallees = linregress(vallees_diff, lift_down_diff)
-        slope_pics, intercept_pics, r_pics, p_pics, std_err_pics = linregress(pics_diff, lift_down_diff)
-
-        return {
-            "Corrélation Vallées-Transitions": corr_vallees_trans,
-            "Corrélation Pics-Transitions": corr_pics_trans,
-            "Régression Vallées-Transitions": {
-                "Pente": slope_vallees,
-                "Intercept": intercept_vallees,
-                "R-value": r_vallees,
-                "P-value": p_vallees,
-                "Erreur std": std_err_vallees
-            },
-            "Régression Pics-Transitions": {
-                "Pente": slope_pics,
-                "Intercept": intercept_pics,
-                "R-value": r_pics,
-                "P-value": p_pics,
-                "Erreur std": std_err_pics
-            }
-        }
+            valeurs, est_max, est_min = extrema_segments(moving_average, table_cadence['Indice début'].to_numpy(),
+                                                         table_cadence['Demi-fenêtre'].to_numpy())
+        indices_pics, indices_vallees = selectionner_pics_vallees(valeurs, est_max, est_min, seuil_v, seuil_p)
+        mesure['Événements'] = len(indices_pics) + len(indices_vallees)
+
+    # Détecter les lift_down et lift_off de contact_mode en un seul passage
+    with instrumentation.etape('transitions', len(data)) as mesure:
+        transitions = detecter_transitions(contact_mode)
+        mesure['Événements'] = len(transitions['lift_down']) + len(transitions['lift_off'])
+    indices = {PIC: indices_pics, VALLEE: indices_vallees,
+               LIFT_DOWN: transitions['lift_down'], LIFT_OFF: transitions['lift_off']}
+    return time.to_numpy(), moving_average.to_numpy(), indices, details
+
+def read_and_process_file(file_path, seuil_v=4.35, seuil_p=4.55, fenetre=21, colonnes=(0, 19, 31),
+                          instrumentation=AUCUNE, lissage='moyenne', cadence=False, calibrage=False,
+                          fichier_seuils=None, compact=False):
+    # instrumentation : mesures par étape (lecture, moyenne_mobile, extrema, transitions, tables)
+    # lissage : nom du lissage de la vitesse ('moyenne', 'savgol', 'butterworth')
+    # cadence : fenêtres des extrema et bornes des différences de temps déduites de la cadence
+    # calibrage : seuils calculés sur la session (seuil_v et seuil_p ignorés), écrits dans fichier_seuils
+    # compact : vitesse en float32 (voir analyser_session)
+    if not os.path.exists(file_path):
+        print(f"Le fichier spécifié n'existe pas : {file_path}")
+        return None, None, None, None
+
+    temps, valeurs, indices, details = analyser_session(file_path, seuil_v, seuil_p, fenetre, colonnes,
+                                                        instrumentation, lissage, cadence, calibrage, compact)
+    if details['seuils'] is not None and fichier_seuils is not None:
+        details['seuils'].to_csv(fichier_seuils, index=False)
+    return tables_session(temps, valeurs, indices, instrumentation, details['cadence'])
+
+def tables_session(temps, valeurs, indices, instrumentation=AUCUNE, cadence=None):
+    # Tables des vallées, pics, lift_off et lift_down à partir des indices de detecter_session,
+    # construites sur une TableEvenements (valeurs float64 : la vitesse du rapport garde 5 décimales exactes)
+    with instrumentation.etape('tables', sum(len(indices_type) for indices_type in indices.values())):
+        evenements = TableEvenements.depuis_indices(temps, valeurs, indices, dtype_valeurs=np.float64)
+        return tables_evenements(evenements, cadence)
+
+def tables_evenements(evenements, cadence=None):
+    # Tables du rapport tirées d'une TableEvenements : une par type, colonnes NumPy de la table
+    # (sans copie), Type et Erreur catégoriels. Les écarts au prochain événement du même type
+    # sont arrondis à 4 décimales avant d'être comparés aux bornes ; avec une table de cadence,
+    # chaque événement prend les bornes de son segment
+    if cadence is None:
+        bornes = (ECART_MIN, ECART_MAX)
     else:
-        return None
+        bornes = bornes_ecarts(cadence, evenements.temps)
+    evenements.marquer_ecarts(*bornes, decimales=4)
+
+    tables = []
+    for type_evenement in (VALLEE, PIC, LIFT_OFF, LIFT_DOWN):
+        selection = evenements.selection(type_evenement)
+        table = selection.vers_pandas().rename(columns={'Valeur': 'Vitesse (m/s)'})
+        table['Vitesse (m/s)'] = table['Vitesse (m/s)'].round(5)
+        table['Différence de Temps (ms)'] = np.round(selection.ecarts_suivants(), 4)
+        table['Erreur'] = erreurs(selection.drapeaux)
+        colonnes = ['Temps (ms)', 'Vitesse (m/s)', 'Type', 'Différence de Temps (ms)', 'Erreur']
+        if type_evenement in (LIFT_OFF, LIFT_DOWN):
+            colonnes.remove('Vitesse (m/s)')
+        tables.append(table[colonnes])
+    return tuple(tables)
+
+def write_results_to_file(vallees, pics, lift_down, lift_off, output_file, formats=('txt',), instrumentation=AUCUNE):
+    # Rapport texte (et autres formats demandés : parquet, jsonl, csv.gz) à partir des mêmes tables
+    with instrumentation.etape('ecriture', len(vallees) + len(pics) + len(lift_down) + len(lift_off)):
+        return ecrire_resultats(vallees, pics, lift_down, lift_off, output_file, formats)
+
+def compare_differences(vallees, pics, lift_down, lift_off=None, tolerance=TOLERANCE_DEFAUT):
+    # Apparier chaque vallée/pic à la pose (et au levé) de pied la plus proche à moins de tolerance,
+    # puis corréler les différences de temps sur les seules paires retenues
+    transitions = {'Transitions': lift_down}
+    if lift_off is not None:
+        transitions = {'Pose de pied': lift_down, 'Levé de pied': lift_off}
+
+    resultats = {}
+    for nom_evenements, evenements in (('Vallées', vallees), ('Pics', pics)):
+        for nom_transitions, table in transitions.items():
+            if evenements.empty or table.empty:
+                continue
+            statistiques = statistiques_paires(table_paires(evenements, table, tolerance))
+            cle = f"{nom_evenements}-{nom_transitions}"
+            resultats[f"Corrélation {cle}"] = statistiques.pop("Corrélation")
+            resultats[f"Régression {cle}"] = statistiques.pop("Régression")
+            resultats[f"Appariement {cle}"] = statistiques
+    return resultats or None
 
 # Utilisation de la fonction
-file_path = r'D:\\Documents\\Mémoire\\Data John Doe\\John Doe gaitway 3D locomotion_R16.txt'
-output_file = r'D:\\Documents\\Mémoire\\Data John Doe\\ResultPython_JD_R16.txt'
+if __name__ == '__main__':
+    file_path = r'D:\\Documents\\Mémoire\\Data John Doe\\John Doe gaitway 3D locomotion_R16.txt'
+    output_file = r'D:\\Documents\\Mémoire\\Data John Doe\\ResultPython_JD_R16.txt'
+
+    # Mesures par étape avec GAITWAY_INSTRUMENTATION=mesures.json (ou '-' pour les afficher)
+    instrumentation = instrumentation_environnement()
+
+    # Seuils calibrés sur la session plutôt que 4.35 / 4.55, écrits à côté des résultats
+    calibrage = False
+    fichier_seuils = os.path.splitext(output_file)[0] + '_seuils.csv'
 
-print(f"Vérification de l'existence du fichier : {file_path}")
-vallees, pics, lift_down, lift_off, = read_and_process_file(file_path)
+    print(f"Vérification de l'existence du fichier : {file_path}")
+    vallees, pics, lift_off, lift_down = read_and_process_file(file_path, instrumentation=instrumentation,
+                                                               calibrage=calibrage, fichier_seuils=fichier_seuils)
 
-if vallees is not None and pics is not None and lift_down is not None:
-    write_results_to_file(vallees, pics, lift_down, output_file)
-    print(f"Les résultats ont été écrits dans le fichier : {output_file}")
+    if vallees is not None and pics is not None and lift_down is not None:
+        write_results_to_file(vallees, pics, lift_down, lift_off, output_file, instrumentation=instrumentation)
+        print(f"Les résultats ont été écrits dans le fichier : {output_file}")
+        terminer_environnement(instrumentation)
 
-    print(json.dumps(compare_differences(vallees, pics, lift_down), indent=4))
+        print(json.dumps(compare_differences(vallees, pics, lift_down, lift_off), indent=4))
@@ -0,0 +1,353 @@
+import argparse
+import hashlib
+import json
+import os
+import time as chrono
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from evenements import DEBUT_MOTIF, FIN_MOTIF, TableEvenements
+from features import iterer_features, extraire_features, seuils_fenetres, seuils_fenetres_calibres, TAILLE_BLOC
+from gaitway import charger_session
+
+# Configuration des caractéristiques et du modèle, sauvegardée avec le modèle entraîné
+CONFIGURATION_DEFAUT = {
+    'window_size': 140,
+    'thresholds': {
+        "before_8500": {"peak": 1.935, "valley": 1.9235},
+        "after_8500": {"peak": 1.9425, "valley": 1.929}
+    },
+    'ligne_bascule': 8500,
+    # Clés de thresholds utilisées avant et après ligne_bascule
+    'cle_avant': 'before_8500',
+    'cle_apres': 'after_8500',
+    'colonnes': [0, 19, 31],
+    'algorithme': 'random_forest',
+    'n_estimators': 100,
+    'random_state': 42,
+}
+
+# Version du format du fichier modèle : un modèle d'un autre format est réentraîné
+FORMAT_MODELE = 2
+
+
+def _configuration(configuration):
+    complete = dict(CONFIGURATION_DEFAUT)
+    if configuration is not None:
+        complete.update(configuration)
+    return complete
+
+
+def empreinte_fichiers(fichiers):
+    # Chemin absolu, date de modification et taille de chaque session d'entraînement
+    empreintes = []
+    for file_path in fichiers:
+        infos = os.stat(file_path)
+        empreintes.append({'Chemin': os.path.abspath(file_path), 'Date': infos.st_mtime_ns, 'Taille': infos.st_size})
+    return empreintes
+
+
+def version_modele(configuration, fichiers):
+    # Empreinte de la configuration et des sessions d'entraînement (chemin, date, taille)
+    contenu = json.dumps([FORMAT_MODELE, configuration, empreinte_fichiers(fichiers)], sort_keys=True)
+    return hashlib.sha1(contenu.encode('utf-8')).hexdigest()[:12]
+
+
+def modele_a_jour(modele, configuration, fichiers):
+    # Le modèle sauvegardé est réutilisable : même format, même configuration et sessions
+    # d'entraînement inchangées (chemin, date, taille). Une session disparue invalide le modèle.
+    if modele.get('format') != FORMAT_MODELE or modele.get('configuration') != _configuration(configuration):
+        return False
+    try:
+        return modele.get('fichiers') == empreinte_fichiers(fichiers)
+    except OSError:
+        return False
+
+
+def charger_colonnes(file_path, configuration):
+    # Colonnes temps, signal et validation d'une session
+    col_temps, col_signal, col_validation = configuration['colonnes']
+    data = charger_session(file_path, colonnes=configuration['colonnes'])
+    return data[col_temps].values, data[col_signal].values, data[col_validation].values
+
+
+def seuils_session(time, signal, configuration):
+    # Seuils de chaque fenêtre : thresholds de la configuration (bascule à ligne_bascule), ou calibrés
+    # sur la session avec thresholds='auto'
+    nb_fenetres = len(signal) - configuration['window_size']
+    if configuration['thresholds'] == 'auto':
+        peak_thresholds, valley_thresholds, _ = seuils_fenetres_calibres(time, signal, nb_fenetres)
+        return peak_thresholds, valley_thresholds
+    thresholds = configuration['thresholds']
+    for cle in (configuration['cle_avant'], configuration['cle_apres']):
+        if cle not in thresholds:
+            raise ValueError(f"Seuils '{cle}' absents de thresholds ({', '.join(thresholds)})")
+    return seuils_fenetres(nb_fenetres, thresholds[configuration['cle_avant']],
+                           thresholds[configuration['cle_apres']], configuration['ligne_bascule'])
+
+
+def iterer_session(file_path, configuration, taille_bloc=TAILLE_BLOC):
+    # Temps de la session et générateur (début, X, y) de ses caractéristiques par blocs
+    time, signal, validation_col = charger_colonnes(file_path, configuration)
+    window_size = configuration['window_size']
+    peak_thresholds, valley_thresholds = seuils_session(time, signal, configuration)
+    return time, iterer_features(signal, validation_col, window_size, peak_thresholds, valley_thresholds,
+                                 taille_bloc)
+
+
+def features_session(file_path, configuration):
+    # Caractéristiques et labels de toutes les fenêtres d'une session
+    time, signal, validation_col = charger_colonnes(file_path, configuration)
+    window_size = configuration['window_size']
+    peak_thresholds, valley_thresholds = seuils_session(time, signal, configuration)
+    return extraire_features(signal, validation_col, window_size, peak_thresholds, valley_thresholds)
+
+
+def entrainer(fichiers, chemin_modele, configuration=None, test_size=0.3):
+    # Entraîner le modèle une fois et le sauvegarder avec sa configuration et sa version
+    configuration = _configuration(configuration)
+    blocs = [features_session(file_path, configuration) for file_path in fichiers]
+    X = np.concatenate([X_session for X_session, _ in blocs])
+    y = np.concatenate([y_session for _, y_session in blocs])
+
+    # Diviser les données en ensembles d'entraînement et de test
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size,
+                                                        random_state=configuration['random_state'])
+
+    # Créer et entraîner un modèle de forêt aléatoire
+    model = RandomForestClassifier(n_estimators=configuration['n_estimators'],
+                                   random_state=configuration['random_state'])
+    model.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    modele = {
+        'modele': model,
+        'format': FORMAT_MODELE,
+        'configuration': configuration,
+        'version': version_modele(configuration, fichiers),
+        'fichiers': empreinte_fichiers(fichiers),
+        'sessions': [os.path.basename(file_path) for file_path in fichiers],
+        'accuracy': accuracy,
+    }
+    joblib.dump(modele, chemin_modele)
+    return modele
+
+
+def _evaluer(model, fichiers, configuration):
+    # Accuracy sur des sessions entières mises de côté, calculée bloc par bloc
+    justes = 0
+    total = 0
+    for file_path in fichiers:
+        _, blocs = iterer_session(file_path, configuration)
+        for _, X, y in blocs:
+            justes += int((model.predict(X) == y).sum())
+            total += len(y)
+    return justes / total if total else None
+
+
+def entrainer_incremental(fichiers, fichiers_evaluation, chemin_modele, configuration=None, epoques=3,
+                          verbose=False, memoire=False):
+    # Entraînement hors mémoire : les sessions sont lues une par une et les blocs de caractéristiques
+    # passent dans partial_fit, la mémoire ne dépend pas du nombre de sessions.
+    # L'historique des époques est retourné avec le modèle (affiché au fil de l'eau avec verbose).
+    # Avec memoire, le pic mémoire de chaque époque est mesuré sous tracemalloc : la durée de l'époque
+    # inclut alors son surcoût (sans memoire, 'Mémoire pic (Mo)' vaut None)
+    configuration = dict(_configuration(configuration), algorithme='sgd_incremental')
+    rng = np.random.default_rng(configuration['random_state'])
+    scaler = StandardScaler()
+    classifieur = SGDClassifier(loss='log_loss', random_state=configuration['random_state'])
+    model = Pipeline([('scaler', scaler), ('classifieur', classifieur)])
+
+    # Une passe pour les moyennes et écarts-types de normalisation
+    for file_path in fichiers:
+        _, blocs = iterer_session(file_path, configuration)
+        for _, X, _ in blocs:
+            scaler.partial_fit(X)
+
+    historique = []
+    for epoque in range(1, epoques + 1):
+        # Un suivi tracemalloc déjà lancé par l'appelant est gardé (pic remis à zéro, pas d'arrêt)
+        arreter_tracemalloc = memoire and not tracemalloc.is_tracing()
+        if arreter_tracemalloc:
+            tracemalloc.start()
+        elif memoire:
+            tracemalloc.reset_peak()
+        try:
+            debut = chrono.perf_counter()
+            nb_fenetres = 0
+            for indice in rng.permutation(len(fichiers)):
+                _, blocs = iterer_session(fichiers[indice], configuration)
+                for _, X, y in blocs:
+                    ordre = rng.permutation(len(y))
+                    classifieur.partial_fit(scaler.transform(X[ordre]), y[ordre], classes=np.array([0, 1]))
+                    nb_fenetres += len(y)
+            accuracy = _evaluer(model, fichiers_evaluation, configuration)
+            duree = chrono.perf_counter() - debut
+            memoire_pic = tracemalloc.get_traced_memory()[1] if memoire else None
+        finally:
+            if arreter_tracemalloc:
+                tracemalloc.stop()
+
+        historique.append({
+            'Époque': epoque,
+            'Fenêtres': nb_fenetres,
+            'Durée (s)': round(duree, 3),
+            'Mémoire pic (Mo)': round(memoire_pic / 1e6, 1) if memoire_pic is not None else None,
+            'Accuracy évaluation': accuracy,
+        })
+        if verbose:
+            print(historique[-1])
+
+    modele = {
+        'modele': model,
+        'format': FORMAT_MODELE,
+        'configuration': configuration,
+        'version': version_modele(configuration, fichiers),
+        'fichiers': empreinte_fichiers(fichiers),
+        'sessions': [os.path.basename(file_path) for file_path in fichiers],
+        'sessions_evaluation': [os.path.basename(file_path) for file_path in fichiers_evaluation],
+        'accuracy': historique[-1]['Accuracy évaluation'] if historique else None,
+        'historique': historique,
+    }
+    joblib.dump(modele, chemin_modele)
+    return modele
+
+
+def charger_modele(chemin_modele):
+    return joblib.load(chemin_modele)
+
+
+def evenements_motifs(time, predictions, window_size):
+    # Regrouper les fenêtres positives en motifs (début de la première fenêtre, fin de la dernière).
+    # Deux suites positives dont les fenêtres se recouvrent (écart < window_size, une prédiction
+    # négative isolée par exemple) forment un seul motif ; Nb fenêtres compte les fenêtres positives
+    positives = np.concatenate(([0], np.asarray(predictions, dtype=np.int8), [0]))
+    fronts = np.diff(positives)
+    premieres = np.flatnonzero(fronts == 1)
+    dernieres = np.flatnonzero(fronts == -1) - 1
+    nouveau = np.ones(len(premieres), dtype=bool)
+    nouveau[1:] = premieres[1:] - dernieres[:-1] >= window_size
+    groupes = np.cumsum(nouveau) - 1
+    nb_fenetres = np.bincount(groupes, weights=dernieres - premieres + 1).astype(np.int64)
+    fin_groupe = np.ones(len(premieres), dtype=bool)
+    fin_groupe[:-1] = nouveau[1:]
+    premieres, dernieres = premieres[nouveau], dernieres[fin_groupe]
+    return pd.DataFrame({
+        'Temps début': time[premieres],
+        'Temps fin': time[dernieres + window_size - 1],
+        'Première fenêtre': premieres,
+        'Dernière fenêtre': dernieres,
+        'Nb fenêtres': nb_fenetres,
+    })
+
+
+def table_motifs(motifs):
+    # Début et fin de chaque motif dans une TableEvenements (valeur : nombre de fenêtres positives)
+    table = TableEvenements(2 * len(motifs))
+    table.ajouter_tableaux(motifs['Temps début'], motifs['Nb fenêtres'], DEBUT_MOTIF)
+    table.ajouter_tableaux(motifs['Temps fin'], motifs['Nb fenêtres'], FIN_MOTIF)
+    return table.trier()
+
+
+def scorer_session(modele, file_path, taille_bloc=TAILLE_BLOC):
+    # Prédire par blocs les fenêtres d'une session et retourner les motifs détectés
+    window_size = modele['configuration']['window_size']
+    time, blocs = iterer_session(file_path, modele['configuration'], taille_bloc)
+
+    predictions = np.zeros(max(len(time) - window_size, 0), dtype=np.int8)
+    for debut, X, _ in blocs:
+        predictions[debut:debut + len(X)] = modele['modele'].predict(X)
+
+    evenements = evenements_motifs(time, predictions, window_size)
+    evenements.insert(0, 'Session', os.path.splitext(os.path.basename(file_path))[0])
+    evenements['Version modèle'] = modele['version']
+    return evenements
+
+
+# Modèle chargé une seule fois par processus du pool
+_modele_processus = None
+
+
+def _initialiser_processus(chemin_modele):
+    global _modele_processus
+    _modele_processus = charger_modele(chemin_modele)
+    # Un seul cœur par processus : le parallélisme se fait entre sessions
+    if hasattr(_modele_processus['modele'], 'n_jobs'):
+        _modele_processus['modele'].n_jobs = 1
+
+
+def _scorer_dans_processus(file_path):
+    return scorer_session(_modele_processus, file_path)
+
+
+def scorer_sessions(chemin_modele, fichiers, processus=None):
+    # Scorer plusieurs sessions en parallèle avec le même modèle
+    with ProcessPoolExecutor(max_workers=processus, initializer=_initialiser_processus,
+                             initargs=(chemin_modele,)) as pool:
+        resultats = list(pool.map(_scorer_dans_processus, fichiers))
+    if not resultats:
+        return pd.DataFrame()
+    return pd.concat(resultats, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modèle de détection des motifs de marche")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    parser_entrainer = commandes.add_parser('entrainer', help="Entraîner et sauvegarder le modèle")
+    parser_entrainer.add_argument('fichiers', nargs='+', help="Exports gaitway d'entraînement")
+    parser_entrainer.add_argument('-m', '--modele', default='modele_marche.joblib', help="Fichier du modèle")
+    parser_entrainer.add_argument('-c', '--configuration', help="Fichier JSON de configuration")
+
+    parser_incremental = commandes.add_parser('entrainer-incremental',
+                                              help="Entraîner hors mémoire sur de nombreuses sessions")
+    parser_incremental.add_argument('fichiers', nargs='+', help="Exports gaitway d'entraînement")
+    parser_incremental.add_argument('-e', '--evaluation', nargs='+', default=[],
+                                    help="Sessions entières mises de côté pour l'évaluation")
+    parser_incremental.add_argument('-n', '--epoques', type=int, default=3, help="Nombre d'époques")
+    parser_incremental.add_argument('-m', '--modele', default='modele_marche.joblib', help="Fichier du modèle")
+    parser_incremental.add_argument('-c', '--configuration', help="Fichier JSON de configuration")
+    parser_incremental.add_argument('-v', '--verbose', action='store_true', help="Afficher chaque époque")
+    parser_incremental.add_argument('--memoire', action='store_true',
+                                    help="Mesurer le pic mémoire de chaque époque (tracemalloc, plus lent)")
+
+    parser_scorer = commandes.add_parser('scorer', help="Détecter les motifs avec un modèle sauvegardé")
+    parser_scorer.add_argument('fichiers', nargs='+', help="Exports gaitway à analyser")
+    parser_scorer.add_argument('-m', '--modele', default='modele_marche.joblib', help="Fichier du modèle")
+    parser_scorer.add_argument('-o', '--sortie', default='motifs_detectes.csv', help="Fichier CSV des motifs")
+    parser_scorer.add_argument('-j', '--processus', type=int, default=None,
+                               help="Nombre de processus (tous les cœurs par défaut)")
+    args = parser.parse_args()
+
+    configuration = None
+    if getattr(args, 'configuration', None) is not None:
+        with open(args.configuration, 'r', encoding='utf-8') as f:
+            configuration = json.load(f)
+
+    if args.commande in ('entrainer', 'entrainer-incremental'):
+        if args.commande == 'entrainer':
+            modele = entrainer(args.fichiers, args.modele, configuration)
+        else:
+            modele = entrainer_incremental(args.fichiers, args.evaluation, args.modele, configuration, args.epoques,
+                                           args.verbose, args.memoire)
+        if modele['accuracy'] is not None:
+            print(f"Accuracy: {modele['accuracy'] * 100:.2f}%")
+        print(f"Modèle {modele['version']} sauvegardé dans : {args.modele}")
+    else:
+        motifs = scorer_sessions(args.modele, args.fichiers, args.processus)
+        motifs.to_csv(args.sortie, index=False)
+        print(f"{len(motifs)} motifs détectés, écrits dans : {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
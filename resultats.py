@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bornes des différences de temps entre deux événements consécutifs
+ECART_MAX = 400
+ECART_MIN = 0.250
+
+COLONNE_ECART = 'Différence de Temps (ms)'
+
+# Formats de sortie disponibles, à partir des mêmes tables en mémoire
+FORMATS = ('txt', 'parquet', 'jsonl', 'csv.gz')
+
+
+def _lignes_erreur(table, nom, ecart_min=ECART_MIN, ecart_max=ECART_MAX):
+    # Lignes 'Erreur: ...' du rapport, seules les lignes hors bornes sont formatées. Les codes de la
+    # colonne Erreur font foi (bornes propres à chaque événement avec la cadence, voir main.tables_evenements)
+    ecarts = table[COLONNE_ECART]
+    if 'Erreur' in table:
+        hors_bornes = table['Erreur'] != ''
+    else:
+        hors_bornes = (ecarts > ecart_max) | (ecarts < ecart_min)
+    return ''.join(f"Erreur: Différence de temps {ecart} ms à l'index {index} pour les {nom}\n"
+                   for index, ecart in ecarts[hors_bornes].items())
+
+
+def ecrire_rapport_texte(vallees, pics, lift_down, lift_off, output_file):
+    # Rapport texte séparé par des tabulations, identique à l'octet près à celui de l'ancien
+    # write_results_to_file, sauf une section levé de pied vide : 'Aucun levé de pied détecté.'
+    # au lieu du message des poses de pied que l'ancien rapport répétait
+    sections = [
+        ("Vallées détectées:\t", vallees, True, "vallées", "Aucune vallée détectée.\n"),
+        ("\nPics détectés:\n", pics, False, "pics", "Aucun pic détecté.\n"),
+        ("\nPose de pied détectées:\t", lift_down, True, "pose de pied", "Aucune pose de pied détectée.\n"),
+        ("\nLevé de pied détectées:\t", lift_off, True, "levé de pied", "Aucun levé de pied détecté.\n"),
+    ]
+    with open(output_file, 'w') as f:
+        for titre, table, avec_nombre, nom, message_vide in sections:
+            f.write(titre)
+            if table.empty:
+                f.write(message_vide)
+                continue
+            if avec_nombre:
+                f.write(f"({len(table)})\n")
+            table.to_csv(f, index=False, sep='\t', lineterminator="\n")
+            # Vérifier les différences de temps
+            f.write(_lignes_erreur(table, nom))
+
+
+def table_evenements(vallees, pics, lift_down, lift_off):
+    # Les quatre tables dans une seule, triée par temps, pour les formats binaires
+    tables = [table for table in (vallees, pics, lift_down, lift_off) if not table.empty]
+    if not tables:
+        return pd.DataFrame(columns=['Temps (ms)', 'Vitesse (m/s)', 'Type', COLONNE_ECART, 'Erreur'])
+    evenements = pd.concat(tables, ignore_index=True)
+    evenements = evenements.reindex(columns=['Temps (ms)', 'Vitesse (m/s)', 'Type', COLONNE_ECART, 'Erreur'])
+    evenements = evenements.sort_values('Temps (ms)', kind='stable', ignore_index=True)
+    evenements['Type'] = evenements['Type'].astype('category')
+    evenements['Erreur'] = evenements['Erreur'].astype('category')
+    return evenements
+
+
+def ecrire_resultats(vallees, pics, lift_down, lift_off, output_file, formats=('txt',)):
+    # Écrire les résultats dans chaque format demandé ; retourne les fichiers écrits
+    base = os.path.splitext(output_file)[0]
+    fichiers = []
+    evenements = None
+    for format_sortie in formats:
+        if format_sortie not in FORMATS:
+            raise ValueError(f"Format inconnu : {format_sortie} (formats possibles : {', '.join(FORMATS)})")
+        if format_sortie == 'txt':
+            ecrire_rapport_texte(vallees, pics, lift_down, lift_off, output_file)
+            fichiers.append(output_file)
+            continue
+
+        if evenements is None:
+            evenements = table_evenements(vallees, pics, lift_down, lift_off)
+        chemin = f"{base}.{format_sortie}"
+        if format_sortie == 'parquet':
+            evenements.to_parquet(chemin, index=False)
+        elif format_sortie == 'jsonl':
+            evenements.to_json(chemin, orient='records', lines=True, force_ascii=False)
+        else:
+            evenements.to_csv(chemin, index=False, compression='gzip')
+        fichiers.append(chemin)
+    return fichiers
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from gaitway import DTYPES_DEFAUT, LIGNES_ENTETE, lire_entete
+
+# Fichier d'en-tête d'une session convertie, version du format
+FICHIER_ENTETE = 'session.json'
+VERSION_FORMAT = 1
+
+# Le temps reste en float64 ; les autres canaux numériques passent en float32, les canaux texte
+# (contact_mode) en codes int8 avec leur liste de catégories
+DTYPE_TEMPS = 'float64'
+DTYPE_CANAL = 'float32'
+DTYPE_CODES = 'int8'
+# Colonnes texte connues des exports gaitway (contact_mode) ; les autres colonnes sont typées sur
+# le premier bloc, puis chaque bloc est vérifié
+COLONNES_TEXTE = tuple(colonne for colonne, dtype in DTYPES_DEFAUT.items() if dtype == 'category')
+
+LIGNES_PAR_BLOC = 500_000
+
+
+def _fichier_canal(colonne):
+    return f"canal_{colonne:02d}.bin"
+
+
+def convertir_session(file_path, dossier=None, colonnes=None, col_temps=0, taille_bloc=LIGNES_PAR_BLOC,
+                      textes=COLONNES_TEXTE):
+    # Convertir un export gaitway .txt en un dossier de canaux binaires (un fichier par colonne)
+    # avec un en-tête JSON : fréquence d'échantillonnage, bornes de temps, en-tête gaitway, types.
+    # Le texte est lu par blocs : la conversion d'un long enregistrement tient en mémoire.
+    # textes : colonnes stockées en codes de catégories quel que soit leur contenu ; une autre
+    # colonne non numérique dans un bloc alors que le premier bloc l'a typée numérique est une erreur
+    if dossier is None:
+        dossier = os.path.splitext(file_path)[0] + '.session'
+    os.makedirs(dossier, exist_ok=True)
+
+    lecteur = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=LIGNES_ENTETE,
+                          usecols=colonnes, chunksize=taille_bloc, dtype={colonne: object for colonne in textes})
+    canaux = {}
+    fichiers = {}
+    n = 0
+    dernier_temps = -np.inf
+    croissant = True
+    try:
+        for bloc in lecteur:
+            if not canaux:
+                # Types des colonnes hors textes décidés sur le premier bloc
+                for colonne in bloc.columns:
+                    if colonne == col_temps:
+                        canaux[colonne] = {'dtype': DTYPE_TEMPS}
+                    elif colonne not in textes and pd.api.types.is_numeric_dtype(bloc[colonne]):
+                        canaux[colonne] = {'dtype': DTYPE_CANAL}
+                    else:
+                        canaux[colonne] = {'dtype': DTYPE_CODES, 'categories': []}
+                    canaux[colonne]['fichier'] = _fichier_canal(colonne)
+                    fichiers[colonne] = open(os.path.join(dossier, canaux[colonne]['fichier']), 'wb')
+
+            for colonne, canal in canaux.items():
+                valeurs = bloc[colonne]
+                if 'categories' in canal:
+                    categories = canal['categories']
+                    chaines = valeurs.dropna().astype(str)
+                    categories.extend(sorted(set(pd.unique(chaines)) - set(categories)))
+                    if len(categories) > np.iinfo(DTYPE_CODES).max:
+                        raise ValueError(f"Trop de catégories dans la colonne {colonne} : {len(categories)}")
+                    codes = np.full(len(valeurs), -1, dtype=DTYPE_CODES)
+                    codes[valeurs.notna().to_numpy()] = pd.Categorical(chaines, categories=categories).codes
+                    valeurs = codes
+                elif not pd.api.types.is_numeric_dtype(valeurs):
+                    raise ValueError(
+                        f"{file_path} : colonne {colonne} non numérique entre les lignes {LIGNES_ENTETE + n + 1} et "
+                        f"{LIGNES_ENTETE + n + len(bloc)}, alors que le premier bloc l'a typée {canal['dtype']} "
+                        f"(la déclarer dans textes)")
+                fichiers[colonne].write(np.ascontiguousarray(valeurs, dtype=canal['dtype']).tobytes())
+
+            temps = bloc[col_temps].to_numpy(dtype=np.float64)
+            if len(temps):
+                croissant = croissant and bool(temps[0] >= dernier_temps) and bool(np.all(np.diff(temps) >= 0))
+                dernier_temps = temps[-1]
+            n += len(bloc)
+    finally:
+        for f in fichiers.values():
+            f.close()
+
+    temps = np.memmap(os.path.join(dossier, canaux[col_temps]['fichier']), dtype=DTYPE_TEMPS, mode='r') if n else None
+    ecarts = np.diff(temps[:min(n, 10_001)]) if n > 1 else np.empty(0)
+    entete = {
+        'version': VERSION_FORMAT,
+        'source': os.path.abspath(file_path),
+        'nb_echantillons': n,
+        'frequence': float(1.0 / np.median(ecarts)) if len(ecarts) and np.median(ecarts) > 0 else None,
+        'temps_debut': float(temps[0]) if n else None,
+        'temps_fin': float(temps[-1]) if n else None,
+        'temps_croissant': croissant,
+        'col_temps': col_temps,
+        'canaux': {str(colonne): canal for colonne, canal in canaux.items()},
+        'entete': lire_entete(file_path),
+    }
+    with open(os.path.join(dossier, FICHIER_ENTETE), 'w', encoding='utf-8') as f:
+        json.dump(entete, f, ensure_ascii=False, indent=2)
+    return dossier
+
+
+class SessionMemoire:
+    # Session convertie ouverte en mémoire projetée : l'ouverture ne lit que l'en-tête JSON,
+    # chaque canal est projeté à la première demande et les tranches sont des vues sans copie.
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        with open(os.path.join(dossier, FICHIER_ENTETE), 'r', encoding='utf-8') as f:
+            self.entete = json.load(f)
+        self.n = self.entete['nb_echantillons']
+        self.frequence = self.entete['frequence']
+        self._canaux = {}
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def colonnes(self):
+        return [int(colonne) for colonne in self.entete['canaux']]
+
+    def canal(self, colonne):
+        # Canal complet en lecture seule (np.memmap)
+        if colonne not in self._canaux:
+            description = self.entete['canaux'][str(colonne)]
+            chemin = os.path.join(self.dossier, description['fichier'])
+            self._canaux[colonne] = (np.memmap(chemin, dtype=description['dtype'], mode='r', shape=(self.n,))
+                                     if self.n else np.empty(0, dtype=description['dtype']))
+        return self._canaux[colonne]
+
+    def categories(self, colonne):
+        # Catégories d'un canal texte (le code -1 correspond à une valeur manquante)
+        return self.entete['canaux'][str(colonne)].get('categories')
+
+    @property
+    def temps(self):
+        return self.canal(self.entete['col_temps'])
+
+    def indices(self, debut, fin):
+        # Indices [i0, i1) des échantillons de temps compris dans [debut, fin], par recherche binaire
+        if not self.entete['temps_croissant']:
+            raise ValueError(f"Le temps de {self.dossier} n'est pas croissant : découpage par temps impossible")
+        temps = self.temps
+        return int(np.searchsorted(temps, debut)), int(np.searchsorted(temps, fin, side='right'))
+
+    def tranche(self, debut, fin, colonnes=None):
+        # Vues (sans copie) des canaux demandés sur l'intervalle de temps [debut, fin]
+        i0, i1 = self.indices(debut, fin)
+        colonnes = self.colonnes if colonnes is None else colonnes
+        return {colonne: self.canal(colonne)[i0:i1] for colonne in colonnes}
+
+    def dataframe(self, debut=None, fin=None, colonnes=None):
+        # Tranche sous forme de DataFrame (copie), les canaux texte redeviennent catégoriels
+        debut = self.entete['temps_debut'] if debut is None else debut
+        fin = self.entete['temps_fin'] if fin is None else fin
+        colonnes_df = {}
+        for colonne, valeurs in self.tranche(debut, fin, colonnes).items():
+            categories = self.categories(colonne)
+            if categories is None:
+                colonnes_df[colonne] = np.asarray(valeurs)
+            else:
+                colonnes_df[colonne] = pd.Categorical.from_codes(np.asarray(valeurs), categories=categories)
+        return pd.DataFrame(colonnes_df)
+
+
+def ouvrir_session(chemin, convertir=True):
+    # Ouvrir une session convertie ; un export .txt est converti la première fois (ou s'il a changé)
+    if os.path.isdir(chemin):
+        return SessionMemoire(chemin)
+    dossier = os.path.splitext(chemin)[0] + '.session'
+    fichier_entete = os.path.join(dossier, FICHIER_ENTETE)
+    a_jour = os.path.exists(fichier_entete) and os.path.getmtime(fichier_entete) >= os.path.getmtime(chemin)
+    if not a_jour:
+        if not convertir:
+            raise FileNotFoundError(f"Session non convertie : {chemin}")
+        convertir_session(chemin, dossier)
+    return SessionMemoire(dossier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertir des exports gaitway en canaux binaires projetés en mémoire")
+    parser.add_argument('fichiers', nargs='+', help="Exports gaitway .txt")
+    parser.add_argument('-c', '--colonnes', nargs='+', type=int, help="Colonnes à convertir (toutes par défaut)")
+    args = parser.parse_args()
+    for file_path in args.fichiers:
+        dossier = convertir_session(file_path, colonnes=args.colonnes)
+        session = SessionMemoire(dossier)
+        print(f"{file_path} -> {dossier} ({len(session)} échantillons, {len(session.colonnes)} canaux)")
+
+
+if __name__ == '__main__':
+    main()
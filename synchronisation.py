@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import correlate, correlation_lags
+
+from alignement import TOLERANCE_DEFAUT, table_paires
+from detection import detecter_transitions
+
+# Période (s) de la grille commune sur laquelle les deux flux sont corrélés
+PERIODE_CORRELATION = 0.01
+
+# Corrélation minimale au pic : en dessous, le décalage trouvé n'est qu'un maximum du bruit
+CORRELATION_MIN = 0.2
+
+# Modes de contact_mode où le pied est posé (signal gaitway comparé à la charge du tapis)
+MODES_APPUI = ('SC', 'DC')
+
+
+def signal_contact(contact_mode, modes_appui=MODES_APPUI):
+    # 1 quand le pied est au sol, 0 en phase aérienne, NaN si contact_mode est manquant
+    modes = pd.Series(contact_mode)
+    valeurs = modes.isin(modes_appui).to_numpy(dtype=np.float64)
+    valeurs[modes.isna().to_numpy()] = np.nan
+    return valeurs
+
+
+def sur_grille(temps, valeurs, grille):
+    # Interpolation linéaire sur la grille (NaN ignorés), centrée et réduite pour la corrélation
+    temps = np.asarray(temps, dtype=np.float64)
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    valides = ~np.isnan(valeurs)
+    if not valides.any():
+        return np.zeros(len(grille))
+    resultat = np.interp(grille, temps[valides], valeurs[valides])
+    ecart = resultat.std()
+    return (resultat - resultat.mean()) / ecart if ecart > 0 else resultat - resultat.mean()
+
+
+def estimer_decalage(temps_a, signal_a, temps_b, signal_b, periode=PERIODE_CORRELATION, decalage_max=None,
+                     correlation_min=CORRELATION_MIN):
+    # Décalage d (s) tel que signal_b(t + d) ressemble le plus à signal_a(t), par intercorrélation FFT
+    # en O(n log n) des deux signaux ramenés sur une même grille. Retourne (décalage, corrélation au pic).
+    # La marche étant presque périodique, des décalages d'un nombre entier de foulées donnent des pics
+    # voisins : decalage_max (s) limite la recherche autour d'une synchronisation approximative.
+    # Un signal constant (contact_mode figé, tapis vide) ou une corrélation au pic sous correlation_min
+    # ne permettent pas de synchroniser : ValueError plutôt qu'un décalage arbitraire.
+    temps_a = np.asarray(temps_a, dtype=np.float64)
+    temps_b = np.asarray(temps_b, dtype=np.float64)
+    grille_a = np.arange(temps_a[0], temps_a[-1], periode)
+    grille_b = np.arange(temps_b[0], temps_b[-1], periode)
+    a = sur_grille(temps_a, signal_a, grille_a)
+    b = sur_grille(temps_b, signal_b, grille_b)
+    for nom, valeurs in (('premier', a), ('second', b)):
+        if not np.any(valeurs):
+            raise ValueError(f"Synchronisation impossible : le {nom} signal est constant")
+
+    correlation = correlate(b, a, mode='full', method='fft')
+    decalages = correlation_lags(len(b), len(a), mode='full')
+    # Normalisation par le recouvrement : un petit recouvrement ne doit pas l'emporter
+    recouvrement = np.minimum(len(b), decalages + len(a)) - np.maximum(0, decalages)
+    valides = recouvrement >= min(len(a), len(b)) // 4
+    if decalage_max is not None:
+        valides &= np.abs(decalages * periode + grille_b[0] - grille_a[0]) <= decalage_max
+    score = np.where(valides, correlation / np.maximum(recouvrement, 1), -np.inf)
+    meilleur = int(np.argmax(score))
+    if not score[meilleur] >= correlation_min:
+        raise ValueError(f"Synchronisation impossible : corrélation au pic {score[meilleur]:.3f} "
+                         f"inférieure à {correlation_min}")
+    return float(decalages[meilleur] * periode + grille_b[0] - grille_a[0]), float(score[meilleur])
+
+
+class SessionSynchronisee:
+    # Session multi-fréquence : échantillons gaitway (~1 kHz) et images du tapis (~60 Hz) sur
+    # l'échelle de temps gaitway (s). Le temps du tapis (epoch en ms) est ramené en secondes
+    # depuis sa première image puis décalé de self.decalage.
+
+    def __init__(self, gaitway, tapis, decalage, correlation=None, col_temps=0):
+        self.gaitway = gaitway.sort_values(col_temps, kind='stable', ignore_index=True)
+        self.tapis = tapis.copy()
+        self.col_temps = col_temps
+        self.origine_tapis = float(tapis['Temps (ms)'].iloc[0]) if len(tapis) else 0.0
+        self.decalage = decalage
+        self.correlation = correlation
+        self.tapis['Temps (s)'] = (self.tapis['Temps (ms)'] - self.origine_tapis) / 1000.0 + decalage
+        self.tapis = self.tapis.sort_values('Temps (s)', kind='stable', ignore_index=True)
+
+    def fusion(self, tolerance=None, direction='backward'):
+        # Chaque échantillon gaitway reçoit la dernière image du tapis (fusion asof vectorisée)
+        return pd.merge_asof(self.gaitway, self.tapis, left_on=self.col_temps, right_on='Temps (s)',
+                             direction=direction, tolerance=tolerance)
+
+    def vers_temps_tapis(self, temps):
+        # Temps gaitway (s) -> temps epoch du tapis (ms)
+        return (np.asarray(temps, dtype=np.float64) - self.decalage) * 1000.0 + self.origine_tapis
+
+    def comparer_poses(self, evenements_tapis, lift_down, tolerance=TOLERANCE_DEFAUT):
+        # Appariement des poses de pied du tapis aux lift_down gaitway (latence = gaitway - tapis)
+        poses = evenements_tapis[evenements_tapis['Type'] == 'Pose de Pied']
+        poses = pd.DataFrame({
+            'Temps (ms)': (poses['Temps (ms)'].to_numpy() - self.origine_tapis) / 1000.0 + self.decalage,
+            'Type': poses['Type'].to_numpy(),
+            'Différence de Temps (ms)': poses['Différence de Temps (ms)'].to_numpy() / 1000.0,
+        })
+        return table_paires(poses, lift_down, tolerance)
+
+
+def synchroniser(gaitway, tapis, col_temps=0, col_contact=31, periode=PERIODE_CORRELATION, decalage_max=None):
+    # Estimer le décalage des horloges en corrélant la charge totale du tapis (table de
+    # tapis.analyser_images) avec le contact au sol gaitway, puis construire la session commune
+    temps_tapis = (tapis['Temps (ms)'].to_numpy() - tapis['Temps (ms)'].iloc[0]) / 1000.0
+    decalage, correlation = estimer_decalage(temps_tapis, tapis['Charge totale'].to_numpy(),
+                                             gaitway[col_temps].to_numpy(), signal_contact(gaitway[col_contact]),
+                                             periode, decalage_max)
+    return SessionSynchronisee(gaitway, tapis, decalage, correlation, col_temps)
+
+
+def lift_down_gaitway(gaitway, col_temps=0, col_contact=31):
+    # Table des lift_down gaitway au format de main.tables_session (pour comparer_poses)
+    indices = detecter_transitions(gaitway[col_contact])['lift_down']
+    temps = gaitway[col_temps].to_numpy()[indices]
+    return pd.DataFrame({'Temps (ms)': temps, 'Type': 'Pose de Pied',
+                         'Différence de Temps (ms)': np.abs(np.diff(temps, append=np.nan))})
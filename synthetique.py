@@ -0,0 +1,116 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from gaitway import LIGNES_ENTETE
+
+# Nombre de colonnes d'un export gaitway et colonnes remplies par le générateur
+NB_COLONNES = 33
+COL_TEMPS, COL_RAW, COL_VITESSE, COL_CONTACT = 0, 9, 19, 31
+
+# Phases (fraction du cycle) où le contact passe en DC, en SC puis en Aerial ; SC au début du cycle
+PHASES_CONTACT = (0.30, 0.45, 0.80)
+
+# Constante du raw speed (raw = constante / vitesse)
+CONSTANTE_RAW = 1164.1
+
+LIGNES_PAR_BLOC = 200_000
+
+
+def _entete(duree, frequence, cadence, vitesse, amplitude, bruit, graine):
+    # 44 lignes clé\tvaleur, lisibles par gaitway.lire_entete
+    lignes = [
+        ("Source", "synthetique.py"),
+        ("Durée (s)", f"{duree}"),
+        ("Fréquence (Hz)", f"{frequence}"),
+        ("Cadence (cycles/min)", f"{cadence}"),
+        ("Vitesse (m/s)", f"{vitesse}"),
+        ("Amplitude (m/s)", f"{amplitude}"),
+        ("Bruit (m/s)", f"{bruit}"),
+        ("Graine", f"{graine}"),
+        ("Phases contact", '\t'.join(f"{phase}" for phase in PHASES_CONTACT)),
+    ]
+    lignes += [(f"Ligne {k}", "") for k in range(len(lignes), LIGNES_ENTETE)]
+    return ''.join(f"{cle}:\t{valeur}\n" for cle, valeur in lignes)
+
+
+def _mode_contact(phase):
+    dc, sc, aerien = PHASES_CONTACT
+    return np.where(phase < dc, 0, np.where(phase < sc, 1, np.where(phase < aerien, 0, 2))).astype(np.int8)
+
+
+def generer_session(file_path, duree=60.0, frequence=1000, cadence=84.0, vitesse=4.45, amplitude=0.2,
+                    bruit=0.02, graine=0, taille_bloc=LIGNES_PAR_BLOC):
+    # Écrire un export au format gaitway (44 lignes d'en-tête, 33 colonnes séparées par des
+    # tabulations) : vitesse sinusoïdale bruitée en colonne 19, raw speed en colonne 9 et
+    # contact_mode SC/DC/Aerial en colonne 31, au rythme de cadence cycles par minute.
+    # Retourne la vérité terrain : temps et type des pics, vallées, poses et levés de pied.
+    rng = np.random.default_rng(graine)
+    n = int(round(duree * frequence))
+    frequence_cycle = cadence / 60.0
+    categories = np.array(['SC', 'DC', 'Aerial'], dtype=object)
+    zeros = {c: np.zeros(min(taille_bloc, n), dtype=np.int8) for c in range(NB_COLONNES)}
+
+    with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(_entete(duree, frequence, cadence, vitesse, amplitude, bruit, graine))
+        for debut in range(0, n, taille_bloc):
+            fin = min(debut + taille_bloc, n)
+            temps = np.arange(debut, fin) / frequence
+            vitesses = vitesse + amplitude * np.sin(2 * np.pi * frequence_cycle * temps) + rng.normal(0, bruit, fin - debut)
+            raw = CONSTANTE_RAW / (vitesses + rng.normal(0, bruit / 2, fin - debut))
+            colonnes = {c: zeros[c][:fin - debut] for c in range(NB_COLONNES)}
+            colonnes[COL_TEMPS] = temps.round(3)
+            colonnes[COL_RAW] = raw.round(4)
+            colonnes[COL_VITESSE] = vitesses.round(5)
+            colonnes[COL_CONTACT] = categories[_mode_contact((frequence_cycle * temps) % 1.0)]
+            pd.DataFrame(colonnes).to_csv(f, sep='\t', header=False, index=False, lineterminator='\n')
+
+    return verite_terrain(n, frequence, cadence)
+
+
+def verite_terrain(n, frequence=1000, cadence=84.0):
+    # Événements attendus : pics et vallées aux extrema de la sinusoïde, poses et levés de pied aux
+    # changements de contact_mode échantillonnés (comme detection.detecter_transitions)
+    frequence_cycle = cadence / 60.0
+    duree = n / frequence
+    cycles = np.arange(int(np.ceil(duree * frequence_cycle)) + 1)
+    pics = (cycles + 0.25) / frequence_cycle
+    vallees = (cycles + 0.75) / frequence_cycle
+
+    modes = _mode_contact((frequence_cycle * (np.arange(n) / frequence)) % 1.0)
+    changements = np.flatnonzero(np.diff(modes, prepend=-1) != 0)
+    poses = changements[modes[changements] == 0]
+    leves = changements[modes[changements] == 2]
+
+    verite = pd.concat([
+        pd.DataFrame({'Temps (ms)': pics[pics < duree], 'Type': 'Pic'}),
+        pd.DataFrame({'Temps (ms)': vallees[vallees < duree], 'Type': 'Vallée'}),
+        pd.DataFrame({'Temps (ms)': poses / frequence, 'Type': 'Pose de Pied'}),
+        pd.DataFrame({'Temps (ms)': leves / frequence, 'Type': 'levé de Pied'}),
+    ], ignore_index=True)
+    return verite.sort_values('Temps (ms)', kind='stable', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générer un export gaitway synthétique avec sa vérité terrain")
+    parser.add_argument('fichier', help="Fichier .txt à écrire")
+    parser.add_argument('-d', '--duree', type=float, default=60.0, help="Durée en secondes")
+    parser.add_argument('--frequence', type=int, default=1000, help="Fréquence d'échantillonnage (Hz)")
+    parser.add_argument('-c', '--cadence', type=float, default=84.0, help="Cycles par minute")
+    parser.add_argument('-v', '--vitesse', type=float, default=4.45, help="Vitesse moyenne (m/s)")
+    parser.add_argument('-a', '--amplitude', type=float, default=0.2, help="Amplitude de la vitesse (m/s)")
+    parser.add_argument('-b', '--bruit', type=float, default=0.02, help="Écart-type du bruit (m/s)")
+    parser.add_argument('-g', '--graine', type=int, default=0, help="Graine du générateur aléatoire")
+    args = parser.parse_args()
+
+    verite = generer_session(args.fichier, args.duree, args.frequence, args.cadence, args.vitesse,
+                             args.amplitude, args.bruit, args.graine)
+    chemin_verite = os.path.splitext(args.fichier)[0] + '_verite.csv'
+    verite.to_csv(chemin_verite, index=False)
+    print(f"{args.fichier} écrit, vérité terrain ({len(verite)} événements) dans : {chemin_verite}")
+
+
+if __name__ == '__main__':
+    main()
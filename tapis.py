@@ -0,0 +1,296 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from detection import detecter_transitions
+
+# Tapis de pression : 8 x 8 cellules, une ligne du log par image (temps epoch en ms puis 64 cellules)
+COTE = 8
+NB_CELLULES = COTE * COTE
+
+# Orientation supposée : ligne 0 à l'avant du tapis, colonne 0 à gauche. Chaque zone est une moitié
+# (avant-pied / talon) d'un côté (gauche / droite)
+ZONES = {
+    'Avant-pied gauche': (slice(0, COTE // 2), slice(0, COTE // 2)),
+    'Avant-pied droit': (slice(0, COTE // 2), slice(COTE // 2, COTE)),
+    'Talon gauche': (slice(COTE // 2, COTE), slice(0, COTE // 2)),
+    'Talon droit': (slice(COTE // 2, COTE), slice(COTE // 2, COTE)),
+}
+
+# États de contact déduits de la charge, et transitions détectées comme pour contact_mode
+APPUI = 'Appui'
+SANS_APPUI = 'Sans appui'
+TRANSITIONS_TAPIS = {
+    'lift_down': (None, APPUI),
+    'lift_off': (None, SANS_APPUI),
+}
+
+# Quantile (%) des images servant de ligne de base de chaque cellule (tapis non chargé)
+QUANTILE_BASE = 5
+
+# Seuils de contact en fraction de l'amplitude de la charge (hystérésis : haut pour entrer en appui,
+# bas pour en sortir)
+FRACTION_HAUTE = 0.25
+FRACTION_BASSE = 0.15
+
+
+# Lignes lues à la fois par charger_log_compresse
+LIGNES_PAR_BLOC = 100_000
+
+
+def _types_log():
+    types = {0: 'float64'}
+    types.update({c: 'int16' for c in range(1, NB_CELLULES + 1)})
+    return types
+
+
+def charger_log(chemins):
+    # Temps (ms, float64) et images int16 (n, 8, 8) d'un ou plusieurs session_log.csv, dans l'ordre
+    if isinstance(chemins, (str, os.PathLike)):
+        chemins = [chemins]
+    blocs = [pd.read_csv(chemin, delimiter=';', header=None, dtype=_types_log()) for chemin in chemins]
+    data = pd.concat(blocs, ignore_index=True) if len(blocs) > 1 else blocs[0]
+    temps = data[0].to_numpy()
+    images = data.iloc[:, 1:NB_CELLULES + 1].to_numpy(dtype=np.int16).reshape(-1, COTE, COTE)
+    return temps, images
+
+
+def ligne_base(images, quantile=QUANTILE_BASE):
+    # Niveau de repos de chaque cellule (8, 8), du même type que les images
+    if len(images) == 0:
+        return np.zeros((COTE, COTE), dtype=images.dtype)
+    return np.percentile(images, quantile, axis=0).astype(images.dtype)
+
+
+def retirer_ligne_base(images, base=None):
+    # Pression au-dessus du repos, négatifs ramenés à 0 (int16, ou float32 pour des images rééchantillonnées)
+    if base is None:
+        base = ligne_base(images)
+    if not np.issubdtype(images.dtype, np.integer):
+        return np.maximum(images - base, 0).astype(np.float32)
+    return np.clip(images.astype(np.int32) - base, 0, np.iinfo(np.int16).max).astype(np.int16)
+
+
+def compresser_images(temps, images):
+    # Codage par plages des images identiques consécutives (le capteur n'a pas été relu) :
+    # temps de la première et de la dernière ligne de chaque plage, image distincte, longueur
+    n = len(images)
+    if n == 0:
+        return temps[:0], temps[:0], images[:0], np.empty(0, dtype=np.int32)
+    change = np.any(images[1:] != images[:-1], axis=(1, 2))
+    debuts = np.flatnonzero(np.concatenate(([True], change)))
+    fins = np.append(debuts[1:], n) - 1
+    return temps[debuts], temps[fins], images[debuts], (fins - debuts + 1).astype(np.int32)
+
+
+def _ajouter_plages(morceaux, morceau):
+    # Ajouter les plages d'un bloc à la suite des blocs précédents : seule la première plage du bloc
+    # est comparée à la dernière plage gardée, et la prolonge si l'image est la même (O(1) par bloc)
+    temps_debuts, temps_fins, images, longueurs = morceau
+    if len(images) and morceaux:
+        _, fins_precedentes, images_precedentes, longueurs_precedentes = morceaux[-1]
+        if np.array_equal(images_precedentes[-1], images[0]):
+            fins_precedentes[-1] = temps_fins[0]
+            longueurs_precedentes[-1] += longueurs[0]
+            morceau = (temps_debuts[1:], temps_fins[1:], images[1:], longueurs[1:])
+    if len(morceau[2]):
+        morceaux.append(morceau)
+
+
+def charger_log_compresse(chemins, taille_bloc=LIGNES_PAR_BLOC):
+    # Comme compresser_images(*charger_log(chemins)), mais lu par blocs : la mémoire suit le nombre
+    # d'images distinctes et non le nombre de lignes du log. Les plages sont concaténées une seule fois.
+    if isinstance(chemins, (str, os.PathLike)):
+        chemins = [chemins]
+    morceaux = []
+    for chemin in chemins:
+        for bloc in pd.read_csv(chemin, delimiter=';', header=None, dtype=_types_log(), chunksize=taille_bloc):
+            images = bloc.iloc[:, 1:NB_CELLULES + 1].to_numpy(dtype=np.int16).reshape(-1, COTE, COTE)
+            _ajouter_plages(morceaux, compresser_images(bloc[0].to_numpy(), images))
+    if not morceaux:
+        return compresser_images(np.empty(0), np.empty((0, COTE, COTE), dtype=np.int16))
+    return tuple(np.concatenate(colonne) for colonne in zip(*morceaux))
+
+
+def decompresser_images(images, longueurs):
+    # Images ligne par ligne à partir des plages
+    return np.repeat(images, longueurs, axis=0)
+
+
+def blocages(temps_debuts, temps_fins, longueurs):
+    # Plages d'images répétées signalées comme blocages du capteur
+    repetees = np.flatnonzero(longueurs > 1)
+    return pd.DataFrame({
+        'Début (ms)': temps_debuts[repetees],
+        'Fin (ms)': temps_fins[repetees],
+        'Durée (ms)': temps_fins[repetees] - temps_debuts[repetees],
+        'Images répétées': longueurs[repetees] - 1,
+        'Plage': repetees,
+    })
+
+
+def ecrire_compresse(chemin, temps_debuts, temps_fins, images, longueurs):
+    # Sauvegarde .npz des seules images distinctes
+    np.savez_compressed(chemin, temps_debuts=temps_debuts, temps_fins=temps_fins, images=images, longueurs=longueurs)
+
+
+def lire_compresse(chemin):
+    with np.load(chemin) as contenu:
+        return contenu['temps_debuts'], contenu['temps_fins'], contenu['images'], contenu['longueurs']
+
+
+def periode_moyenne(temps_debuts, temps_fins, longueurs):
+    # Période moyenne des lignes du log (ms), gigue comprise
+    nombre = int(longueurs.sum())
+    if nombre < 2:
+        return None
+    return float((temps_fins[-1] - temps_debuts[0]) / (nombre - 1))
+
+
+def reechantillonner(temps_images, images, periode, methode='lineaire', debut=None, fin=None):
+    # Images sur une grille de temps régulière debut + k * periode par interpolation vectorisée entre
+    # images distinctes ('lineaire') ou en gardant l'image précédente ('precedente'). Les temps des
+    # images distinctes doivent être croissants ; retourne (grille, images float32 (m, 8, 8)).
+    temps_images = np.asarray(temps_images, dtype=np.float64)
+    if methode not in ('lineaire', 'precedente'):
+        raise ValueError(f"Méthode de rééchantillonnage inconnue : {methode}")
+    if len(temps_images) == 0:
+        return np.empty(0), np.empty((0, COTE, COTE), dtype=np.float32)
+    debut = temps_images[0] if debut is None else debut
+    fin = temps_images[-1] if fin is None else fin
+    grille = debut + periode * np.arange(int(np.floor((fin - debut) / periode)) + 1)
+
+    valeurs = images.reshape(len(images), -1).astype(np.float32)
+    gauche = np.clip(np.searchsorted(temps_images, grille, side='right') - 1, 0, len(temps_images) - 1)
+    if methode == 'precedente' or len(temps_images) == 1:
+        return grille, valeurs[gauche].reshape(-1, COTE, COTE)
+    droite = np.minimum(gauche + 1, len(temps_images) - 1)
+    ecart = temps_images[droite] - temps_images[gauche]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        poids = np.where(ecart > 0, (grille - temps_images[gauche]) / ecart, 0.0)
+    poids = np.clip(poids, 0.0, 1.0).astype(np.float32)[:, None]
+    resultat = valeurs[gauche] * (1 - poids) + valeurs[droite] * poids
+    return grille, resultat.reshape(-1, COTE, COTE)
+
+
+def charge_totale(images):
+    return images.sum(axis=(1, 2), dtype=np.int64)
+
+
+def centre_pression(images, charge=None):
+    # Centre de pression (ligne, colonne) de chaque image en unités de cellule, NaN sans charge
+    if charge is None:
+        charge = charge_totale(images)
+    positions = np.arange(COTE, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ligne = images.sum(axis=2, dtype=np.int64) @ positions / charge
+        colonne = images.sum(axis=1, dtype=np.int64) @ positions / charge
+    ligne[charge <= 0] = np.nan
+    colonne[charge <= 0] = np.nan
+    return ligne, colonne
+
+
+def charge_zones(images):
+    # Charge de chaque zone de ZONES : {nom: tableau (n,)}
+    return {nom: images[:, lignes, colonnes].sum(axis=(1, 2), dtype=np.int64)
+            for nom, (lignes, colonnes) in ZONES.items()}
+
+
+def seuils_contact(charge, fraction_haute=FRACTION_HAUTE, fraction_basse=FRACTION_BASSE):
+    # Seuils haut et bas entre le 5e et le 95e centile de la charge
+    if len(charge) == 0:
+        return 0.0, 0.0
+    bas, haut = np.percentile(charge, [5, 95])
+    return bas + fraction_haute * (haut - bas), bas + fraction_basse * (haut - bas)
+
+
+def etats_contact(charge, seuil_haut, seuil_bas=None):
+    # 'Appui' au-dessus de seuil_haut, 'Sans appui' sous seuil_bas ; entre les deux l'état précédent
+    # est conservé (hystérésis), l'état initial reste inconnu (NaN) jusqu'au premier franchissement
+    if seuil_bas is None:
+        seuil_bas = seuil_haut
+    charge = np.asarray(charge)
+    codes = np.full(len(charge), np.nan)
+    codes[charge > seuil_haut] = 1
+    codes[charge < seuil_bas] = 0
+    codes = pd.Series(codes).ffill().to_numpy()
+    connus = ~np.isnan(codes)
+    etats = np.full(len(charge), -1, dtype=np.int8)
+    etats[connus] = codes[connus]
+    return pd.Categorical.from_codes(etats, categories=[SANS_APPUI, APPUI])
+
+
+def detecter_contacts(charge, seuil_haut=None, seuil_bas=None):
+    # Indices des poses (lift_down) et levés (lift_off) de pied sur une courbe de charge
+    if seuil_haut is None:
+        seuil_haut, seuil_bas = seuils_contact(charge)
+    return detecter_transitions(etats_contact(charge, seuil_haut, seuil_bas), TRANSITIONS_TAPIS)
+
+
+def analyser_images(temps, images, base=None, seuil_haut=None, seuil_bas=None):
+    # Table par image (charge totale, centre de pression, charge par zone, état de contact)
+    # et table des poses / levés de pied détectés sur la charge totale
+    pression = retirer_ligne_base(images, base)
+    charge = charge_totale(pression)
+    ligne, colonne = centre_pression(pression, charge)
+    if seuil_haut is None:
+        seuil_haut, seuil_bas = seuils_contact(charge)
+
+    images_table = pd.DataFrame({
+        'Temps (ms)': temps,
+        'Charge totale': charge,
+        'CoP ligne': ligne,
+        'CoP colonne': colonne,
+    })
+    for nom, charge_zone in charge_zones(pression).items():
+        images_table[f"Charge {nom}"] = charge_zone
+    images_table['Contact'] = etats_contact(charge, seuil_haut, seuil_bas)
+
+    transitions = detecter_transitions(images_table['Contact'], TRANSITIONS_TAPIS)
+    evenements = pd.concat([
+        pd.DataFrame({'Temps (ms)': temps[transitions['lift_down']], 'Type': 'Pose de Pied',
+                      'Image': transitions['lift_down']}),
+        pd.DataFrame({'Temps (ms)': temps[transitions['lift_off']], 'Type': 'levé de Pied',
+                      'Image': transitions['lift_off']}),
+    ], ignore_index=True).sort_values('Image', kind='stable', ignore_index=True)
+    evenements['Différence de Temps (ms)'] = evenements.groupby('Type')['Temps (ms)'].diff(-1).abs()
+    return images_table, evenements
+
+
+def analyser_log(chemins, **kwargs):
+    temps, images = charger_log(chemins)
+    return analyser_images(temps, images, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge, centre de pression et contacts des logs du tapis 8 x 8")
+    parser.add_argument('fichiers', nargs='+', help="Fichiers session_log.csv (concaténés dans l'ordre)")
+    parser.add_argument('-o', '--sortie', default='tapis', help="Préfixe des fichiers CSV écrits")
+    parser.add_argument('--seuil-haut', type=float, help="Charge d'entrée en appui (automatique par défaut)")
+    parser.add_argument('--seuil-bas', type=float, help="Charge de sortie d'appui (automatique par défaut)")
+    parser.add_argument('-r', '--reechantillonner', nargs='?', type=float, const=0.0, metavar='PERIODE',
+                        help="Images distinctes rééchantillonnées à PERIODE ms (période moyenne du log sans valeur)")
+    args = parser.parse_args()
+
+    if args.reechantillonner is None:
+        images, evenements = analyser_log(args.fichiers, seuil_haut=args.seuil_haut, seuil_bas=args.seuil_bas)
+    else:
+        temps_debuts, temps_fins, distinctes, longueurs = charger_log_compresse(args.fichiers)
+        table_blocages = blocages(temps_debuts, temps_fins, longueurs)
+        table_blocages.to_csv(f"{args.sortie}_blocages.csv", index=False)
+        print(f"{int(longueurs.sum())} lignes, {len(distinctes)} images distinctes, "
+              f"{len(table_blocages)} blocages du capteur")
+        periode = args.reechantillonner or periode_moyenne(temps_debuts, temps_fins, longueurs)
+        grille, regulieres = reechantillonner(temps_debuts, distinctes, periode)
+        images, evenements = analyser_images(grille, regulieres, seuil_haut=args.seuil_haut,
+                                             seuil_bas=args.seuil_bas)
+    images.to_csv(f"{args.sortie}_images.csv", index=False)
+    evenements.to_csv(f"{args.sortie}_contacts.csv", index=False)
+    print(f"{len(images)} images, {int((evenements['Type'] == 'Pose de Pied').sum())} poses et "
+          f"{int((evenements['Type'] == 'levé de Pied').sum())} levés de pied écrits avec le préfixe {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
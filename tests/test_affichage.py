@@ -0,0 +1,91 @@
+import os
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from affichage import decimer_min_max, generer_tuiles, tracer_session, un_par_pixel
+
+
+def _paquets(y, nb_pixels):
+    # Paquets d'échantillons tels que les découpe decimer_min_max
+    taille = -(-len(y) // nb_pixels)
+    return [y[debut:debut + taille] for debut in range(0, len(y), taille)]
+
+
+def test_min_et_max_reels_de_chaque_pixel():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_003) / 1000
+    y = 4.45 + 0.2 * np.sin(2 * np.pi * 1.4 * x) + rng.normal(0, 0.05, len(x))
+    nb_pixels = 800
+    x_decime, y_decime = decimer_min_max(x, y, nb_pixels)
+    paquets = _paquets(y, nb_pixels)
+    assert len(y_decime) == 2 * len(paquets)
+    assert (np.diff(x_decime) >= 0).all()
+    paires = y_decime.reshape(-1, 2)
+    np.testing.assert_array_equal(paires.min(axis=1), [paquet.min() for paquet in paquets])
+    np.testing.assert_array_equal(paires.max(axis=1), [paquet.max() for paquet in paquets])
+    # Les points gardés sont de vrais échantillons, à leur place
+    np.testing.assert_array_equal(y_decime, y[np.round(x_decime * 1000).astype(int)])
+
+
+def test_decimation_avec_nan():
+    y = np.sin(np.arange(10_000) / 50.0)
+    y[10:30] = np.nan
+    y[1_000:1_100] = np.nan
+    nb_pixels = 100
+    _, y_decime = decimer_min_max(np.arange(len(y)), y, nb_pixels)
+    paires = y_decime.reshape(-1, 2)
+    for paquet, paire in zip(_paquets(y, nb_pixels), paires):
+        if np.isnan(paquet).all():
+            assert np.isnan(paire).all()
+        else:
+            assert sorted(paire) == [np.nanmin(paquet), np.nanmax(paquet)]
+    # Le paquet 10 (échantillons 1000 à 1099) est entièrement NaN
+    assert np.isnan(paires[10]).all()
+
+
+def test_signal_plus_court_que_les_pixels():
+    x, y = np.arange(50), np.linspace(0.0, 1.0, 50)
+    x_decime, y_decime = decimer_min_max(x, y, 800)
+    np.testing.assert_array_equal(x_decime, x)
+    np.testing.assert_array_equal(y_decime, y)
+    assert len(decimer_min_max(np.empty(0), np.empty(0), 800)[1]) == 0
+
+
+def test_un_evenement_par_pixel():
+    temps = np.linspace(0.0, 100.0, 5_000)
+    indices = un_par_pixel(temps, 0.0, 100.0, 200)
+    colonnes = np.floor(temps[indices] / 100.0 * 200)
+    assert len(np.unique(colonnes)) == len(indices) <= 201
+    # Moins d'événements que de pixels : tous gardés
+    np.testing.assert_array_equal(un_par_pixel(temps[:150], 0.0, 100.0, 200), np.arange(150))
+
+
+def test_tracer_session_decimee():
+    x = np.arange(200_000) / 1000
+    ax = tracer_session(x, np.sin(x), evenements={'Pic': x[::50]}, points={'Vallée': (x[::70], np.sin(x[::70]))})
+    assert len(ax.lines[0].get_xdata()) <= 2 * ax.get_window_extent().width + 2
+    assert len(ax.collections[0].get_segments()) <= ax.get_window_extent().width + 1
+
+
+@pytest.mark.parametrize('duree, duree_tuile, attendues', [(60.0, 10.0, [1, 2, 4, 8]), (8.0, 10.0, [1]),
+                                                          (40.0, 10.0, [1, 2, 4])])
+def test_nombre_de_tuiles(tmp_path, duree, duree_tuile, attendues):
+    # Chaque niveau double le nombre de tuiles jusqu'à des tuiles d'au plus duree_tuile secondes
+    temps = np.arange(0.0, duree + 1e-9, 0.01)
+    fichiers = generer_tuiles(temps, np.sin(temps), str(tmp_path), evenements={'Pic': temps[::100]},
+                              duree_tuile=duree_tuile, taille=(4, 1), dpi=40)
+    assert len(fichiers) == sum(attendues)
+    for niveau, nombre in enumerate(attendues):
+        dossier = tmp_path / f"niveau_{niveau}"
+        assert sorted(os.listdir(dossier)) == [f"tuile_{numero:05d}.png" for numero in range(nombre)]
+    assert all(os.path.getsize(chemin) > 0 for chemin in fichiers)
+    assert duree / attendues[-1] <= duree_tuile
+
+
+def test_pas_de_tuile_sans_signal(tmp_path):
+    assert generer_tuiles(np.empty(0), np.empty(0), str(tmp_path)) == []
@@ -0,0 +1,81 @@
+import time as chrono
+
+import numpy as np
+
+from alignement import apparier
+
+
+def test_perdant_reporte_sur_la_cible_suivante():
+    # Les deux premiers événements visent 1.05 : le plus proche la garde, l'autre prend 1.3
+    indices_evenements, indices_cibles = apparier([1.0, 1.12, 2.0], [1.3, 1.05, 2.01], tolerance=0.25)
+    np.testing.assert_array_equal(indices_evenements, [0, 1, 2])
+    np.testing.assert_array_equal(indices_cibles, [1, 0, 2])
+
+
+def test_perdant_sans_autre_cible_a_portee():
+    # La cible suivante est au-delà de la tolérance : l'événement reste sans paire
+    indices_evenements, indices_cibles = apparier([1.0, 1.12], [1.05, 1.5], tolerance=0.25)
+    np.testing.assert_array_equal(indices_evenements, [0])
+    np.testing.assert_array_equal(indices_cibles, [0])
+
+
+def test_appariement_maximal():
+    # Paires à portée, une cible par événement, et plus aucun couple libre à portée
+    rng = np.random.default_rng(0)
+    evenements = np.sort(rng.uniform(0, 100, 300))
+    cibles = rng.uniform(0, 100, 250)
+    tolerance = 0.3
+    indices_evenements, indices_cibles = apparier(evenements, cibles, tolerance)
+    assert len(set(indices_evenements)) == len(indices_evenements)
+    assert len(set(indices_cibles)) == len(indices_cibles)
+    assert np.all(np.abs(evenements[indices_evenements] - cibles[indices_cibles]) <= tolerance)
+    evenements_libres = np.delete(evenements, indices_evenements)
+    cibles_libres = np.delete(cibles, indices_cibles)
+    assert not np.any(np.abs(evenements_libres[:, None] - cibles_libres[None, :]) <= tolerance)
+
+
+def glouton_reference(evenements, cibles, tolerance):
+    # Toutes les paires à portée par écart croissant, chacune prise si ses deux membres sont libres
+    ecarts = np.abs(np.asarray(evenements)[:, None] - np.asarray(cibles)[None, :])
+    candidats = np.argwhere(ecarts <= tolerance)
+    candidats = candidats[np.argsort(ecarts[candidats[:, 0], candidats[:, 1]], kind='stable')]
+    pris_evenements, pris_cibles, paires = set(), set(), []
+    for evenement, cible in candidats:
+        if evenement not in pris_evenements and cible not in pris_cibles:
+            pris_evenements.add(evenement)
+            pris_cibles.add(cible)
+            paires.append((evenement, cible))
+    paires.sort()
+    return (np.array([e for e, _ in paires], dtype=np.intp), np.array([c for _, c in paires], dtype=np.intp))
+
+
+def test_glouton_par_ecart_croissant():
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        evenements = rng.uniform(0, 10, rng.integers(1, 80))
+        cibles = rng.uniform(0, 10, rng.integers(1, 80))
+        attendu = glouton_reference(evenements, cibles, 0.4)
+        obtenu = apparier(evenements, cibles, 0.4)
+        np.testing.assert_array_equal(obtenu[0], attendu[0])
+        np.testing.assert_array_equal(obtenu[1], attendu[1])
+
+
+def test_evenements_regroupes():
+    # Des milliers d'événements autour de quelques cibles : chaque cible est disputée par tout un
+    # paquet, sans tours d'appariement successifs (O(n log n))
+    rng = np.random.default_rng(2)
+    centres = np.arange(0.0, 400.0, 1.0)
+    evenements = np.repeat(centres, 40) + rng.uniform(-0.2, 0.2, 40 * len(centres))
+    cibles = np.concatenate((centres, centres + 0.1))
+    debut = chrono.perf_counter()
+    indices_evenements, indices_cibles = apparier(evenements, cibles, tolerance=0.25)
+    duree = chrono.perf_counter() - debut
+    assert len(indices_evenements) == len(cibles)
+    assert len(set(indices_cibles)) == len(cibles)
+    assert np.all(np.abs(evenements[indices_evenements] - cibles[indices_cibles]) <= 0.25)
+    assert duree < 2.0
+
+
+def test_vide():
+    indices_evenements, indices_cibles = apparier([], [1.0])
+    assert len(indices_evenements) == 0 and len(indices_cibles) == 0
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cadence import estimer_cadence
+
+
+def _session(graine=0):
+    # 90 s de marche à 1.4 Hz, 60 s debout (dérive lente et bruit lissés), 90 s de course à 2.6 Hz
+    rng = np.random.default_rng(graine)
+    frequence = 1000
+    temps = np.arange(240 * frequence) / frequence
+    vitesse = np.empty(len(temps))
+    marche, debout = 90 * frequence, 150 * frequence
+    vitesse[:marche] = 1.2 + 0.2 * np.sin(2 * np.pi * 1.4 * temps[:marche])
+    vitesse[marche:debout] = 0.02 + np.cumsum(rng.normal(0, 0.001, debout - marche))
+    vitesse[debout:] = 3.0 + 0.3 * np.sin(2 * np.pi * 2.6 * temps[debout:])
+    vitesse += rng.normal(0, 0.01, len(temps))
+    return temps, pd.Series(vitesse).rolling(window=21, center=True).mean().to_numpy()
+
+
+@pytest.mark.parametrize('graine', range(5))
+def test_debout_sans_rythme(graine):
+    temps, vitesse = _session(graine)
+    cadence = estimer_cadence(temps, vitesse)
+    debout = (cadence['Début (s)'] >= 90) & (cadence['Fin (s)'] <= 150)
+    assert debout.sum() == 2
+    assert not cadence.loc[debout, 'Rythme'].any()
+    assert cadence.loc[~debout, 'Rythme'].all()
+    # Les segments debout reprennent la fréquence du segment rythmé le plus proche
+    np.testing.assert_allclose(cadence['Fréquence (Hz)'], [1.4] * 3 + [1.4, 2.6] + [2.6] * 3, atol=0.02)
+
+
+@pytest.mark.parametrize('n', [0, 1])
+def test_signal_vide(n):
+    with pytest.raises(ValueError, match='trop court'):
+        estimer_cadence(np.arange(n) / 1000, np.zeros(n))
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calibrage import calibrer_seuils, seuils_echantillons
+from detection import detecter_motifs, extrema_locaux, selectionner_pics_vallees
+
+
+def _marche_debout_marche(graine=0):
+    # 60 s de marche, 40 s debout (dérive lente et bruit autour de 0.05 m/s), 60 s de marche
+    rng = np.random.default_rng(graine)
+    temps = np.arange(160_000) / 1000
+    vitesse = 4.45 + 0.2 * np.sin(2 * np.pi * 1.4 * temps) + rng.normal(0, 0.02, len(temps))
+    debout = (temps >= 60) & (temps < 100)
+    vitesse[debout] = (0.05 + np.cumsum(rng.normal(0, 0.0005, debout.sum()))
+                       + rng.normal(0, 0.01, debout.sum()))
+    return temps, pd.Series(vitesse).rolling(window=21, center=True).mean().to_numpy(), debout
+
+
+@pytest.mark.parametrize('graine', range(3))
+def test_aucun_evenement_debout(graine):
+    temps, moyenne, debout = _marche_debout_marche(graine)
+    seuils = calibrer_seuils(temps, moyenne)
+    seuil_v, seuil_p = seuils_echantillons(seuils, len(temps))
+
+    valeurs, est_max, est_min = extrema_locaux(moyenne, 10)
+    pics, vallees = selectionner_pics_vallees(valeurs, est_max, est_min, seuil_v, seuil_p)
+    assert not debout[pics].any() and not debout[vallees].any()
+    # La marche garde ses pics (1.4 Hz sur 120 s, aux transitions près)
+    assert len(pics) > 150 and len(vallees) > 150
+
+    _, indices_max, indices_min = detecter_motifs(moyenne, seuil_p[:-150], seuil_v[:-150], window_size=150)
+    assert not debout[indices_max].any() and not debout[indices_min].any()
+    assert not seuils.loc[(seuils['Début (s)'] >= 60) & (seuils['Fin (s)'] <= 100), 'Détection'].any()
+
+
+def test_seuils_inchanges_en_marche():
+    temps = np.arange(60_000) / 1000
+    moyenne = 4.45 + 0.2 * np.sin(2 * np.pi * 1.4 * temps)
+    seuils = calibrer_seuils(temps, moyenne)
+    assert seuils['Détection'].all()
+    np.testing.assert_allclose(seuils['seuil_v'], 4.35, atol=0.015)
+    np.testing.assert_allclose(seuils['seuil_p'], 4.55, atol=0.015)
+
+
+@pytest.mark.parametrize('n', [0, 1])
+def test_signal_vide(n):
+    with pytest.raises(ValueError, match='trop court'):
+        calibrer_seuils(np.arange(n) / 1000, np.zeros(n))
@@ -0,0 +1,44 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+from classeur import COLONNES_RESUME, ClasseurFlux
+
+
+def _table(n, decalage=0.0):
+    return pd.DataFrame({'Temps (ms)': [decalage + k for k in range(n)], 'Type': ['Pic'] * n,
+                         'Différence de Temps (ms)': [1.0] * (n - 1) + [float('nan')] if n else [],
+                         'Erreur': [''] * n})
+
+
+def test_une_feuille_par_table_pour_toutes_les_sessions(tmp_path):
+    chemin = str(tmp_path / 'cohorte.xlsx')
+    sessions = [f"John Doe gaitway 3D locomotion session {k:03d}" for k in range(40)]
+    with ClasseurFlux(chemin) as classeur:
+        for k, session in enumerate(sessions):
+            classeur.ajouter_session(session, _table(2), _table(3, k), _table(0), _table(1))
+        assert len(classeur.classeur.worksheets) == 5
+
+    classeur = load_workbook(chemin, read_only=True)
+    assert classeur.sheetnames == ['Résumé', 'Vallées', 'Pics', 'Pose de pied', 'Levé de pied']
+    pics = pd.DataFrame(list(classeur['Pics'].values)[1:], columns=next(classeur['Pics'].values))
+    assert list(pics.columns) == ['Session', 'Temps (ms)', 'Type', 'Différence de Temps (ms)', 'Erreur']
+    assert list(pics.groupby('Session', sort=False).size()) == [3] * len(sessions)
+    # Noms complets des sessions, sans troncature ni suffixe
+    assert list(pics['Session'].unique()) == sessions
+
+    resume = list(classeur['Résumé'].values)
+    assert list(resume[0]) == COLONNES_RESUME
+    assert len(resume) == 1 + 4 * len(sessions)
+    assert resume[1][:4] == (sessions[0], 'Vallées', 'Vallées', 2)
+
+
+def test_feuille_pleine_continue_sur_une_nouvelle_feuille(tmp_path):
+    chemin = str(tmp_path / 'cohorte.xlsx')
+    with ClasseurFlux(chemin, lignes_max=5) as classeur:
+        classeur.ajouter_session('A', _table(0), _table(3), _table(0), _table(0))
+        classeur.ajouter_session('B', _table(0), _table(3), _table(0), _table(0))
+
+    classeur = load_workbook(chemin, read_only=True)
+    assert [len(list(classeur[nom].values)) for nom in ('Pics', 'Pics (2)')] == [5, 3]
+    resume = [ligne for ligne in classeur['Résumé'].values if ligne[1] == 'Pics']
+    assert [(ligne[0], ligne[2]) for ligne in resume] == [('A', 'Pics'), ('B', 'Pics')]
@@ -0,0 +1,81 @@
+import time as chrono
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from detection import detecter_pics_vallees
+
+
+def boucle_reference(moving_average, seuil_v, seuil_p):
+    # Boucle d'origine de main.read_and_process_file (fenêtre de ±10 échantillons)
+    moving_average = pd.Series(moving_average)
+    pics, vallees = [], []
+    previous_type = None
+    for i in range(10, len(moving_average) - 10):
+        if pd.notna(moving_average[i]):
+            window = moving_average[i - 10:i + 11]
+            min_value = window.min()
+            max_value = window.max()
+
+            is_vallee = moving_average[i] == min_value and moving_average[i] < seuil_v
+            is_pic = moving_average[i] == max_value and moving_average[i] > seuil_p
+
+            if is_pic and previous_type != "pic":
+                pics.append(i)
+                previous_type = "pic"
+            elif is_vallee and previous_type != "val":
+                vallees.append(i)
+                previous_type = "val"
+    return np.array(pics, dtype=np.int64), np.array(vallees, dtype=np.int64)
+
+
+def _sinus_bruite(n=20_000, graine=0):
+    rng = np.random.default_rng(graine)
+    temps = np.arange(n) / 1000
+    vitesse = 4.45 + 0.2 * np.sin(2 * np.pi * 1.4 * temps) + rng.normal(0, 0.02, n)
+    return pd.Series(vitesse).rolling(window=21, center=True).mean().to_numpy(copy=True)
+
+
+def _plateaux():
+    # Paliers exacts (égalités dans la fenêtre) et pics consécutifs sans vallée entre eux
+    signal = np.repeat([4.4, 4.6, 4.6, 4.3, 4.7, 4.4, 4.8, 4.8, 4.2, 4.6, 4.7, 4.3], 15).astype(np.float64)
+    return signal
+
+
+def _nan_bords():
+    signal = _sinus_bruite(5_000, graine=1)
+    signal[1_000:1_030] = np.nan
+    return signal
+
+
+SIGNAUX = {
+    'sinus_bruite': _sinus_bruite,
+    'plateaux': _plateaux,
+    'nan_bords': _nan_bords,
+    'constant': lambda: np.full(200, 4.45),
+    'court': lambda: np.array([4.2, 4.7, 4.2, 4.7]),
+    'vide': lambda: np.empty(0),
+}
+
+
+@pytest.mark.parametrize('nom', SIGNAUX)
+@pytest.mark.parametrize('seuil_v, seuil_p', [(4.35, 4.55), (4.6, 4.3), (4.45, 4.45), (5.0, 4.0)])
+def test_equivalence_boucle(nom, seuil_v, seuil_p):
+    signal = SIGNAUX[nom]()
+    pics_ref, vallees_ref = boucle_reference(signal, seuil_v, seuil_p)
+    pics, vallees = detecter_pics_vallees(signal, seuil_v, seuil_p)
+    np.testing.assert_array_equal(pics, pics_ref)
+    np.testing.assert_array_equal(vallees, vallees_ref)
+
+
+def test_plus_rapide_que_boucle():
+    signal = _sinus_bruite(20_000)
+    debut = chrono.perf_counter()
+    boucle_reference(signal, 4.35, 4.55)
+    duree_boucle = chrono.perf_counter() - debut
+    debut = chrono.perf_counter()
+    detecter_pics_vallees(signal, 4.35, 4.55)
+    duree_vectorisee = chrono.perf_counter() - debut
+    print(f"boucle {duree_boucle:.3f} s, vectorisé {duree_vectorisee:.4f} s")
+    assert duree_vectorisee < duree_boucle
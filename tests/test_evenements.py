@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from evenements import (DRAPEAU_AVERTISSEMENT, DRAPEAU_ERREUR, LIFT_DOWN, LIFT_OFF, PIC, VALLEE, TYPES,
+                        TableEvenements, erreurs)
+
+
+def test_croissance_par_ajouter():
+    # Capacité doublée à la demande, valeurs gardées d'un agrandissement à l'autre
+    table = TableEvenements(capacite=1)
+    for k in range(100):
+        table.ajouter(0.01 * k, 4.4 + 0.001 * k, PIC if k % 2 else VALLEE, drapeaux=k % 3)
+    assert len(table) == 100
+    assert 100 <= len(table._temps) <= 128
+    np.testing.assert_array_equal(table.temps, 0.01 * np.arange(100))
+    np.testing.assert_allclose(table.valeurs, 4.4 + 0.001 * np.arange(100), rtol=1e-6)
+    np.testing.assert_array_equal(table.types, np.where(np.arange(100) % 2, PIC, VALLEE))
+    np.testing.assert_array_equal(table.drapeaux, np.arange(100) % 3)
+    assert table.valeurs.dtype == np.float32
+    assert table.nbytes() == 100 * 14
+
+    table.ajouter(2.0, None, LIFT_DOWN)
+    assert np.isnan(table.valeurs[-1])
+
+
+def test_croissance_par_ajouter_tableaux():
+    table = TableEvenements(capacite=4, dtype_valeurs=np.float64)
+    table.ajouter_tableaux([0.1, 0.2, 0.3], [4.3, 4.2, 4.1], VALLEE)
+    table.ajouter_tableaux(np.arange(10) / 10, None, LIFT_OFF)
+    table.ajouter_tableaux([], [], PIC)
+    assert len(table) == 13
+    assert len(table._temps) >= 13
+    np.testing.assert_array_equal(table.valeurs[:3], [4.3, 4.2, 4.1])
+    assert np.isnan(table.valeurs[3:]).all()
+    np.testing.assert_array_equal(table.types, [VALLEE] * 3 + [LIFT_OFF] * 10)
+    assert table.nbytes() == 13 * 18
+
+
+def test_depuis_indices():
+    temps = np.arange(10) / 100
+    signal = np.linspace(4.0, 5.0, 10)
+    table = TableEvenements.depuis_indices(temps, signal, {PIC: [2, 7], LIFT_DOWN: [4]}, dtype_valeurs=np.float64)
+    np.testing.assert_array_equal(table.temps, temps[[2, 7, 4]])
+    np.testing.assert_array_equal(table.valeurs[:2], signal[[2, 7]])
+    assert np.isnan(table.valeurs[2])
+    np.testing.assert_array_equal(table.types, [PIC, PIC, LIFT_DOWN])
+
+
+def test_concatener():
+    premiere = TableEvenements.depuis_indices(np.arange(5.0), np.arange(5.0), {PIC: [0, 3]})
+    seconde = TableEvenements.depuis_indices(np.arange(5.0), np.arange(5.0), {VALLEE: [1, 2, 4]})
+    seconde.marquer_ecarts(0.0, 1.5)
+    cohorte = TableEvenements.concatener([premiere, seconde])
+    np.testing.assert_array_equal(cohorte.temps, [0, 3, 1, 2, 4])
+    np.testing.assert_array_equal(cohorte.types, [PIC, PIC, VALLEE, VALLEE, VALLEE])
+    np.testing.assert_array_equal(cohorte.drapeaux, [0, 0, 0, DRAPEAU_ERREUR, 0])
+    assert cohorte.valeurs.dtype == np.float32
+    assert len(TableEvenements.concatener([])) == 0
+
+    exactes = TableEvenements.depuis_indices(np.arange(5.0), np.arange(5.0), {PIC: [1]}, dtype_valeurs=np.float64)
+    assert TableEvenements.concatener([exactes, exactes]).valeurs.dtype == np.float64
+
+
+def test_trier_stable():
+    # Temps égaux : l'ordre d'ajout départage
+    table = TableEvenements()
+    table.ajouter_tableaux([0.3, 0.1, 0.2], [1.0, 2.0, 3.0], PIC)
+    table.ajouter_tableaux([0.1, 0.3], None, LIFT_DOWN)
+    table.ajouter_tableaux([0.1], [4.0], VALLEE)
+    triee = table.trier()
+    np.testing.assert_array_equal(triee.temps, [0.1, 0.1, 0.1, 0.2, 0.3, 0.3])
+    np.testing.assert_array_equal(triee.types, [PIC, LIFT_DOWN, VALLEE, PIC, PIC, LIFT_DOWN])
+    # La table d'origine n'est pas modifiée
+    np.testing.assert_array_equal(table.temps, [0.3, 0.1, 0.2, 0.1, 0.3, 0.1])
+
+
+def test_selection_et_entre():
+    table = TableEvenements()
+    table.ajouter_tableaux(np.arange(0.0, 10.0, 1.0), np.arange(10.0), PIC)
+    table.ajouter_tableaux(np.arange(0.5, 10.0, 1.0), np.arange(10.0), VALLEE)
+    triee = table.trier()
+
+    pics = triee.selection(PIC)
+    np.testing.assert_array_equal(pics.temps, np.arange(0.0, 10.0, 1.0))
+    assert (pics.types == PIC).all()
+    assert len(triee.selection(LIFT_OFF)) == 0
+
+    # Bornes incluses
+    tranche = triee.entre(2.0, 4.5)
+    np.testing.assert_array_equal(tranche.temps, [2.0, 2.5, 3.0, 3.5, 4.0, 4.5])
+    np.testing.assert_array_equal(tranche.types, [PIC, VALLEE] * 3)
+    assert len(triee.entre(20.0, 30.0)) == 0
+
+
+def test_drapeaux_des_ecarts():
+    # Écart au prochain événement du même type ; le dernier de chaque type n'a pas d'écart
+    table = TableEvenements()
+    table.ajouter_tableaux([0.0, 0.1, 0.6, 500.0], None, PIC)
+    table.ajouter_tableaux([0.3, 0.8], None, VALLEE)
+    np.testing.assert_allclose(table.ecarts_suivants(), [0.1, 0.5, 499.4, np.nan, 0.5, np.nan])
+    table.marquer_ecarts(0.25, 400)
+    np.testing.assert_array_equal(table.drapeaux, [DRAPEAU_AVERTISSEMENT, 0, DRAPEAU_ERREUR, 0, 0, 0])
+
+    # Les anciens drapeaux d'écart sont effacés ; bornes par événement (cadence)
+    table.marquer_ecarts(np.array([0.05, 0.6, 0.0, 0.0, 0.0, 0.0]), np.full(6, 1000.0))
+    np.testing.assert_array_equal(table.drapeaux, [0, DRAPEAU_AVERTISSEMENT, 0, 0, 0, 0])
+
+
+def test_drapeaux_sur_ecarts_arrondis():
+    # 0.282 - 0.032 vaut 0.24999999999999997 : arrondi à 4 décimales, l'écart est exactement la borne
+    table = TableEvenements()
+    table.ajouter_tableaux([0.032, 0.282], None, LIFT_DOWN)
+    assert table.ecarts_suivants()[0] < 0.25
+    assert table.marquer_ecarts(0.25, 400).drapeaux[0] == DRAPEAU_AVERTISSEMENT
+    assert table.marquer_ecarts(0.25, 400, decimales=4).drapeaux[0] == 0
+
+
+def test_erreurs():
+    codes = erreurs(np.array([0, DRAPEAU_ERREUR, DRAPEAU_AVERTISSEMENT, DRAPEAU_ERREUR | DRAPEAU_AVERTISSEMENT],
+                             dtype=np.uint8))
+    assert list(codes) == ['', 'Erreur', 'Avertissement', 'Erreur']
+
+
+def test_vers_pandas_sans_copie():
+    table = TableEvenements.depuis_indices(np.arange(1000) / 1000, np.linspace(4, 5, 1000),
+                                           {PIC: np.arange(0, 1000, 7), LIFT_OFF: np.arange(3, 1000, 11)})
+    df = table.vers_pandas()
+    assert list(df.columns) == ['Temps (ms)', 'Valeur', 'Type', 'Drapeaux']
+    assert np.shares_memory(df['Temps (ms)'].to_numpy(), table.temps)
+    assert np.shares_memory(df['Valeur'].to_numpy(), table.valeurs)
+    assert np.shares_memory(df['Drapeaux'].to_numpy(), table.drapeaux)
+    assert isinstance(df['Type'].dtype, pd.CategoricalDtype)
+    assert np.shares_memory(df['Type'].array.codes, table.types)
+    assert list(df['Type'].cat.categories) == list(TYPES)
+    assert df['Type'].iloc[0] == 'Pic' and df['Type'].iloc[-1] == 'levé de Pied'
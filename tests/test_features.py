@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import extraire_features, seuils_fenetres
+
+THRESHOLDS = {
+    "before_8500": {"peak": 1.935, "valley": 1.9235},
+    "after_8500": {"peak": 1.9425, "valley": 1.929}
+}
+
+
+def boucle_reference(signal, validation_col, window_size):
+    # Boucle d'origine de MachineLearningWalk.extract_features
+    features = []
+    labels = []
+    for i in range(len(signal) - window_size):
+        window = signal[i:i + window_size]
+        val_window = validation_col[i:i + window_size]
+
+        if i < 8500:
+            peak_threshold = THRESHOLDS["before_8500"]["peak"]
+            valley_threshold = THRESHOLDS["before_8500"]["valley"]
+        else:
+            peak_threshold = THRESHOLDS["after_8500"]["peak"]
+            valley_threshold = THRESHOLDS["after_8500"]["valley"]
+
+        max_val = np.max(window)
+        min_val = np.min(window)
+        max_index = np.argmax(window)
+        min_index = np.argmin(window)
+        features.append([max_val, min_val, max_index, min_index])
+
+        if (max_val >= peak_threshold and min_val <= valley_threshold
+                and max_index < min_index and min_index - max_index < window_size):
+            if 'DC' in val_window and 'SC' in val_window:
+                labels.append(1)
+            else:
+                labels.append(0)
+        else:
+            labels.append(0)
+    return np.array(features).reshape(-1, 4), np.array(labels)
+
+
+def _session(n, graine=0):
+    # Vitesse lissée autour des seuils ; le double appui tombe pendant la descente de la vitesse
+    rng = np.random.default_rng(graine)
+    temps = np.arange(n) / 1000
+    vitesse = 1.93 + 0.03 * np.sin(2 * np.pi * 1.4 * temps) + rng.normal(0, 0.002, n)
+    signal = pd.Series(vitesse).rolling(window=21, center=True).mean().to_numpy(copy=True)
+    phase = (1.4 * temps) % 1.0
+    contact = np.where((phase >= 0.45) & (phase < 0.55), 'DC',
+                       np.where((phase >= 0.55) & (phase < 0.95), 'SC', 'Aerial')).astype(object)
+    contact[rng.random(n) < 0.01] = np.nan
+    return signal, contact
+
+
+@pytest.mark.parametrize('taille_bloc', [65536, 1000, 7])
+def test_equivalence_boucle(taille_bloc):
+    signal, contact = _session(12_000)
+    window_size = 140
+    peak_thresholds, valley_thresholds = seuils_fenetres(len(signal) - window_size, THRESHOLDS["before_8500"],
+                                                         THRESHOLDS["after_8500"])
+    X, y = extraire_features(signal, contact, window_size, peak_thresholds, valley_thresholds, taille_bloc)
+    X_reference, y_reference = boucle_reference(signal, contact, window_size)
+    assert y.sum() > 0
+    np.testing.assert_array_equal(X, X_reference.astype(np.float32))
+    np.testing.assert_array_equal(y, y_reference)
+
+
+def test_signal_plus_court_que_la_fenetre():
+    signal, contact = _session(100)
+    X, y = extraire_features(signal, contact, 140, 1.935, 1.9235)
+    assert X.shape == (0, 4) and y.shape == (0,)
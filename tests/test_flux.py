@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flux import _MoyenneGlissante, rejouer_fichier
+from gaitway import charger_session
+from main import read_and_process_file
+from synthetique import generer_session
+
+
+def _vitesse_session(tmp_path):
+    # Vitesse d'une session synthétique relue depuis son export
+    file_path = str(tmp_path / 'session.txt')
+    generer_session(file_path, duree=20.0)
+    return charger_session(file_path, colonnes=[0, 19, 31], cache=False)[19].to_numpy(dtype=np.float64)
+
+
+def _trous_et_paliers():
+    # NaN isolés et en rafale, paliers exacts, valeurs négatives et changements d'échelle
+    rng = np.random.default_rng(3)
+    signal = 4.45 + rng.normal(0, 0.05, 5_000)
+    signal[100] = np.nan
+    signal[1_000:1_040] = np.nan
+    signal[2_000:2_300] = 4.5
+    signal[3_000:3_200] = -rng.random(200)
+    signal[4_000:4_010] = 1e6
+    return signal
+
+
+@pytest.mark.parametrize('fenetre', [3, 21, 101])
+def test_moyenne_egale_a_rolling(tmp_path, fenetre):
+    for signal in (_vitesse_session(tmp_path), _trous_et_paliers()):
+        moyenne = _MoyenneGlissante(fenetre)
+        en_ligne = np.array([moyenne.ajouter(valeur) for valeur in signal])
+        hors_ligne = pd.Series(signal).rolling(window=fenetre).mean().to_numpy()
+        # NaN aux mêmes places, valeurs égales aux arrondis près. L'arrondi d'une somme courante suit
+        # la plus grande valeur passée depuis le dernier recalcul (2 fenêtres) : après le pic à 1e6, il
+        # disparaît au recalcul suivant
+        np.testing.assert_array_equal(np.isnan(en_ligne), np.isnan(hors_ligne))
+        echelle = pd.Series(np.abs(signal)).rolling(2 * fenetre, min_periods=1).max().to_numpy()
+        valides = ~np.isnan(hors_ligne)
+        ecarts = np.abs(en_ligne[valides] - hors_ligne[valides])
+        assert (ecarts <= 1e-14 * fenetre * echelle[valides]).all()
+
+
+def test_moyenne_exacte_sur_un_palier():
+    signal = np.concatenate((np.linspace(4.0, 5.0, 50), np.full(60, 4.45), np.linspace(5.0, 4.0, 50)))
+    moyenne = _MoyenneGlissante(21)
+    en_ligne = np.array([moyenne.ajouter(valeur) for valeur in signal])
+    assert (en_ligne[70:110] == 4.45).all()
+
+
+def test_longue_session_sans_derive():
+    # Un million d'échantillons : la somme courante reste à l'arrondi près de la moyenne exacte
+    rng = np.random.default_rng(5)
+    signal = 4.45 + rng.normal(0, 0.2, 1_000_000)
+    moyenne = _MoyenneGlissante(21)
+    for valeur in signal:
+        resultat = moyenne.ajouter(valeur)
+    assert abs(resultat - signal[-21:].mean()) < 1e-13
+
+
+def test_rejouer_fichier_identique_au_traitement(tmp_path):
+    file_path = str(tmp_path / 'session.txt')
+    generer_session(file_path, duree=20.0)
+    for en_ligne, hors_ligne in zip(rejouer_fichier(file_path), read_and_process_file(file_path)):
+        pd.testing.assert_frame_equal(en_ligne.reset_index(drop=True), hors_ligne.reset_index(drop=True))
@@ -0,0 +1,33 @@
+import numpy as np
+
+from foulees import segmenter_foulees
+
+
+def test_evenements_par_foulee():
+    poses = [0.0, 1.0, 2.0, 3.0]
+    leves = [0.6, 1.6, 2.6]
+    pics = [0.2, 0.8, 1.3, 2.9]
+    vallees = [0.5, 2.4, 2.5]
+    foulees = segmenter_foulees(poses, leves, pics, vallees)
+    np.testing.assert_array_equal(foulees['Nb Pics'], [2, 1, 1])
+    np.testing.assert_array_equal(foulees['Indice premier Pic'], [0, 2, 3])
+    np.testing.assert_array_equal(foulees['Nb Vallées'], [1, 0, 2])
+    np.testing.assert_array_equal(foulees['Indice première Vallée'], [0, 1, 1])
+    # Les lignes [indice, indice + nb) retrouvent les temps de la foulée
+    for _, foulee in foulees.iterrows():
+        debut, nombre = int(foulee['Indice premier Pic']), int(foulee['Nb Pics'])
+        assert all(foulee['Pose de pied (ms)'] <= t < foulee['Pose suivante (ms)'] for t in pics[debut:debut + nombre])
+
+
+def test_ecart_type_precis_loin_de_zero():
+    # Un grand décalage ne doit pas noyer la variance dans l'arrondi des sommes de carrés
+    rng = np.random.default_rng(0)
+    time = np.arange(200_000) / 1000
+    signal = 1e5 + rng.normal(0, 0.01, len(time))
+    signal[5_000:5_010] = np.nan
+    poses = np.arange(0.0, 200.0, 1.0)
+    foulees = segmenter_foulees(poses, poses + 0.5, time=time, signal=signal)
+    for k in (0, 5, 100):
+        valeurs = signal[k * 1000:(k + 1) * 1000]
+        np.testing.assert_allclose(foulees['Vitesse moyenne (m/s)'][k], np.nanmean(valeurs), rtol=1e-12)
+        np.testing.assert_allclose(foulees['Vitesse écart-type (m/s)'][k], np.nanstd(valeurs), rtol=1e-6)
@@ -0,0 +1,8 @@
+from instrumentation import AUCUNE
+
+
+def test_etape_inactive_sans_etat_partage():
+    with AUCUNE.etape('lecture') as mesure:
+        mesure['Lignes'] = 42
+    with AUCUNE.etape('extrema') as mesure:
+        assert mesure == {}
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import butter, savgol_filter, sosfiltfilt
+
+from detection import detecter_pics_vallees
+from lissage import (COUPURE_BUTTERWORTH, ORDRE_BUTTERWORTH, BanqueMoyennes, balayer, butterworth, lisser,
+                     moyenne_mobile, savitzky_golay)
+
+
+def _vitesse(n=20_000, graine=0):
+    rng = np.random.default_rng(graine)
+    temps = np.arange(n) / 1000
+    return temps, 4.45 + 0.2 * np.sin(2 * np.pi * 1.4 * temps) + rng.normal(0, 0.02, n)
+
+
+def _rolling(signal, fenetre):
+    return pd.Series(np.asarray(signal, dtype=np.float64)).rolling(window=fenetre, center=True).mean().to_numpy()
+
+
+def _comparer(banque, signal, fenetre):
+    # NaN aux mêmes places (bords, fenêtres avec un NaN) et valeurs égales aux arrondis près
+    attendu = _rolling(signal, fenetre)
+    obtenu = banque[fenetre]
+    np.testing.assert_array_equal(np.isnan(obtenu), np.isnan(attendu))
+    np.testing.assert_allclose(obtenu, attendu, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('fenetre', [1, 3, 20, 21, 101, 1001])
+def test_banque_egale_a_rolling(fenetre):
+    _, signal = _vitesse()
+    _comparer(BanqueMoyennes(signal), signal, fenetre)
+
+
+def test_banque_fenetres_aux_bords():
+    # Fenêtre de la taille du signal (une seule valeur au centre) ou plus grande (que des NaN)
+    signal = np.array([4.2, 4.7, 4.4, 4.6, 4.3])
+    banque = BanqueMoyennes(signal)
+    for fenetre in (4, 5, 6, 50):
+        _comparer(banque, signal, fenetre)
+    assert np.isnan(banque[50]).all()
+    assert banque[5][2] == pytest.approx(signal.mean())
+    assert len(BanqueMoyennes(np.empty(0))[21]) == 0
+
+
+def test_banque_fenetres_avec_nan():
+    _, signal = _vitesse(5_000, graine=1)
+    signal[100] = np.nan
+    signal[2_000:2_030] = np.nan
+    banque = BanqueMoyennes(signal)
+    for fenetre in (3, 21, 101):
+        _comparer(banque, signal, fenetre)
+    assert np.isnan(BanqueMoyennes(np.full(50, np.nan))[5]).all()
+
+
+def test_banque_float32():
+    # Entrée float32 (colonnes compactes) : calcul en float64, sortie float64 ou float32 au choix
+    _, signal = _vitesse()
+    signal = signal.astype(np.float32)
+    _comparer(BanqueMoyennes(signal), signal, 21)
+    compacte = BanqueMoyennes(signal, dtype=np.float32)[21]
+    assert compacte.dtype == np.float32
+    np.testing.assert_allclose(compacte, _rolling(signal, 21).astype(np.float32), rtol=1e-6)
+
+
+def test_banque_colonnes_gardees_puis_oubliees():
+    _, signal = _vitesse(1_000)
+    banque = BanqueMoyennes(signal)
+    assert banque[21] is banque[21]
+    banque[11]
+    banque.oublier(21)
+    assert set(banque.colonnes) == {11}
+    banque.oublier()
+    assert not banque.colonnes
+
+
+def test_balayer_egal_a_detecter_pics_vallees():
+    # Chaque point de la grille donne les mêmes pics et vallées qu'une détection isolée
+    temps, signal = _vitesse()
+    fenetres, seuils_v, seuils_p = [11, 21, 41], [4.3, 4.35, 4.4], [4.5, 4.55]
+    banque = BanqueMoyennes(signal)
+    grille = balayer(temps, signal, fenetres, seuils_v, seuils_p, banque)
+    assert len(grille) == len(fenetres) * len(seuils_v) * len(seuils_p)
+    # Les colonnes calculées pour le balayage seul sont libérées
+    assert not banque.colonnes
+
+    for ligne in grille.to_dict('records'):
+        fenetre, seuil_v, seuil_p = ligne['fenetre'], ligne['seuil_v'], ligne['seuil_p']
+        pics, vallees = detecter_pics_vallees(banque[fenetre], seuil_v, seuil_p, fenetre // 2)
+        assert ligne['Nb Pics'] == len(pics)
+        assert ligne['Nb Vallées'] == len(vallees)
+        assert ligne['Intervalle moyen Pics'] == pytest.approx(np.diff(temps[pics]).mean())
+        assert ligne['Écart-type Pics'] == pytest.approx(np.diff(temps[pics]).std())
+        assert ligne['Intervalle moyen Vallées'] == pytest.approx(np.diff(temps[vallees]).mean())
+        assert ligne['Écart-type Vallées'] == pytest.approx(np.diff(temps[vallees]).std())
+
+        # Sur ce signal bruité (pas de paliers), la moyenne de pandas donne les mêmes événements
+        pics_rolling, vallees_rolling = detecter_pics_vallees(_rolling(signal, fenetre), seuil_v, seuil_p,
+                                                              fenetre // 2)
+        np.testing.assert_array_equal(pics, pics_rolling)
+        np.testing.assert_array_equal(vallees, vallees_rolling)
+
+
+def test_balayer_refuse_les_fenetres_paires():
+    temps, signal = _vitesse(1_000)
+    with pytest.raises(ValueError, match='20, 40'):
+        balayer(temps, signal, [21, 20, 40], [4.35], [4.55])
+
+
+@pytest.mark.parametrize('taille_bloc', [None, 1_000, 4_999, 7])
+def test_savgol_par_blocs_egal_a_savgol_filter(taille_bloc):
+    # La marge d'une fenêtre suffit : chaque bloc donne exactement les valeurs du signal entier
+    _, signal = _vitesse()
+    attendu = savgol_filter(signal, 21, 3, mode='interp')
+    np.testing.assert_array_equal(savitzky_golay(signal, 21, 3, taille_bloc), attendu)
+
+
+@pytest.mark.parametrize('taille_bloc', [None, 2_000, 6_001])
+def test_butterworth_par_blocs_egal_a_sosfiltfilt(taille_bloc):
+    # Filtre récursif : la marge de 10 périodes de coupure éteint la réponse des bords de bloc
+    _, signal = _vitesse()
+    sos = butter(ORDRE_BUTTERWORTH, COUPURE_BUTTERWORTH, btype='low', fs=1000.0, output='sos')
+    attendu = sosfiltfilt(sos, signal)
+    np.testing.assert_allclose(butterworth(signal, 1000.0, taille_bloc=taille_bloc), attendu, rtol=0, atol=1e-12)
+
+
+def test_moyenne_mobile_egale_a_rolling():
+    _, signal = _vitesse()
+    np.testing.assert_array_equal(moyenne_mobile(signal, 21), _rolling(signal, 21))
+    np.testing.assert_array_equal(lisser(signal, 'moyenne', 21), _rolling(signal, 21))
+
+
+@pytest.mark.parametrize('lissage', ['savgol', 'butterworth'])
+def test_filtres_avec_nan(lissage):
+    # Les NaN sont comblés pour le filtre puis remis à leur place ; ailleurs le signal reste lissé
+    temps, signal = _vitesse(5_000, graine=2)
+    troue = signal.copy()
+    troue[[0, 700]] = np.nan
+    troue[2_000:2_040] = np.nan
+    lisse = lisser(troue, lissage, 21, temps, taille_bloc=1_500)
+    np.testing.assert_array_equal(np.isnan(lisse), np.isnan(troue))
+    reference = lisser(signal, lissage, 21, temps)
+    loin = np.ones(len(signal), dtype=bool)
+    for debut, fin in ((0, 1), (700, 701), (2_000, 2_040)):
+        loin[max(0, debut - 200):fin + 200] = False
+    np.testing.assert_allclose(lisse[loin], reference[loin], rtol=0, atol=1e-9)
+    assert np.isnan(lisser(np.full(100, np.nan), lissage, 21, temps[:100])).all()
+
+
+def test_dtype_du_signal_garde():
+    # Colonne compacte float32 : résultat float32, chaque bloc seul passant par float64
+    temps, signal = _vitesse()
+    compact = signal.astype(np.float32)
+    for lissage in ('moyenne', 'savgol', 'butterworth'):
+        lisse = lisser(compact, lissage, 21, temps, taille_bloc=3_000)
+        assert lisse.dtype == np.float32, lissage
+        attendu = lisser(compact.astype(np.float64), lissage, 21, temps, taille_bloc=3_000)
+        np.testing.assert_allclose(lisse, attendu.astype(np.float32), rtol=1e-6, err_msg=lissage)
+        assert lisser(signal, lissage, 21, temps).dtype == np.float64
+        assert lisser(compact, lissage, 21, temps, dtype=np.float64).dtype == np.float64
+    assert lisser(list(signal[:100]), 'savgol', 21).dtype == np.float64
+
+
+def test_lissage_inconnu():
+    temps, signal = _vitesse(1_000)
+    with pytest.raises(ValueError, match='gaussien'):
+        lisser(signal, 'gaussien', 21, temps)
+    with pytest.raises(ValueError, match='butterworth'):
+        lisser(signal, 'butterworth', 21)
+    # Fréquence donnée : temps inutile
+    assert len(lisser(signal, 'butterworth', 21, frequence=1000.0)) == len(signal)
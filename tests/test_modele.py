@@ -0,0 +1,105 @@
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from modele import (CONFIGURATION_DEFAUT, FORMAT_MODELE, charger_modele, entrainer, entrainer_incremental,
+                    evenements_motifs, modele_a_jour, scorer_session)
+from synthetique import generer_session
+
+
+@pytest.fixture
+def session(tmp_path):
+    file_path = str(tmp_path / 'session.txt')
+    generer_session(file_path, duree=10.0)
+    return file_path
+
+
+def test_modele_invalide_par_le_fichier_d_entrainement(session, tmp_path):
+    configuration = dict(CONFIGURATION_DEFAUT, n_estimators=5, thresholds='auto')
+    chemin_modele = str(tmp_path / 'modele.joblib')
+    entrainer([session], chemin_modele, configuration)
+    modele = charger_modele(chemin_modele)
+    assert modele['format'] == FORMAT_MODELE
+    assert modele['fichiers'][0]['Chemin'] == os.path.abspath(session)
+    assert modele_a_jour(modele, configuration, [session])
+
+    # Autre configuration, autre chemin, fichier modifié ou disparu : le modèle est périmé
+    assert not modele_a_jour(modele, dict(configuration, window_size=120), [session])
+    assert not modele_a_jour(dict(modele, format=FORMAT_MODELE - 1), configuration, [session])
+    infos = os.stat(session)
+    os.utime(session, ns=(infos.st_atime_ns, infos.st_mtime_ns + 1_000_000_000))
+    assert not modele_a_jour(modele, configuration, [session])
+    os.remove(session)
+    assert not modele_a_jour(modele, configuration, [session])
+
+
+def test_cles_de_seuils_explicites(session, tmp_path):
+    thresholds = {"avant": {"peak": 4.55, "valley": 4.35}, "apres": {"peak": 4.6, "valley": 4.3}}
+    configuration = dict(CONFIGURATION_DEFAUT, n_estimators=5, thresholds=thresholds, ligne_bascule=5000,
+                         cle_avant='avant', cle_apres='apres')
+    modele = entrainer([session], str(tmp_path / 'modele.joblib'), configuration)
+    assert modele['configuration']['ligne_bascule'] == 5000
+
+    with pytest.raises(ValueError, match='before_8500'):
+        entrainer([session], str(tmp_path / 'modele.joblib'), dict(configuration, cle_avant='before_8500'))
+
+
+def test_motifs_sur_predictions_qui_clignotent():
+    # Une fenêtre négative isolée (ou un trou plus court que window_size) ne coupe pas un motif :
+    # les fenêtres des deux suites se recouvrent. Un trou de window_size fenêtres sépare deux motifs.
+    window_size = 5
+    time = np.arange(100) / 1000
+    predictions = np.zeros(100 - window_size, dtype=np.int8)
+    predictions[[10, 11, 13, 14, 18]] = 1
+    predictions[[30, 31, 36]] = 1
+    motifs = evenements_motifs(time, predictions, window_size)
+    np.testing.assert_array_equal(motifs['Première fenêtre'], [10, 30, 36])
+    np.testing.assert_array_equal(motifs['Dernière fenêtre'], [18, 31, 36])
+    np.testing.assert_array_equal(motifs['Nb fenêtres'], [5, 2, 1])
+    np.testing.assert_allclose(motifs['Temps fin'], time[[22, 35, 40]])
+    assert (motifs['Temps début'].to_numpy()[1:] > motifs['Temps fin'].to_numpy()[:-1]).all()
+
+    assert evenements_motifs(time, np.zeros(95, dtype=np.int8), window_size).empty
+    assert len(evenements_motifs(time, np.ones(95, dtype=np.int8), window_size)) == 1
+
+
+def test_entrainement_incremental(tmp_path):
+    # partial_fit sur plusieurs sessions, évaluation sur une session mise de côté, puis scoring de
+    # cette session avec le modèle sauvegardé
+    fichiers = []
+    for graine in range(4):
+        file_path = str(tmp_path / f"session_{graine}.txt")
+        generer_session(file_path, duree=8.0, cadence=80.0 + 4 * graine, graine=graine)
+        fichiers.append(file_path)
+    configuration = dict(CONFIGURATION_DEFAUT, thresholds='auto')
+    chemin_modele = str(tmp_path / 'modele.joblib')
+    modele = entrainer_incremental(fichiers[:3], fichiers[3:], chemin_modele, configuration, epoques=2)
+
+    assert [mesure['Époque'] for mesure in modele['historique']] == [1, 2]
+    for mesure in modele['historique']:
+        assert set(mesure) == {'Époque', 'Fenêtres', 'Durée (s)', 'Mémoire pic (Mo)', 'Accuracy évaluation'}
+        assert mesure['Fenêtres'] == 3 * (8000 - configuration['window_size'])
+        assert mesure['Durée (s)'] > 0
+        assert mesure['Mémoire pic (Mo)'] is None
+        assert 0.9 < mesure['Accuracy évaluation'] <= 1.0
+    assert modele['accuracy'] == modele['historique'][-1]['Accuracy évaluation']
+    assert modele['sessions_evaluation'] == ['session_3.txt']
+
+    motifs = scorer_session(charger_modele(chemin_modele), fichiers[3])
+    assert len(motifs) > 0
+    assert (motifs['Session'] == 'session_3').all()
+    assert (motifs['Version modèle'] == modele['version']).all()
+
+
+def test_memoire_sans_arreter_le_suivi_de_l_appelant(session, tmp_path):
+    configuration = dict(CONFIGURATION_DEFAUT, thresholds='auto')
+    tracemalloc.start()
+    try:
+        modele = entrainer_incremental([session], [session], str(tmp_path / 'modele.joblib'), configuration,
+                                       epoques=1, memoire=True)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert modele['historique'][0]['Mémoire pic (Mo)'] > 0
@@ -0,0 +1,41 @@
+import numpy as np
+
+from detection import detecter_motifs
+
+
+def boucle_reference(valeurs, seuil_pic, seuil_vallee, window_size, ecart_min):
+    # Boucle d'origine de WalkDetector, chaque paire (pic, vallée) distincte gardée une fois
+    vues = set()
+    motifs = []
+    for i in range(len(valeurs) - window_size):
+        fenetre = valeurs[i:i + window_size]
+        max_val, min_val = np.max(fenetre), np.min(fenetre)
+        max_index, min_index = np.argmax(fenetre), np.argmin(fenetre)
+        if (max_val >= seuil_pic and min_val <= seuil_vallee and max_index < min_index
+                and min_index - max_index < window_size and max_val - min_val > ecart_min):
+            paire = (i + max_index, i + min_index)
+            if paire not in vues:
+                vues.add(paire)
+                motifs.append((i,) + paire)
+    return np.array(motifs, dtype=np.int64).reshape(-1, 3)
+
+
+def test_equivalence_boucle():
+    rng = np.random.default_rng(0)
+    temps = np.arange(6_000) / 1000
+    valeurs = 1.93 + 0.01 * np.sin(2 * np.pi * 1.4 * temps) + rng.normal(0, 0.002, len(temps))
+    debuts, pics, vallees = detecter_motifs(valeurs, 1.935, 1.925, window_size=150, ecart_min=0.0125)
+    np.testing.assert_array_equal(np.stack((debuts, pics, vallees), axis=1),
+                                  boucle_reference(valeurs, 1.935, 1.925, 150, 0.0125))
+
+
+def test_motifs_accoles():
+    # Deux motifs pic -> vallée collés : les fenêtres valides forment une seule suite,
+    # mais les deux paires (pic, vallée) doivent ressortir
+    valeurs = np.full(80, 1.93)
+    valeurs[20], valeurs[25] = 1.96, 1.90
+    valeurs[27], valeurs[32] = 1.97, 1.89
+    debuts, pics, vallees = detecter_motifs(valeurs, 1.95, 1.91, window_size=10, ecart_min=0.0125)
+    assert {(p, v) for p, v in zip(pics, vallees)} >= {(20, 25), (27, 32)}
+    np.testing.assert_array_equal(np.stack((debuts, pics, vallees), axis=1),
+                                  boucle_reference(valeurs, 1.95, 1.91, 10, 0.0125))
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evenements import LIFT_DOWN, LIFT_OFF, PIC, VALLEE, TableEvenements
+from main import read_and_process_file, tables_evenements
+from resultats import ecrire_resultats, table_evenements
+from synthetique import generer_session
+
+
+def rapport_reference(vallees, pics, lift_down, lift_off, output_file):
+    # write_results_to_file d'origine (main.py), lift_down et lift_off passés en paramètres
+    with open(output_file, 'w') as f:
+        f.write("Vallées détectées:\t")
+        if not vallees.empty:
+            f.write(f"({len(vallees)})\n")
+            vallees.to_csv(f, index=False, sep='\t', lineterminator="\n")
+            for index, row in vallees.iterrows():
+                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
+                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les vallées\n")
+        else:
+            f.write("Aucune vallée détectée.\n")
+
+        f.write("\nPics détectés:\n")
+        if not pics.empty:
+            pics.to_csv(f, index=False, sep='\t', lineterminator="\n")
+            for index, row in pics.iterrows():
+                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
+                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les pics\n")
+        else:
+            f.write("Aucun pic détecté.\n")
+
+        f.write("\nPose de pied détectées:\t")
+        if not lift_down.empty:
+            f.write(f"({len(lift_down)})\n")
+            lift_down.to_csv(f, index=False, sep='\t', lineterminator="\n")
+            for index, row in lift_down.iterrows():
+                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
+                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les pose de pied\n")
+        else:
+            f.write("Aucune pose de pied détectée.\n")
+
+        f.write("\nLevé de pied détectées:\t")
+        if not lift_off.empty:
+            f.write(f"({len(lift_off)})\n")
+            lift_off.to_csv(f, index=False, sep='\t', lineterminator="\n")
+            for index, row in lift_off.iterrows():
+                if row['Différence de Temps (ms)'] > 400 or row['Différence de Temps (ms)'] < 0.250:
+                    f.write(f"Erreur: Différence de temps {row['Différence de Temps (ms)']} ms à l'index {index} pour les levé de pied\n")
+        else:
+            f.write("Aucune pose de pied détectée.\n")
+
+
+@pytest.fixture
+def tables(tmp_path):
+    # Tables d'une session synthétique : vallees, pics, lift_down, lift_off
+    file_path = str(tmp_path / 'session.txt')
+    generer_session(file_path, duree=20.0)
+    vallees, pics, lift_off, lift_down = read_and_process_file(file_path)
+    return vallees, pics, lift_down, lift_off
+
+
+def _tables_avec_erreurs():
+    # Écarts au-dessus de 400, sous 0.25 et normaux dans chaque table
+    temps = np.array([0.5, 0.9, 500.0, 500.1, 900.2, 900.3])
+    evenements = TableEvenements(dtype_valeurs=np.float64)
+    evenements.ajouter_tableaux(temps, 4.3 + 0.01 * np.arange(6), VALLEE)
+    evenements.ajouter_tableaux(temps + 0.2, 4.6 - 0.01 * np.arange(6), PIC)
+    evenements.ajouter_tableaux(temps + 0.1, None, LIFT_DOWN)
+    evenements.ajouter_tableaux(temps + 0.3, None, LIFT_OFF)
+    vallees, pics, lift_off, lift_down = tables_evenements(evenements)
+    return vallees, pics, lift_down, lift_off
+
+
+def _lire(chemin):
+    with open(chemin, 'rb') as f:
+        return f.read()
+
+
+def test_rapport_identique_a_l_ancien(tables, tmp_path):
+    for cas in (tables, _tables_avec_erreurs()):
+        rapport_reference(*cas, str(tmp_path / 'reference.txt'))
+        ecrire_resultats(*cas, str(tmp_path / 'rapport.txt'))
+        assert _lire(tmp_path / 'rapport.txt') == _lire(tmp_path / 'reference.txt')
+    assert b"Erreur: Diff" in _lire(tmp_path / 'rapport.txt')
+
+
+def test_sections_vides(tables, tmp_path):
+    # Toutes les sections vides sauf les levés de pied : identique à l'ancien rapport
+    vallees, pics, lift_down, lift_off = tables
+    vides = [table.iloc[:0] for table in tables]
+    rapport_reference(*vides[:3], lift_off, str(tmp_path / 'reference.txt'))
+    ecrire_resultats(*vides[:3], lift_off, str(tmp_path / 'rapport.txt'))
+    assert _lire(tmp_path / 'rapport.txt') == _lire(tmp_path / 'reference.txt')
+
+    # Levés de pied vides : seul changement voulu, l'ancien rapport répétait le message des poses de pied
+    rapport_reference(vallees, pics, lift_down, vides[3], str(tmp_path / 'reference.txt'))
+    ecrire_resultats(vallees, pics, lift_down, vides[3], str(tmp_path / 'rapport.txt'))
+    reference = _lire(tmp_path / 'reference.txt').decode()
+    rapport = _lire(tmp_path / 'rapport.txt').decode()
+    assert reference.endswith("Levé de pied détectées:\tAucune pose de pied détectée.\n")
+    assert rapport == reference[:-len("Aucune pose de pied détectée.\n")] + "Aucun levé de pied détecté.\n"
+
+
+@pytest.mark.parametrize('format_sortie', ['parquet', 'jsonl', 'csv.gz'])
+def test_formats_relus_a_l_identique(tables, tmp_path, format_sortie):
+    for cas in (tables, _tables_avec_erreurs()):
+        fichiers = ecrire_resultats(*cas, str(tmp_path / 'resultats.txt'), formats=[format_sortie])
+        assert fichiers == [str(tmp_path / f"resultats.{format_sortie}")]
+        attendu = table_evenements(*cas)
+        if format_sortie == 'parquet':
+            relu = pd.read_parquet(fichiers[0])
+        elif format_sortie == 'jsonl':
+            relu = pd.read_json(fichiers[0], orient='records', lines=True)
+        else:
+            relu = pd.read_csv(fichiers[0], keep_default_na=False, na_values=[''])
+        assert list(relu.columns) == list(attendu.columns)
+        assert len(relu) == len(attendu) == sum(len(table) for table in cas)
+        assert (np.diff(relu['Temps (ms)']) >= 0).all()
+        for colonne in ('Temps (ms)', 'Vitesse (m/s)', 'Différence de Temps (ms)'):
+            np.testing.assert_allclose(relu[colonne].astype(np.float64), attendu[colonne].astype(np.float64),
+                                       rtol=1e-15, err_msg=colonne)
+        for colonne in ('Type', 'Erreur'):
+            np.testing.assert_array_equal(relu[colonne].fillna('').astype(str), attendu[colonne].astype(str),
+                                          err_msg=colonne)
+
+
+def test_format_inconnu(tables, tmp_path):
+    with pytest.raises(ValueError, match='xlsx'):
+        ecrire_resultats(*tables, str(tmp_path / 'resultats.txt'), formats=['txt', 'xlsx'])
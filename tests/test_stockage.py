@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from gaitway import LIGNES_ENTETE
+from stockage import SessionMemoire, convertir_session
+
+
+def _ecrire_export(chemin, lignes):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write('Entête\n' * LIGNES_ENTETE)
+        for ligne in lignes:
+            f.write('\t'.join(ligne) + '\n')
+
+
+def test_colonne_texte_vide_dans_le_premier_bloc(tmp_path):
+    # contact_mode absent des premières lignes : la colonne reste texte grâce à textes
+    lignes = [(f"{i / 1000}", f"{4.4 + i / 1000}", '' if i < 20 else ('DC' if i % 2 else 'SC')) for i in range(50)]
+    chemin = str(tmp_path / 'session.txt')
+    _ecrire_export(chemin, lignes)
+    session = SessionMemoire(convertir_session(chemin, taille_bloc=10, textes=(2,)))
+    assert session.categories(2) == ['DC', 'SC']
+    codes = np.asarray(session.canal(2))
+    assert np.all(codes[:20] == -1) and np.all(codes[20:] >= 0)
+
+
+def test_bloc_non_numerique_apres_un_premier_bloc_numerique(tmp_path):
+    lignes = [(f"{i / 1000}", f"{4.4 + i / 1000}" if i < 25 else 'erreur capteur') for i in range(50)]
+    chemin = str(tmp_path / 'session.txt')
+    _ecrire_export(chemin, lignes)
+    with pytest.raises(ValueError, match=f"colonne 1 non numérique entre les lignes {LIGNES_ENTETE + 21}"):
+        convertir_session(chemin, taille_bloc=10, textes=())
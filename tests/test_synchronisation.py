@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from synchronisation import estimer_decalage
+
+
+def _signaux(decalage=2.3):
+    # Contact au sol gaitway (1 kHz) et charge du tapis (60 Hz) en avance de decalage secondes
+    temps = np.arange(0, 60, 0.001)
+    contact = ((1.4 * temps) % 1 < 0.6).astype(np.float64)
+    temps_tapis = np.arange(0, 60, 1 / 60)
+    rng = np.random.default_rng(0)
+    charge = ((1.4 * (temps_tapis + decalage)) % 1 < 0.6) * 500.0 + rng.normal(0, 20, len(temps_tapis))
+    return temps_tapis, charge, temps, contact
+
+
+def test_decalage_retrouve():
+    decalage, correlation = estimer_decalage(*_signaux(), decalage_max=5)
+    assert decalage == pytest.approx(2.3, abs=0.01)
+    assert correlation > 0.9
+
+
+@pytest.mark.parametrize('valeur', [1.0, 0.0, np.nan])
+def test_contact_constant(valeur):
+    temps_tapis, charge, temps, contact = _signaux()
+    with pytest.raises(ValueError, match='second signal est constant'):
+        estimer_decalage(temps_tapis, charge, temps, np.full(len(temps), valeur))
+
+
+def test_correlation_trop_faible():
+    temps_tapis, _, temps, contact = _signaux()
+    bruit = np.random.default_rng(1).normal(size=len(temps_tapis))
+    with pytest.raises(ValueError, match='corrélation au pic'):
+        estimer_decalage(temps_tapis, bruit, temps, contact)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tapis import (APPUI, COTE, NB_CELLULES, SANS_APPUI, analyser_images, analyser_log, centre_pression,
+                   charge_totale, charge_zones, charger_log, charger_log_compresse, compresser_images,
+                   detecter_contacts, etats_contact)
+
+
+def _ecrire_log(chemin, graine):
+    # Images répétées sur des plages de longueurs variées, dont une plus longue que plusieurs blocs
+    rng = np.random.default_rng(graine)
+    longueurs = np.concatenate((rng.integers(1, 6, 200), [57], rng.integers(1, 4, 50)))
+    distinctes = rng.integers(0, 3, (len(longueurs), NB_CELLULES))
+    images = np.repeat(distinctes, longueurs, axis=0)
+    temps = np.arange(len(images)) * 10.0
+    with open(chemin, 'w', encoding='utf-8') as f:
+        for t, image in zip(temps, images):
+            f.write(';'.join([f"{t}"] + [str(v) for v in image]) + '\n')
+
+
+@pytest.mark.parametrize('taille_bloc', [3, 100, 100_000])
+def test_identique_a_la_compression_complete(tmp_path, taille_bloc):
+    chemins = [str(tmp_path / 'log_1.csv'), str(tmp_path / 'log_2.csv')]
+    for graine, chemin in enumerate(chemins):
+        _ecrire_log(chemin, graine)
+    attendu = compresser_images(*charger_log(chemins))
+    obtenu = charger_log_compresse(chemins, taille_bloc)
+    for colonne_attendue, colonne_obtenue in zip(attendu, obtenu):
+        np.testing.assert_array_equal(colonne_obtenue, colonne_attendue)
+
+
+def _images_vides(n):
+    return np.zeros((n, COTE, COTE), dtype=np.int16)
+
+
+def test_centre_pression_d_une_cellule():
+    # Une seule cellule chargée : le centre de pression est cette cellule ; image vide : NaN
+    images = _images_vides(4)
+    images[0, 2, 5] = 300
+    images[1, 7, 0] = 12
+    images[2, 3, 3] = images[2, 3, 5] = 100
+    ligne, colonne = centre_pression(images)
+    np.testing.assert_array_equal(ligne[:3], [2.0, 7.0, 3.0])
+    np.testing.assert_array_equal(colonne[:3], [5.0, 0.0, 4.0])
+    assert np.isnan(ligne[3]) and np.isnan(colonne[3])
+
+
+def test_charge_des_zones():
+    images = _images_vides(1)
+    images[0, 0, 0] = 1
+    images[0, 1, 6] = 2
+    images[0, 6, 2] = 4
+    images[0, 7, 7] = 8
+    zones = charge_zones(images)
+    assert {nom: int(charge[0]) for nom, charge in zones.items()} == {
+        'Avant-pied gauche': 1, 'Avant-pied droit': 2, 'Talon gauche': 4, 'Talon droit': 8}
+    assert charge_totale(images)[0] == 15
+
+
+def test_hysteresis_entre_les_seuils():
+    # Entre seuil_bas (100) et seuil_haut (200) l'état ne change pas, quel que soit le bruit
+    charge = np.array([150, 50, 120, 180, 199, 250, 190, 101, 150, 100, 99, 180, 201])
+    etats = etats_contact(charge, seuil_haut=200, seuil_bas=100)
+    assert pd.isna(etats[0])
+    assert list(etats[1:]) == [SANS_APPUI] * 4 + [APPUI] * 5 + [SANS_APPUI] * 2 + [APPUI]
+
+    # Une charge qui oscille entre les deux seuils ne produit aucune transition
+    oscillante = np.concatenate(([300], 100 + 99 * (np.arange(200) % 2), [0]))
+    transitions = detecter_contacts(oscillante, seuil_haut=200, seuil_bas=100)
+    np.testing.assert_array_equal(transitions['lift_down'], [0])
+    np.testing.assert_array_equal(transitions['lift_off'], [201])
+
+
+def test_debuts_et_fins_de_contact():
+    # Deux appuis (images 20 à 39 puis 60 à 79) sur un tapis au repos, une image toutes les 10 ms.
+    # Comme pour contact_mode, le premier état connu compte comme une transition (levé à l'image 0)
+    n = 100
+    temps = 1_700_000_000_000 + 10.0 * np.arange(n)
+    images = _images_vides(n) + 3
+    images[20:40, 5:7, 1:3] += 200
+    images[60:80, 0:2, 5:7] += 150
+    images[30, 5, 1] -= 120
+    table_images, evenements = analyser_images(temps, images)
+
+    assert (table_images['Charge totale'].to_numpy()[[0, 19, 40, 99]] == 0).all()
+    assert (table_images['Contact'][20:40] == APPUI).all()
+    np.testing.assert_allclose(table_images['CoP ligne'][60:80], 0.5)
+    np.testing.assert_allclose(table_images['CoP colonne'][60:80], 5.5)
+    assert (table_images['Charge Talon gauche'][20:40] > 0).all()
+    assert (table_images['Charge Avant-pied droit'][60:80] == 600).all()
+
+    poses = evenements[evenements['Type'] == 'Pose de Pied']
+    leves = evenements[evenements['Type'] == 'levé de Pied']
+    np.testing.assert_array_equal(poses['Temps (ms)'], temps[[20, 60]])
+    np.testing.assert_array_equal(leves['Temps (ms)'], temps[[0, 40, 80]])
+    np.testing.assert_array_equal(evenements['Image'], [0, 20, 40, 60, 80])
+    np.testing.assert_allclose(poses['Différence de Temps (ms)'], [400.0, np.nan])
+    np.testing.assert_allclose(leves['Différence de Temps (ms)'], [400.0, 400.0, np.nan])
+
+
+def test_analyse_d_un_log(tmp_path):
+    chemin = str(tmp_path / 'session_log.csv')
+    images = _images_vides(50)
+    images[10:30, 4, 4] = 500
+    with open(chemin, 'w', encoding='utf-8') as f:
+        for k, image in enumerate(images.reshape(50, -1)):
+            f.write(';'.join([f"{1000.0 + 10 * k}"] + [str(v) for v in image]) + '\n')
+    temps, lues = charger_log(chemin)
+    assert lues.dtype == np.int16 and lues.shape == (50, COTE, COTE)
+    np.testing.assert_array_equal(lues, images)
+    _, evenements = analyser_log(chemin)
+    np.testing.assert_array_equal(evenements.loc[evenements['Type'] == 'Pose de Pied', 'Temps (ms)'], [1100.0])
+    np.testing.assert_array_equal(evenements.loc[evenements['Type'] == 'levé de Pied', 'Temps (ms)'],
+                                  [1000.0, 1300.0])
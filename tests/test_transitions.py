@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from detection import TRANSITIONS_CONTACT, detecter_transitions
+
+
+def boucle_reference(contact_mode, de, vers):
+    # Boucles d'origine de main.read_and_process_file (une par transition), les NaN sont sautés
+    # et le mode précédent est le dernier mode connu ; de=None : n'importe quel mode précédent
+    indices = []
+    previous_mode = None
+    for i in range(len(contact_mode)):
+        if pd.notna(contact_mode[i]):
+            current_mode = contact_mode[i]
+            if current_mode == vers and previous_mode != vers and (de is None or previous_mode == de):
+                indices.append(i)
+            previous_mode = current_mode
+    return np.array(indices, dtype=np.intp)
+
+
+def _modes_melanges(n=5_000, graine=0):
+    # Suite de modes par paliers, avec des NaN et un mode inconnu du détecteur
+    rng = np.random.default_rng(graine)
+    modes = np.array(['SC', 'DC', 'Aerial', 'Inconnu', None], dtype=object)
+    paliers = rng.choice(len(modes), size=n // 10, p=[0.35, 0.3, 0.2, 0.05, 0.1])
+    return pd.Series(modes[np.repeat(paliers, rng.integers(1, 20, size=len(paliers)))][:n])
+
+
+def test_equivalence_boucle():
+    contact_mode = _modes_melanges()
+    resultats = detecter_transitions(contact_mode)
+    assert set(resultats) == set(TRANSITIONS_CONTACT)
+    for nom, (de, vers) in TRANSITIONS_CONTACT.items():
+        np.testing.assert_array_equal(resultats[nom], boucle_reference(contact_mode, de, vers), err_msg=nom)
+
+
+def test_dc_vers_sc():
+    # Seules les poses de pied qui suivent un double appui comptent, un NaN entre les deux est sauté
+    contact_mode = pd.Series(['Aerial', 'SC', 'DC', 'DC', 'SC', 'Aerial', 'DC', None, 'SC', 'SC'])
+    resultats = detecter_transitions(contact_mode)
+    np.testing.assert_array_equal(resultats['dc_vers_sc'], [4, 8])
+    np.testing.assert_array_equal(resultats['lift_down'], [1, 4, 8])
+
+
+def test_nan_ne_coupe_pas_un_palier():
+    # SC, NaN, SC est un seul appui : une seule pose de pied
+    contact_mode = pd.Series(['Aerial', 'SC', np.nan, 'SC', 'Aerial', None, 'Aerial'])
+    resultats = detecter_transitions(contact_mode)
+    np.testing.assert_array_equal(resultats['lift_down'], [1])
+    np.testing.assert_array_equal(resultats['lift_off'], [0, 4])
+
+
+def test_mode_inconnu():
+    # Un mode inconnu est un mode précédent comme un autre (il coupe le palier, comme la boucle
+    # d'origine) ; une paire qui nomme un mode absent des données ne retourne rien
+    contact_mode = pd.Series(['SC', 'Glisse', 'SC', 'Aerial'])
+    resultats = detecter_transitions(contact_mode, {'lift_down': (None, 'SC'), 'dc_vers_sc': ('DC', 'SC'),
+                                                     'absent': (None, 'Saut')})
+    np.testing.assert_array_equal(resultats['lift_down'], [0, 2])
+    assert len(resultats['dc_vers_sc']) == 0
+    assert len(resultats['absent']) == 0
+
+
+def test_paires_personnalisees():
+    contact_mode = _modes_melanges(graine=1)
+    paires = {'sc_vers_aerial': ('SC', 'Aerial'), 'double_appui': (None, 'DC')}
+    resultats = detecter_transitions(contact_mode, paires)
+    assert set(resultats) == set(paires)
+    for nom, (de, vers) in paires.items():
+        np.testing.assert_array_equal(resultats[nom], boucle_reference(contact_mode, de, vers), err_msg=nom)
+
+
+def test_vide_et_tout_nan():
+    for contact_mode in (pd.Series([], dtype=object), pd.Series([None, np.nan, None])):
+        resultats = detecter_transitions(contact_mode)
+        assert all(len(indices) == 0 for indices in resultats.values())